@@ -0,0 +1,157 @@
+import numpy as np
+from utility import OPTIMAL, UNBOUNDED, INFEASIBLE, ITERATION_LIMIT
+
+# SV_BATCH solves k LPs in standardform that all have the same m x n shape at
+# once. A_stack has the shape (k, m, n), b_stack (k, m) and c_stack (k, n).
+#
+# every LP gets one tableau of shape (m+2) x (n+2) inside one 3-D array T:
+#
+#                 column 0 .. n-1     column n    column n+1
+#                 (NBVars)            (NBVar)     (b)
+#       row 0 .. m-1     A                -1          b
+#       row m            c                 0         -v
+#       row m+1          0                -1         -w
+#
+# column n initially belongs to x_0 of INIT, row m is the z-row of L and row
+# m+1 the w-row of L_H. as both objective rows are updated by every pivot,
+# phase one and phase two run on the same tableau and an LP switches from one
+# to the other by just pricing with the other row. in every iteration all
+# LPs that are not done yet pivot together, the entering and leaving BVars
+# are selected with the Bland-rule for each LP by masked argmins.
+#
+# the function returns four arrays:
+#
+# - status (k,): OPTIMAL, INFEASIBLE, UNBOUNDED or ITERATION_LIMIT per LP
+# - values (k,): the optimal targetfunction values (nan if not optimal)
+# - solutions (k, n): the optimal x (nan if not optimal)
+# - bases (k, m): the indices of the BVars of the last slackform, the same
+#   indices as B of SV, where 0 is x_0 if it could not be made a NBVar
+#   in a degenerate LP.
+
+FEASIBILITY_TOLERANCE = 1e-9                                                    # w-values above -FEASIBILITY_TOLERANCE count as 0 after phase one
+PIVOT_TOLERANCE = 1e-9                                                          # coefficients with a smaller absolute value are treated as 0, so that
+                                                                                # rounding errors neither enter nor become pivots
+
+def sv_batch(A_stack, b_stack, c_stack, max_iterations=None):
+    A_stack = np.asarray(A_stack, dtype=float)
+    (k, m, n) = A_stack.shape
+    row_of_z = m
+    row_of_w = m+1
+
+    # STEP 1: build the tableaus of all LPs.
+    T = np.zeros((k, m+2, n+2))
+    T[:, :m, :n] = A_stack
+    T[:, :m, n] = -1
+    T[:, :m, n+1] = b_stack
+    T[:, row_of_z, :n] = c_stack
+    T[:, row_of_w, n] = -1
+    B = np.tile(np.arange(n+1, n+m+1), (k, 1))
+    N = np.tile(np.r_[np.arange(1, n+1), 0], (k, 1))
+
+    status = np.full(k, OPTIMAL, dtype=object)
+    in_phase_one = np.any(T[:, :m, n+1] < 0, axis=1)                            # only LPs with negative b components need phase one
+    done = np.zeros(k, dtype=bool)
+    iterations = np.zeros(k, dtype=int)
+
+    # STEP 2: the first pivot of L_H: x_0 enters in the row with the minimal b component.
+    lps = np.flatnonzero(in_phase_one)
+    if(lps.size > 0):
+        batch_pivot(T, B, N, lps, np.argmin(T[lps, :m, n+1], axis=1), np.full(lps.size, n))
+
+    # STEP 3: pivot all LPs that are not done yet until each of them is done.
+    while(True):
+        lps = np.flatnonzero(~done)
+        if(lps.size == 0):
+            break
+
+        objective_rows = np.where(in_phase_one[lps], row_of_w, row_of_z)
+        c_bar = T[lps, objective_rows, :n+1]
+        allowed = in_phase_one[lps, None] | (N[lps] != 0)                        # x_0 may only enter in phase one
+        candidates = (c_bar > PIVOT_TOLERANCE) & allowed
+        has_candidate = np.any(candidates, axis=1)
+
+        # LPs without a positive coefficient in their objective row are either
+        # optimal or have finished phase one.
+        finished = lps[~has_candidate]
+        done[finished[~in_phase_one[finished]]] = True
+        for lp in finished[in_phase_one[finished]]:
+            end_phase_one(T, B, N, lp, status, done, in_phase_one)
+
+        if(max_iterations is not None):
+            limited = lps[has_candidate & (iterations[lps] >= max_iterations)]
+            status[limited] = ITERATION_LIMIT
+            done[limited] = True
+
+        selected = has_candidate & ~done[lps]
+        lps = lps[selected]
+        if(lps.size == 0):
+            continue
+        candidates = candidates[selected]
+
+        # Bland-rule: the NBVar with the lowest index enters ...
+        columns_of_x_e = np.argmin(np.where(candidates, N[lps], np.iinfo(int).max), axis=1)
+        columns = T[lps, :m, columns_of_x_e]
+        restricting = columns > PIVOT_TOLERANCE
+        unbounded = ~np.any(restricting, axis=1)
+        status[lps[unbounded]] = UNBOUNDED
+        done[lps[unbounded]] = True
+
+        # ... and of all BVars with the minimal quotient the one with the lowest index leaves.
+        lps = lps[~unbounded]
+        if(lps.size == 0):
+            continue
+        columns_of_x_e = columns_of_x_e[~unbounded]
+        columns = columns[~unbounded]
+        restricting = restricting[~unbounded]
+        quotients = np.full(columns.shape, np.inf)
+        b_bar = np.maximum(T[lps, :m, n+1], 0)                                  # a b' made slightly negative by rounding errors counts as 0,
+        np.divide(b_bar, columns, out=quotients, where=restricting)             # like in simplex.run_simplex
+        ties = restricting & (quotients == np.min(quotients, axis=1, keepdims=True))
+        rows_of_x_l = np.argmin(np.where(ties, B[lps], np.iinfo(int).max), axis=1)
+
+        batch_pivot(T, B, N, lps, rows_of_x_l, columns_of_x_e)
+        iterations[lps] += 1
+
+    # STEP 4: read off the results.
+    optimal = (status == OPTIMAL)
+    values = np.where(optimal, -T[:, row_of_z, n+1], np.nan)
+    x = np.zeros((k, n+m+1))
+    np.put_along_axis(x, B, T[:, :m, n+1], axis=1)
+    solutions = x[:, 1:n+1]
+    solutions[~optimal] = np.nan
+    return (status, values, solutions, B)
+
+# phase one of LP lp has ended: either it is invalid, or x_0 is made a NBVar
+# (if it is still basic, by a degenerate pivot on the largest coefficient in
+# its row) and phase two starts. if no coefficient in its row is above
+# PIVOT_TOLERANCE, x_0 stays a BVar with the value 0, which it keeps, as it
+# may not enter again.
+def end_phase_one(T, B, N, lp, status, done, in_phase_one):
+    (m, n) = (B.shape[1], N.shape[1] - 1)
+    in_phase_one[lp] = False
+    if(-T[lp, m+1, n+1] < -FEASIBILITY_TOLERANCE):                              # the optimal w is negative, so L is invalid
+        status[lp] = INFEASIBLE
+        done[lp] = True
+        return
+    rows_of_x_0 = np.flatnonzero(B[lp] == 0)
+    if(rows_of_x_0.size > 0):
+        row_of_x_0 = rows_of_x_0[0]
+        column_of_x_e = int(np.argmax(np.abs(T[lp, row_of_x_0, :n+1])))
+        if(abs(T[lp, row_of_x_0, column_of_x_e]) > PIVOT_TOLERANCE):
+            batch_pivot(T, B, N, np.array([lp]), np.array([row_of_x_0]), np.array([column_of_x_e]))
+
+# pivots the tableaus of the LPs lps at once, the same rank-1 update as
+# utility.pivot, just for one pivot row and column per LP.
+def batch_pivot(T, B, N, lps, rows_of_x_l, columns_of_x_e):
+    corresp_coeffs = T[lps, rows_of_x_l, columns_of_x_e]
+    pivot_rows = T[lps, rows_of_x_l, :] / corresp_coeffs[:, None]
+    columns_of_x_e_in_T = T[lps, :, columns_of_x_e]
+
+    T[lps] -= columns_of_x_e_in_T[:, :, None] * pivot_rows[:, None, :]
+    T[lps, rows_of_x_l, :] = pivot_rows
+    T[lps, :, columns_of_x_e] = -columns_of_x_e_in_T / corresp_coeffs[:, None]
+    T[lps, rows_of_x_l, columns_of_x_e] = 1 / corresp_coeffs
+
+    temp = np.copy(N[lps, columns_of_x_e])
+    N[lps, columns_of_x_e] = B[lps, rows_of_x_l]
+    B[lps, rows_of_x_l] = temp
@@ -0,0 +1,205 @@
+import numpy as np
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import scipy
+import scipy.sparse
+from sv import sv
+from exhaustive import exhaustive
+
+# the benchmark suite times the solvers on generated families of LPs. every
+# family is a generator function that gets a numpy random Generator and the
+# parameters of one size and returns a LP in standardform (A, b, c):
+#
+# - "dense": random dense LP, valid and restricted (A > 0, b > 0)
+# - "sparse": like "dense", but A is a scipy.sparse matrix with the given density
+# - "degenerate": half of b is 0, so that many pivots do not change the value
+# - "klee_minty": the Klee-Minty cube, on which the Dantzig-rule needs 2^d - 1 pivots
+# - "transportation": supplies and demands, the demands need INIT (b < 0)
+#
+# every solver is timed on every size of every family with warmup runs that
+# are not measured and repeats runs that are, and the results are written as
+# JSON, one record per (family, size, solver), together with the commit and
+# the versions, so that runs of different commits can be compared:
+#
+#   python benchmark.py --repeats 20 --output benchmark.json
+
+def dense_lp(rng, m, n):
+    A = rng.uniform(1, 10, (m, n))
+    b = rng.uniform(10, 100, m)
+    c = rng.uniform(1, 10, n)
+    return (A, b, c)
+
+def sparse_lp(rng, m, n, density=0.01):
+    A = scipy.sparse.random(m, n, density=density, format="csr", random_state=rng,
+                            data_rvs=lambda size: rng.uniform(1, 10, size))
+    A = scipy.sparse.vstack([A, scipy.sparse.csr_matrix(np.ones((1, n)))], format="csr")   # one full row keeps the LP restricted
+    b = rng.uniform(10, 100, m+1)
+    c = rng.uniform(1, 10, n)
+    return (A, b, c)
+
+def degenerate_lp(rng, m, n):
+    A = rng.uniform(1, 10, (m, n)) * (rng.uniform(0, 1, (m, n)) < 0.5)
+    A[0] = rng.uniform(1, 10, n)                                                # a full row keeps the LP restricted
+    b = rng.uniform(10, 100, m)
+    b[1::2] = 0
+    c = rng.uniform(1, 10, n)
+    return (A, b, c)
+
+def klee_minty_lp(rng, d):
+    A = np.zeros((d, d))
+    for i in range(0, d):
+        A[i, :i] = 2.0 ** np.arange(i+1, 1, -1)
+        A[i, i] = 1
+    b = 5.0 ** np.arange(1, d+1)
+    c = 2.0 ** np.arange(d-1, -1, -1)
+    return (A, b, c)
+
+def transportation_lp(rng, sources, sinks):
+    supplies = rng.uniform(50, 100, sources)
+    demands = rng.uniform(10, 40, sinks) * (supplies.sum() / (sinks * 40))      # the total demand never exceeds the total supply
+    costs = rng.uniform(1, 10, (sources, sinks))
+    A = np.zeros((sources + sinks, sources * sinks))                            # x_ij is the column i * sinks + j
+    for i in range(0, sources):
+        A[i, i*sinks:(i+1)*sinks] = 1                                           # sum_j x_ij <= supply_i
+    for j in range(0, sinks):
+        A[sources + j, j::sinks] = -1                                           # sum_i x_ij >= demand_j
+    b = np.r_[supplies, -demands]
+    c = -costs.ravel()                                                          # the costs are minimized
+    return (A, b, c)
+
+# family name: (generator, list of sizes), where a size is a dict of parameters.
+FAMILIES = {
+    "dense": (dense_lp, [{"m": 10, "n": 10}, {"m": 50, "n": 50}, {"m": 200, "n": 200}]),
+    "sparse": (sparse_lp, [{"m": 200, "n": 400}, {"m": 2000, "n": 4000, "density": 0.002}]),
+    "degenerate": (degenerate_lp, [{"m": 10, "n": 10}, {"m": 100, "n": 100}]),
+    "klee_minty": (klee_minty_lp, [{"d": 4}, {"d": 8}, {"d": 12}]),
+    "transportation": (transportation_lp, [{"sources": 3, "sinks": 4}, {"sources": 10, "sinks": 20}]),
+}
+
+# solver name: function that solves a LP in standardform and returns a SolveResult.
+SOLVERS = {
+    "sv": sv,
+    "sv_tableau": lambda lp: sv(lp, method="tableau"),
+    "sv_revised": lambda lp: sv(lp, method="revised"),
+    "sv_dual": lambda lp: sv(lp, method="dual"),
+    "sv_bounded": lambda lp: sv(lp, method="bounded"),
+    "sv_ipm": lambda lp: sv(lp, method="ipm"),
+    "sv_dantzig": lambda lp: sv(lp, method="tableau", pricing="dantzig"),
+    "sv_steepest": lambda lp: sv(lp, method="tableau", pricing="steepest_edge"),
+    "sv_devex": lambda lp: sv(lp, method="tableau", pricing="devex"),
+    "sv_partial": lambda lp: sv(lp, method="tableau", pricing="partial"),
+    "exhaustive": exhaustive,
+}
+
+EXHAUSTIVE_LIMIT = 100000                                                       # EXHAUSTIVE is skipped on LPs with more index sets
+TABLEAU_SOLVERS = ("sv_tableau", "sv_dual", "sv_bounded", "sv_dantzig", "sv_steepest", "sv_devex",
+                   "sv_partial")                                                # solvers that densify a sparse A
+
+# copies the arrays of a LP, so that every run gets its own LP.
+def copy_of_lp(lp):
+    return tuple(array.copy() for array in lp)
+
+# the reason why solver is not run on lp, or None if it is run.
+def reason_to_skip(solver, lp):
+    (A, b, c) = lp
+    if(solver == "exhaustive"):
+        if(math.comb(len(b) + len(c), len(b)) > EXHAUSTIVE_LIMIT):
+            return "more than " + str(EXHAUSTIVE_LIMIT) + " index sets"
+        if(scipy.sparse.issparse(A)):
+            return "sparse A"
+    if(solver in TABLEAU_SOLVERS and scipy.sparse.issparse(A) and A.shape[0] * A.shape[1] > 10**6):
+        return "sparse A too large for a dense tableau"
+    return None
+
+# times solver on lp and returns the record of the run.
+def time_solver(solver, lp, warmup, repeats):
+    solve = SOLVERS[solver]
+    for k in range(0, warmup):
+        solve(copy_of_lp(lp))
+
+    durations = np.empty(repeats)
+    for k in range(0, repeats):
+        lp_of_run = copy_of_lp(lp)
+        starttime = time.perf_counter_ns()
+        result = solve(lp_of_run)
+        durations[k] = time.perf_counter_ns() - starttime
+
+    milliseconds = durations / 1e6
+    return {
+        "status": result.status,
+        "objective": result.objective,
+        "iterations": result.iterations,
+        "repeats": repeats,
+        "min_ms": float(milliseconds.min()),
+        "mean_ms": float(milliseconds.mean()),
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p90_ms": float(np.percentile(milliseconds, 90)),
+        "p99_ms": float(np.percentile(milliseconds, 99)),
+        "max_ms": float(milliseconds.max()),
+    }
+
+def run_benchmarks(families, solvers, warmup=1, repeats=10, seed=0):
+    records = list()
+    for family in families:
+        (generator, sizes) = FAMILIES[family]
+        for size in sizes:
+            lp = generator(np.random.default_rng(seed), **size)
+            for solver in solvers:
+                record = {"family": family, "size": size, "solver": solver}
+                reason = reason_to_skip(solver, lp)
+                if(reason is not None):
+                    record["skipped"] = reason
+                else:
+                    record.update(time_solver(solver, lp, warmup, repeats))
+                records.append(record)
+                print_record(record)
+    return records
+
+def print_record(record):
+    size = ", ".join(key + "=" + str(value) for (key, value) in record["size"].items())
+    if("skipped" in record):
+        print("%-15s %-30s %-12s skipped (%s)" % (record["family"], size, record["solver"], record["skipped"]))
+    else:
+        print("%-15s %-30s %-12s %-10s p50 %10.3f ms  p90 %10.3f ms  %6d pivots"
+              % (record["family"], size, record["solver"], record["status"],
+                 record["p50_ms"], record["p90_ms"], record["iterations"]))
+
+# the commit of the repository this file is in, no matter where it is run from.
+def commit_of_working_tree():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="times the solvers on generated families of LPs")
+    parser.add_argument("--families", nargs="+", choices=list(FAMILIES), default=list(FAMILIES))
+    parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    parser.add_argument("--warmup", type=int, default=1, help="runs per LP and solver that are not measured")
+    parser.add_argument("--repeats", type=int, default=10, help="measured runs per LP and solver")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the LP generators")
+    parser.add_argument("--output", help="file the JSON results are written to")
+    arguments = parser.parse_args(argv)
+
+    records = run_benchmarks(arguments.families, arguments.solvers, arguments.warmup, arguments.repeats, arguments.seed)
+    report = {
+        "commit": commit_of_working_tree(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "machine": platform.machine(),
+        "seed": arguments.seed,
+        "results": records,
+    }
+    if(arguments.output is not None):
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
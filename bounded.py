@@ -0,0 +1,199 @@
+import numpy as np
+import logging
+from utility import pivot, is_sparse
+from utility import OPTIMAL, UNBOUNDED, INFEASIBLE, ITERATION_LIMIT, tolerances_or_default
+from pricing import make_pricing_rule
+from result import SolveResult
+from stats import phase
+
+# BOUNDED SIMPLEX solves LPs in standardform with bounds on the structure
+# variables, (A, b, c, l, u):
+#
+#     max c*x   with   A*x <= b   and   l <= x <= u
+#
+# l may be None (all 0) and must be finite, u may be None (all unbounded) and
+# may contain np.inf. the bounds never become conditions, so the tableau stays
+# (m+1) x (n+1) no matter how many bounds there are.
+#
+# first x is shifted to x' = x - l, so that 0 <= x' <= w with w = u - l and
+# A*x' <= b - A*l. every variable (x', the slack variables and x_0 of phase
+# one) then has the bounds 0 and w_k (w_k = inf for all but x').
+#
+# a NBVar x_k can be at either of its bounds. if it is at w_k, it is
+# complemented: it is replaced by x_k = w_k - x~_k in the slackform, so that
+# x~_k = 0 and the slackform looks like that of SIMPLEX again (see flip).
+# the ratio test for the entering x_e then has three kinds of limits:
+#
+# - a BVar decreases to 0 (a_ie > 0), like in SIMPLEX,
+# - a BVar increases to its upper bound (a_ie < 0), which pivots and then
+#   complements x_l, as it becomes a NBVar at its upper bound,
+# - x_e reaches its own upper bound w_e first. then x_e is just complemented
+#   (a bound flip) and no pivot is needed at all.
+#
+# phase one is the one of INIT (x_0 enters in the row with the minimal b
+# component and -x_0 is maximized), with the w-row as an extra row of the
+# tableau, like in sv_batch.
+
+# returns a SolveResult (see result.py) for the LP (A, b, c, l, u). iterations
+# counts the pivots and the bound flips. tolerances may be a utility.Tolerances.
+def bounded_simplex(lp_with_bounds, max_iterations=None, pricing=None, stats=None, tolerances=None):
+    (A, b, c, l, u) = lp_with_bounds
+    tolerances = tolerances_or_default(tolerances)
+    if(is_sparse(A)):
+        A = A.toarray()                                                         # the tableau is dense anyways
+    A = np.asarray(A, dtype=float)
+    (m, n) = A.shape
+    l = np.zeros(n) if l is None else np.asarray(l, dtype=float)
+    u = np.full(n, np.inf) if u is None else np.asarray(u, dtype=float)
+    if(not np.all(np.isfinite(l))):
+        raise ValueError("BOUNDED SIMPLEX needs finite lower bounds")
+    if(np.any(l > u)):
+        logging.debug("BOUNDED SIMPLEX ended: a lower bound is above its upper bound, therefore this LP is invalid.")
+        return SolveResult(INFEASIBLE)
+
+    # STEP 1: the tableau of the shifted LP, with x_0 in column n and the
+    # w-row in row m+1.
+    T = np.zeros((m+2, n+2))
+    T[:m, :n] = A
+    T[:m, n] = -1
+    T[:m, n+1] = b - A @ l
+    T[m, :n] = c
+    T[m+1, n] = -1
+    B = np.arange(n+1, n+m+1)
+    N = np.r_[np.arange(1, n+1), 0]
+    upper = np.r_[np.inf, u - l, np.full(m, np.inf)]                            # w_k of every variable x_0, ..., x_n+m
+    complemented = np.zeros(n+m+1, dtype=bool)
+    iterations = 0
+
+    # STEP 2: phase one, if the slackform of the slack variables is not valid.
+    if(m > 0 and T[:m, n+1].min() < -tolerances.feasibility):
+        with phase(stats, "phase_one"):
+            row_of_x_0 = int(np.argmin(T[:m, n+1]))
+            pivot(T, row_of_x_0, n)
+            (B[row_of_x_0], N[n]) = (0, B[row_of_x_0])
+            iterations = 1
+            (status, count) = run_bounded_simplex(T, B, N, upper, complemented, m+1, max_iterations, pricing, stats,
+                                                  tolerances)
+            iterations += count
+        if(status == ITERATION_LIMIT):
+            return iteration_limit_reached(max_iterations, iterations)
+        if(T[m+1, n+1] > tolerances.feasibility):                               # the optimal w = -T[m+1, n+1] is negative
+            logging.debug("BOUNDED SIMPLEX ended: x_0 could not be driven to 0 in phase one, therefore this LP is invalid.")
+            return SolveResult(INFEASIBLE, iterations=iterations)
+        pivot_out_x_0(T, B, N, tolerances)
+
+    # STEP 3: phase two without x_0 and the w-row.
+    column_of_x_0 = int(np.flatnonzero(N == 0)[0])                              # x_0 is a NBVar after pivot_out_x_0
+    T = np.delete(T[:m+1], column_of_x_0, axis=1)
+    N = np.delete(N, column_of_x_0)
+    remaining = None if max_iterations is None else max(max_iterations - iterations, 0)
+    with phase(stats, "phase_two"):
+        (status, count) = run_bounded_simplex(T, B, N, upper, complemented, m, remaining, pricing, stats, tolerances)
+    iterations += count
+    if(status == ITERATION_LIMIT):
+        return iteration_limit_reached(max_iterations, iterations)
+    if(status == UNBOUNDED):
+        logging.debug("BOUNDED SIMPLEX ended: This LP is unrestricted in its range of optimal solutions")
+        return SolveResult(UNBOUNDED, iterations=iterations)
+
+    # STEP 4: read off x, undoing the complements and the shift.
+    values = np.zeros(n+m+1)
+    values[B] = T[:m, n]
+    values[complemented] = upper[complemented] - values[complemented]
+    x = l + values[1:n+1]
+    duals = np.zeros(n+m+1)
+    duals[N] = 0.0 - T[m, :n]
+    objective = float(-T[m, n] + np.dot(c, l))
+
+    logging.debug("This was a LP with %d conditions and %d bounded variables. Best value is %s"
+                  " with corresponding solution %s and corresponding base %s.", m, n, objective, x, B)
+    return SolveResult(OPTIMAL, objective, x, np.copy(B), duals[n+1:], iterations)
+
+def iteration_limit_reached(max_iterations, iterations):
+    logging.debug("BOUNDED SIMPLEX ended: the iteration limit of %s pivots was reached before an optimal slackform was found",
+                  max_iterations)
+    return SolveResult(ITERATION_LIMIT, iterations=iterations)
+
+# x_0 is 0 after phase one. if it still is a BVar, it is replaced by the NBVar
+# with the largest absolute coefficient in its row (a degenerate pivot). the
+# columns of the slack variables have full rank, so only a numerically
+# singular base can leave that row without a coefficient above the pivot
+# tolerance, which is an error.
+def pivot_out_x_0(T, B, N, tolerances):
+    rows_of_x_0 = np.flatnonzero(B == 0)
+    if(rows_of_x_0.size == 0):
+        return
+    r = rows_of_x_0[0]
+    e = int(np.argmax(np.abs(T[r, :len(N)])))
+    if(abs(T[r, e]) <= tolerances.pivot):
+        raise ArithmeticError("BOUNDED SIMPLEX: x_0 is a BVar with the value 0, but no coefficient in its row is above "
+                              "the pivot tolerance, so the base of phase one is numerically singular")
+    pivot(T, r, e)
+    (B[r], N[e]) = (N[e], B[r])
+
+# the pivot loop of BOUNDED SIMPLEX on the tableau T with the objective row
+# objective_row. like simplex.run_simplex it works in place on T, B, N and
+# complemented and returns the status and the amount of pivots and flips.
+def run_bounded_simplex(T, B, N, upper, complemented, objective_row, max_iterations=None, pricing=None, stats=None,
+                        tolerances=None):
+    m = len(B)
+    n = len(N)
+    A = T[:m, :n]
+    b_bar = T[:m, n]
+    c_bar = T[objective_row, :n]
+    tolerances = tolerances_or_default(tolerances)
+    rule = make_pricing_rule(pricing, tolerances.optimality)
+
+    iterations = 0
+    while(True):
+        # STEP 1: find the entering NBVar, like SIMPLEX does.
+        column_index_of_x_e = rule.entering(c_bar, N, A)
+        if(column_index_of_x_e == -1):
+            return (OPTIMAL, iterations)
+
+        if(max_iterations is not None and iterations >= max_iterations):
+            return (ITERATION_LIMIT, iterations)
+
+        # STEP 2: the ratio test, for BVars that decrease to 0 and BVars that
+        # increase to their upper bound.
+        column_of_x_e = A[:, column_index_of_x_e]
+        upper_of_B = upper[B]
+        decreasing = column_of_x_e > tolerances.pivot
+        increasing = (column_of_x_e < -tolerances.pivot) & np.isfinite(upper_of_B)
+        quotients = np.full(m, np.inf)
+        quotients[decreasing] = np.maximum(b_bar[decreasing], 0) / column_of_x_e[decreasing]
+        quotients[increasing] = np.maximum(upper_of_B[increasing] - b_bar[increasing], 0) / -column_of_x_e[increasing]
+        minimal_quotient = quotients.min() if m > 0 else np.inf
+        upper_of_x_e = upper[N[column_index_of_x_e]]
+
+        # STEP 3: x_e reaches its own upper bound first, so it is flipped.
+        if(upper_of_x_e <= minimal_quotient):
+            if(upper_of_x_e == np.inf):
+                return (UNBOUNDED, iterations)
+            flip(T, column_index_of_x_e, upper_of_x_e)
+            complemented[N[column_index_of_x_e]] ^= True
+            iterations += 1
+            continue
+
+        # STEP 4: otherwise the BVar with the minimal quotient leaves, ties are
+        # broken by the lowest index.
+        ties = np.flatnonzero(quotients == minimal_quotient)
+        row_index_of_x_l = ties[np.argmin(B[ties])]
+        leaves_at_upper_bound = increasing[row_index_of_x_l]
+        degenerate = minimal_quotient <= tolerances.feasibility
+        rule.pivoted(A[row_index_of_x_l], column_index_of_x_e, column_index_of_x_e, degenerate)
+        if(stats is not None):
+            stats.pivoted(degenerate, ties.size, T, row_index_of_x_l, column_index_of_x_e)
+        pivot(T, row_index_of_x_l, column_index_of_x_e)
+        (N[column_index_of_x_e], B[row_index_of_x_l]) = (B[row_index_of_x_l], N[column_index_of_x_e])
+        if(leaves_at_upper_bound):
+            flip(T, column_index_of_x_e, upper[N[column_index_of_x_e]])
+            complemented[N[column_index_of_x_e]] ^= True
+        iterations += 1
+
+# complements the NBVar in column column_index of the tableau T, whose upper
+# bound is w: x = w - x~ moves w times its column from b into v (T[m, n] is -v)
+# and negates its column.
+def flip(T, column_index, w):
+    T[:, -1] -= T[:, column_index] * w
+    T[:, column_index] *= -1
@@ -0,0 +1,180 @@
+import numpy as np
+import collections
+import hashlib
+import threading
+from sv import sv
+from exhaustive import exhaustive
+from result import SolveResult
+from utility import is_sparse, OPTIMAL, Tolerances
+
+# a SolveCache sits in front of SV and EXHAUSTIVE and returns the SolveResult
+# of a LP it has already solved instead of solving it again:
+#
+#   cache = SolveCache(max_entries=1000, max_bytes=64 * 2**20)
+#   result = cache.sv(lp, method="revised")
+#   result = cache.exhaustive(lp)
+#   print(cache.hits, cache.misses)
+#
+# a LP is identified by its fingerprint, a blake2b digest of the shape, the
+# dtype and the bytes of each of its arrays (of the CSR arrays for a sparse
+# A), together with the solver and its options. so the same LP always gets the
+# same fingerprint, no matter how its arrays were created, but a dense and a
+# sparse A are different LPs.
+#
+# the results are kept in LRU order and the least recently used ones are
+# evicted as soon as there are more than max_entries of them or they take
+# more than max_bytes.
+#
+# with warm_start=True the cache also keeps the optimal base of the last LP
+# solved with each A. a LP that is not in the cache, but has the same A as one
+# that was solved (e.g. only b or c changed), is then solved by SV from that
+# base (see sv.sv), which usually needs only a few pivots. only the methods in
+# WARM_START_METHODS can start from a base, so this is skipped for EXHAUSTIVE,
+# SV with presolve, the methods "bounded" and "ipm" and LPs with bounds.
+#
+# a call with an option the fingerprint cannot tell apart reliably (e.g. a
+# PricingRule, which keeps state between pivots) is solved without the cache.
+#
+# the results handed out are copies, so changing them does not change the
+# cache. a SolveCache can be shared between threads.
+
+RESULT_OVERHEAD = 256                                                           # bytes a SolveResult takes without its arrays
+WARM_START_METHODS = (None, "tableau", "dual", "revised")                       # the methods of SV that accept an initial base B
+
+class SolveCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 2**20, warm_start=True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.warm_start = warm_start
+        self.results = collections.OrderedDict()                                # fingerprint: (SolveResult, bytes), the least recently used first
+        self.bases = collections.OrderedDict()                                  # fingerprint of A: optimal base
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0                                                    # misses that were solved from a cached base
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def sv(self, standardform_lp, **options):
+        return self.solve("sv", sv, standardform_lp, options)
+
+    def exhaustive(self, standardform_lp, **options):
+        return self.solve("exhaustive", exhaustive, standardform_lp, options)
+
+    def solve(self, solver_name, solver, lp, options):
+        key = fingerprint(lp, solver_name, options)
+        if(key is None):
+            return solver(lp, **options)
+        with self.lock:
+            entry = self.results.get(key)
+            if(entry is not None):
+                self.results.move_to_end(key)
+                self.hits += 1
+                return copy_of_result(entry[0])
+            self.misses += 1
+
+        can_warm_start = (self.warm_start and solver_name == "sv" and len(lp) == 3
+                          and not options.get("presolve") and options.get("B") is None
+                          and options.get("method") in WARM_START_METHODS)
+        key_of_A = fingerprint_of_arrays((lp[0],)) if can_warm_start else None
+        if(key_of_A is not None):
+            with self.lock:
+                base = self.bases.get(key_of_A)
+            if(base is not None):
+                with self.lock:
+                    self.warm_starts += 1
+                options = dict(options, B=base)
+
+        result = solver(lp, **options)
+
+        with self.lock:
+            if(key_of_A is not None and result.status == OPTIMAL):
+                self.bases[key_of_A] = np.copy(result.basis)
+                self.bases.move_to_end(key_of_A)
+                while(len(self.bases) > self.max_entries):
+                    self.bases.popitem(last=False)
+            self.store(key, copy_of_result(result))
+        return result
+
+    def store(self, key, result):
+        if(key in self.results):
+            self.bytes -= self.results.pop(key)[1]
+        size = size_of_result(result)
+        self.results[key] = (result, size)
+        self.bytes += size
+        while(len(self.results) > self.max_entries or (self.bytes > self.max_bytes and len(self.results) > 0)):
+            (evicted, (evicted_result, evicted_size)) = self.results.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+            self.bases.clear()
+            self.bytes = 0
+
+    def as_dict(self):
+        return {"entries": len(self.results), "bytes": self.bytes, "hits": self.hits, "misses": self.misses,
+                "warm_starts": self.warm_starts, "evictions": self.evictions}
+
+    def __repr__(self):
+        return ("SolveCache(entries=%d, bytes=%d, hits=%d, misses=%d, warm_starts=%d, evictions=%d)"
+                % (len(self.results), self.bytes, self.hits, self.misses, self.warm_starts, self.evictions))
+
+# the fingerprint of the LP solved by solver_name with options. options count
+# by their values (sequences like B by their elements, a Tolerances by its
+# three tolerances), stats does not count at all, as it does not change the
+# result. returns None if an option cannot be fingerprinted by its value.
+def fingerprint(lp, solver_name, options):
+    digest = hashlib.blake2b(digest_size=32)
+    digest.update(solver_name.encode())
+    for name in sorted(options):
+        if(name == "stats"):
+            continue
+        value = options[name]
+        if(value is None or isinstance(value, (str, int, float, bool))):
+            digest.update((name + "=" + repr(value) + ";").encode())
+        elif(isinstance(value, Tolerances)):
+            digest.update((name + "=" + repr(value) + ";").encode())
+        elif(isinstance(value, (np.ndarray, list, tuple))):
+            array = np.asarray(value)
+            if(array.dtype == object):
+                return None
+            digest.update((name + "=").encode())
+            update_with_array(digest, array)
+        else:
+            return None
+    digest.update(fingerprint_of_arrays(lp))
+    return digest.digest()
+
+# the digest of the arrays of a LP (None stands for a missing bound vector).
+def fingerprint_of_arrays(arrays):
+    digest = hashlib.blake2b(digest_size=32)
+    for array in arrays:
+        if(array is None):
+            digest.update(b"none;")
+        elif(is_sparse(array)):
+            canonical = array.tocsr(copy=True)
+            canonical.eliminate_zeros()
+            canonical.sum_duplicates()                                          # also sorts the indices of every row
+            digest.update(b"csr;")
+            digest.update(repr(canonical.shape).encode())
+            for part in (canonical.indptr, canonical.indices, canonical.data):
+                update_with_array(digest, part)
+        else:
+            update_with_array(digest, np.asarray(array))
+    return digest.digest()
+
+def update_with_array(digest, array):
+    array = np.ascontiguousarray(array)
+    if(array.dtype.kind == "f"):
+        array = array + 0.0                                                     # -0.0 and 0.0 are the same coefficient
+    digest.update((array.dtype.str + repr(array.shape) + ";").encode())
+    digest.update(array.tobytes())
+
+def copy_of_result(result):
+    copies = [None if array is None else np.copy(array) for array in (result.x, result.basis, result.duals)]
+    return SolveResult(result.status, result.objective, copies[0], copies[1], copies[2], result.iterations)
+
+def size_of_result(result):
+    return RESULT_OVERHEAD + sum(array.nbytes for array in (result.x, result.basis, result.duals) if array is not None)
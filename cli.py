@@ -0,0 +1,117 @@
+import argparse
+import sys
+
+# the command line of the solvers:
+#
+#   python cli.py solve model.mps --method revised      # or python -m cli ...
+#   python cli.py solve model.lp.gz --solver exhaustive --json
+#   python cli.py solve model.mps --solver mip --workers 4   # integral x, see mip.py
+#   python cli.py serve /tmp/sv.socket --processes 4     # see server.py
+#   python cli.py examples                               # see examples.py
+#
+# every command imports only the modules it needs, when it runs, so that a
+# one-shot solve of a cron job does not pay for the examples or for engines
+# it does not use. logging is only configured if --log-level or --log-file is
+# given (the solvers log at DEBUG).
+#
+# solve prints the status, the targetfunction value (of the objective as the
+# file states it, also if it is minimized) and the optimal x by the names of
+# the variables in the file, and exits with EXIT_CODES[status] (1
+# if the file could not be read).
+
+EXIT_CODES = {"optimal": 0, "infeasible": 3, "unbounded": 4, "iteration_limit": 5}
+
+def solve(arguments):
+    from reader import read_lp_file
+    from utility import bounds_to_conditions
+    (lp, condition_names, variable_names, sense) = read_lp_file(arguments.path, with_names=True, with_sense=True)
+
+    if(arguments.solver == "exhaustive"):
+        from exhaustive import exhaustive
+        if(len(lp) == 5):
+            lp = bounds_to_conditions(lp)
+        result = exhaustive(lp, workers=arguments.workers)
+    elif(arguments.solver == "mip"):
+        from mip import branch_and_bound
+        if(len(lp) == 5):
+            lp = bounds_to_conditions(lp)
+        result = branch_and_bound(lp, workers=arguments.workers, pricing=arguments.pricing)
+    else:
+        from sv import sv
+        if(len(lp) == 5 and arguments.method not in (None, "bounded")):
+            lp = bounds_to_conditions(lp)
+        result = sv(lp, method=arguments.method, pricing=arguments.pricing, presolve=arguments.presolve,
+                    scaling=arguments.scaling)
+
+    objective = result.objective
+    if(objective is not None and sense == "minimize"):                          # the reader negated the objective
+        objective = 0.0 - objective
+
+    if(arguments.json):
+        import json
+        print(json.dumps({"status": result.status, "objective": objective, "iterations": result.iterations,
+                          "x": None if result.x is None else dict(zip(variable_names, result.x.tolist()))}))
+    else:
+        print("status:     " + result.status)
+        print("iterations: " + str(result.iterations))
+        if(result.x is not None):
+            print("objective:  " + repr(objective))
+            width = max([len(name) for name in variable_names] + [1])
+            for (name, value) in zip(variable_names, result.x):
+                if(value != 0 or arguments.all):
+                    print("  " + name.ljust(width) + "  " + repr(float(value)))
+    return EXIT_CODES.get(result.status, 1)
+
+def serve(arguments):
+    from server import serve
+    serve(arguments.path, arguments.processes, arguments.queue_size, arguments.timeout)
+    return 0
+
+def examples(arguments):
+    import examples
+    examples.main()
+    return 0
+
+def parser_of_commands():
+    parser = argparse.ArgumentParser(prog="cli.py", description="solves LPs with SV, EXHAUSTIVE and BRANCH AND BOUND")
+    parser.add_argument("--log-level", default=None, help="e.g. DEBUG to see what the solvers do (default: no logging)")
+    parser.add_argument("--log-file", default=None, help="log into this file instead of stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("solve", help="solves a .mps or .lp file (optionally .gz)")
+    command.add_argument("path")
+    command.add_argument("--solver", choices=("sv", "exhaustive", "mip"), default="sv")
+    command.add_argument("--method", default=None, help="the SV method: tableau, revised, dual, bounded or ipm")
+    command.add_argument("--pricing", default=None, help="the pricing rule of SV, e.g. dantzig or steepest_edge")
+    command.add_argument("--presolve", action="store_true")
+    command.add_argument("--scaling", action="store_true")
+    command.add_argument("--workers", type=int, default=None, help="processes of EXHAUSTIVE and MIP")
+    command.add_argument("--json", action="store_true", help="print the result as JSON")
+    command.add_argument("--all", action="store_true", help="also print the variables that are 0")
+    command.set_defaults(run=solve)
+
+    command = commands.add_parser("serve", help="runs a solve server on a Unix socket (see server.py)")
+    command.add_argument("path")
+    command.add_argument("--processes", type=int, default=None)
+    command.add_argument("--queue-size", type=int, default=64)
+    command.add_argument("--timeout", type=float, default=None)
+    command.set_defaults(run=serve)
+
+    command = commands.add_parser("examples", help="runs and logs all examples of examples.py")
+    command.set_defaults(run=examples)
+    return parser
+
+def main(argv=None):
+    arguments = parser_of_commands().parse_args(argv)
+    if(arguments.log_level is not None or arguments.log_file is not None):
+        import logging
+        logging.basicConfig(format="%(message)s", filename=arguments.log_file,
+                            level=(arguments.log_level or "DEBUG").upper())
+    try:
+        return arguments.run(arguments)
+    except (OSError, ValueError) as error:                                      # a file that is missing or not a valid LP
+        print("error: " + str(error), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
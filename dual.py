@@ -0,0 +1,162 @@
+import numpy as np
+import logging
+from utility import standardform_to_slackform, slackform_to_tableau, tableau_to_slackform, pivot
+from utility import OPTIMAL, INFEASIBLE, UNBOUNDED, ITERATION_LIMIT, tolerances_or_default
+from stats import phase
+
+# DUAL SIMPLEX works on the same slackform (B, N, A, b, c, v) as SIMPLEX, but
+# the other way around: SIMPLEX keeps b' >= 0 and pivots until c' <= 0, DUAL
+# SIMPLEX keeps c' <= 0 and pivots until b' >= 0. so it needs a slackform
+# that is optimal, but maybe not valid, like the one of an optimal base after
+# some components of b were changed.
+#
+# in each iteration the BVar x_l with the most negative b'_l leaves, and of
+# the NBVars x_j with a_lj < 0 (the ones that can raise x_l) the one with the
+# minimal quotient c'_j / a_lj enters, which keeps c' <= 0.
+#
+# components of b' above -tolerances.feasibility count as >= 0, and pivot
+# coefficients above -tolerances.pivot are not considered (see
+# utility.Tolerances).
+
+# stats may be a SolveStats (see stats.py), in which DUAL SIMPLEX is recorded
+# as the phase "dual".
+def dual_simplex(lp_in_optimal_slackform, max_iterations=None, stats=None, tolerances=None):
+    if(lp_in_optimal_slackform == -1):
+        return -1
+
+    with phase(stats, "dual"):
+        (B, N, T) = slackform_to_tableau(lp_in_optimal_slackform)
+        (status, iterations) = run_dual_simplex(T, B, N, max_iterations, stats, tolerances)
+
+    if(status == INFEASIBLE):
+        logging.debug("DUAL SIMPLEX ended: no NBVar can raise a negative BVar, therefore this LP is invalid.")
+        return -1
+
+    if(status == ITERATION_LIMIT):
+        logging.debug("DUAL SIMPLEX ended: the iteration limit of %s pivots was reached before a valid slackform was found",
+                      max_iterations)
+        return -1
+
+    return tableau_to_slackform(B, N, T)
+
+# the pivot loop of DUAL SIMPLEX. like simplex.run_simplex it works in place on
+# the tableau T and on B and N and returns the status and the amount of pivots.
+def run_dual_simplex(T, B, N, max_iterations=None, stats=None, tolerances=None):
+    m = len(B)
+    n = len(N)
+    A = T[:m, :n]
+    b_bar = T[:m, n]
+    c_bar = T[m, :n]
+    tolerances = tolerances_or_default(tolerances)
+
+    iterations = 0
+    if(m == 0):                                                                 # no conditions, so b' is empty and therefore valid
+        return (OPTIMAL, iterations)
+    while(True):
+        # STEP 1: find the leaving BVar with the most negative component in b'.
+        # if there is none, the slackform is valid and therefore optimal.
+        row_index_of_x_l = int(np.argmin(b_bar))
+        if(b_bar[row_index_of_x_l] >= -tolerances.feasibility):
+            return (OPTIMAL, iterations)
+
+        if(max_iterations is not None and iterations >= max_iterations):
+            return (ITERATION_LIMIT, iterations)
+
+        # STEP 2: if no coefficient in the row of x_l is negative, no NBVar
+        # can raise x_l to 0, so there is no valid solution at all.
+        row_of_x_l = A[row_index_of_x_l]
+        raising_columns = np.flatnonzero(row_of_x_l < -tolerances.pivot)
+        if(raising_columns.size == 0):
+            return (INFEASIBLE, iterations)
+
+        # STEP 3: find the entering NBVar with the minimal quotient c'_j / a_lj,
+        # ties are broken by the lowest index.
+        quotients = np.minimum(c_bar[raising_columns], 0) / row_of_x_l[raising_columns]
+        ties = raising_columns[quotients == quotients.min()]
+        column_index_of_x_e = ties[np.argmin(N[ties])]
+
+        # STEP 4: exchange x_e and x_l, exactly like SIMPLEX does.
+        if(stats is not None):
+            stats.pivoted(c_bar[column_index_of_x_e] >= -tolerances.optimality, ties.size, T, row_index_of_x_l, column_index_of_x_e)
+        pivot(T, row_index_of_x_l, column_index_of_x_e)
+        temp = N[column_index_of_x_e]
+        N[column_index_of_x_e] = B[row_index_of_x_l]
+        B[row_index_of_x_l] = temp
+        iterations += 1
+
+# the DUAL SIMPLEX solver mode of SV. it gets a LP in standardform (A, b, c)
+# and returns its optimal slackform, or -1 if the LP is invalid or unrestricted.
+#
+# the slackform of the slack variables is optimal if c <= 0, no matter how
+# negative b is (like in covering LPs), so then DUAL SIMPLEX solves the LP on
+# its own and INIT is not needed at all. if some c_j > 0, phase one runs DUAL
+# SIMPLEX with c replaced by min(c, 0), which has the same valid solutions, so
+# the base it ends with is valid for L as well. phase two then is SIMPLEX with
+# the actual c from that base (see run_dual_method).
+#
+# with_status=True returns (status, optimal slackform or None, amount of
+# pivots) instead of the slackform or -1. in stats (see stats.py) the phases
+# are recorded as "dual" and "simplex". tolerances may be a utility.Tolerances,
+# and tableau_dir puts the tableau into a memory-mapped file (see
+# utility.new_tableau).
+def dual_simplex_method(lp_in_standardform, max_iterations=None, pricing=None, with_status=False, stats=None,
+                        tolerances=None, tableau_dir=None):
+    (status, B, N, T, iterations) = run_dual_method(lp_in_standardform, max_iterations, pricing, stats, tolerances,
+                                                    tableau_dir)
+
+    if(status == INFEASIBLE):
+        logging.debug("DUAL SIMPLEX ended: no NBVar can raise a negative BVar, therefore this LP is invalid.")
+
+    if(status == UNBOUNDED):
+        logging.debug("SIMPLEX ended: This LP is unrestricted in its range of optimal solutions")
+
+    if(status == ITERATION_LIMIT):
+        logging.debug("DUAL SIMPLEX ended: the iteration limit of %s pivots was reached before an optimal slackform was found",
+                      max_iterations)
+
+    if(status != OPTIMAL):
+        return (status, None, iterations) if with_status else -1
+
+    optimal_slackform = tableau_to_slackform(B, N, T)
+    return (OPTIMAL, optimal_slackform, iterations) if with_status else optimal_slackform
+
+# the two phases of the DUAL SIMPLEX solver mode. returns the status, B, N, the
+# final tableau and the amount of pivots that were made.
+def run_dual_method(lp_in_standardform, max_iterations=None, pricing=None, stats=None, tolerances=None,
+                    tableau_dir=None):
+    (A, b, c) = lp_in_standardform
+    m = len(b)
+    n = len(c)
+
+    # STEP 1: build the tableau of the slackform with one more row below the
+    # z-row: row m is the z-row of phase one with min(c, 0), row m+1 keeps the
+    # actual c, which is updated by every pivot of phase one as well.
+    (B, N, T) = slackform_to_tableau(standardform_to_slackform(lp_in_standardform), tableau_dir, extra_rows=1)
+    (status, iterations) = run_dual_phases(T, B, N, max_iterations, pricing, stats, tolerances)
+    return (status, B, N, T[:m+1], iterations)
+
+# the two phases of run_dual_method on a tableau T with one spare row below the
+# z-row, in any base (e.g. the one of the crossover of ipm.py). as
+# min(c', 0) <= 0 in every base, DUAL SIMPLEX can always start right away.
+# returns the status and the amount of pivots, the optimal tableau is T[:m+1].
+def run_dual_phases(T, B, N, max_iterations=None, pricing=None, stats=None, tolerances=None):
+    from simplex import run_simplex                                             # imported here, as simplex.py imports this module
+
+    m = len(B)
+    n = len(N)
+    T[m+1] = T[m]
+    np.minimum(T[m, :n], 0, out=T[m, :n])
+
+    # STEP 2: phase one, DUAL SIMPLEX makes b' >= 0.
+    with phase(stats, "dual"):
+        (status, iterations) = run_dual_simplex(T, B, N, max_iterations, stats, tolerances)
+    if(status != OPTIMAL):
+        return (status, iterations)
+
+    # STEP 3: phase two, the actual z-row replaces the one of phase one and
+    # SIMPLEX continues from the now valid slackform.
+    T[m] = T[m+1]
+    remaining = None if max_iterations is None else max(max_iterations - iterations, 0)
+    with phase(stats, "simplex"):
+        (status, count) = run_simplex(T[:m+1], B, N, remaining, pricing, stats, tolerances)
+    return (status, iterations + count)
@@ -1,113 +1,254 @@
 import numpy as np
 import itertools
 import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from utility import basis_matrix, is_sparse
+from utility import OPTIMAL, INFEASIBLE, UNBOUNDED
+from result import SolveResult
+from stats import phase
+
+# EXHAUSTIVE looks at every index set B with #B = m of A' = [A | I] and
+# therefore at C(n+m, m) index sets. they are never all held in memory at
+# once: itertools.combinations produces them in lexicographic order and
+# CHUNK_SIZE of them are evaluated at once (see evaluate_index_sets):
+#
+# - an index set is a base if A'_B is regular. as the determinant of a
+#   floating point matrix is almost never exactly 0, A'_B counts as regular if
+#   |det(A'_B)| > SINGULAR_TOLERANCE * (product of the lengths of its columns),
+#   which is an upper bound of |det(A'_B)| (Hadamard's inequality). this is
+#   tested for the whole chunk with one stacked slogdet.
+# - x'_B of all bases in the chunk is calculated with one stacked solve of
+#   A'_B * x'_B = b, no inverse is needed.
+# - bases with a negative component in x'_B are pruned, and of the remaining
+#   ones the base with the best value c'_B * x'_B is kept.
+#
+# with workers > 1 the C(n+m, m) index sets are split into RANGES_PER_WORKER
+# ranges of consecutive ranks per worker process (the rank of an index set is
+# its position in lexicographic order). every worker starts its range at the
+# index set of the first rank (see combination_of_rank) and evaluates it like
+# above, with A' shared between all processes via shared memory. the best
+# bases of all ranges are reduced in the order of the ranges, so the result
+# is the same as without workers.
+
+CHUNK_SIZE = 4096                                                               # amount of index sets that are evaluated at once
+SINGULAR_TOLERANCE = 1e-9                                                       # relative to the Hadamard bound, see above
+FEASIBILITY_TOLERANCE = 1e-9                                                    # components of x'_B above -FEASIBILITY_TOLERANCE count as >= 0
+RANGES_PER_WORKER = 4                                                           # more ranges than workers even out ranges with more regular bases
 
 # the function gets a LP in standardform (A, b, c) as input
-# and returns:
-# 
-# - either the string explaining that the LP is invalid, 
+# and logs:
+#
+# - either the string explaining that the LP is invalid,
 #   if the LP is invalid
 #
-# - or a string containing information about 
+# - or a string containing information about
 #   the optimal targetfunction value, its corresponding
 #   x' solution and its corresponding base, if the LP is valid
-def exhaustive(lp_in_standardform):
+#
+# and returns the same as a SolveResult (see result.py). the duals are those
+# of the best base (if the optimal x' is degenerate, that is just the first of
+# its bases, whose duals may be negative), and iterations is the amount of
+# regular bases. EXHAUSTIVE cannot tell unrestricted LPs apart, their best
+# base is returned as optimal (only a LP without conditions is found to be
+# unrestricted).
+#
+# workers is the amount of processes the index sets are evaluated by, None
+# or 1 evaluates them in this process.
+#
+# stats may be a SolveStats (see stats.py). EXHAUSTIVE makes no pivots, but
+# every chunk of index sets evaluated in this process is recorded as a call
+# of the phase "exhaustive" (not those of the workers).
+def exhaustive(lp_in_standardform, workers=None, stats=None):
     (A, b, c) = lp_in_standardform                                              # unpack the A-matrix and the b- and c-vectors from the standardform lp input-parameter
     n = len(c)                                                                  # n is the amount of structure variables, we can retrieve this number from the length of the vector c
     m = len(b)                                                                  # m is the amount of conditions, we can retrieve this number from the length of the vector b
 
-    # STEP 1: Create A' and c'
-    A_prime = np.hstack((A, np.identity(m)))                                    # The matrix A concatenated with the identity matrix of dimension m x m
-    c_prime = np.concatenate((c, np.zeros(m)))                                  # c' is c with m-many concatenated 0s
-
-    all_indices = np.arange(1, m+n+1, dtype=int)                                # this is a set of all possible indices, basically [n+m] = {1, ..., n+m}
-    index_sets_with_len_m = find_subsets(all_indices, m)                        # this is a set of all subsets of all_indices with length m (provided by a helper function)
-    bases = list()                                                              # this is the list which will hold all valid bases of the LP
-    A_prime_Bs_of_bases = list()                                                # this is the list which will hold all A'_B of the corresponding valid bases.
-
-    for index_set in index_sets_with_len_m:                                     # for each subset of all_indices with length m
-        A_prime_B = np.zeros((m, m))                                            # allocate space for A'_B
-
-        for i, j in zip(index_set, range(0, m)):                                # fill A'_B with its values, i == the current index and j == the iteration count
-            for k in range(0, m):
-                A_prime_B[k][j] = A_prime[k][i-1]
-
-        if(np.linalg.det(A_prime_B) != 0):                                      # based on the determinant, determine whether B qualifies as a base or not
-            bases.append(index_set)                                             # we save the base, as it is verified to be valid by it's non-zero determinant
-            A_prime_Bs_of_bases.append(A_prime_B)                               # we save the previously created A_prime_B so we don't have to calculate it again
-
-    best_targetfunc_value = 0                                                   # reserve a variable for the best targetfunction value
-    best_solution = np.zeros(m+n)                                               # reserve a variable for the solution (x*) of the best base
-    best_base = np.zeros(m, dtype=int)                                          # reserve a variable for the base of the best solution
-    any_valid_solution_found = False
-
-    # STEP 2: For every regular base with #B = m, 
-    # calculate x' and check if x' >= 0 and if c'x' improved
-    for base, A_prime_B_of_base in zip(bases, A_prime_Bs_of_bases):             # for every base and its corresponding A'_B
-        x_prime_B = np.dot(np.linalg.inv(A_prime_B_of_base), b)                 # calculate x'_B = inverse_of(A'_B) * b
-        x_prime = np.zeros(n+m)                                                 # allocate space for x'. We don't need to fill in the NBVars (non-base variables) afterwards, because they all are 0 anyways.
-
-        iteration_counter = 0                                                   # this counter is for placing the values of x'_B in the correct components of x'
-        outer_loop_continue = False                                             # if we find an x' with negative components, we need to skip it as it wouldn't be a valid solution. 
-                                                                                # Therefore we remember with this variable, if we should skip the currently processed x'.
-
-        for i, iteration_counter in zip(base, range(0, m)):                     # for each entry in the current base
-            if(x_prime_B[iteration_counter] < 0):                               # check if the corresponding solution has a negative component, which would disqualify it as a potential best solution
-                outer_loop_continue = True                                      # this is a flag for letting the outer for-loop know when to skip this iteration                
-            x_prime[i-1] = x_prime_B[iteration_counter]                         # fill in x' with the corresponding x'_B components
-
-        if(outer_loop_continue):                                                # if the flag was set before, we know that we have a solution with negative components at hand and
-            continue                                                            # can therefore safely skip this solution.
-
-        if(not outer_loop_continue and not any_valid_solution_found):
-            any_valid_solution_found = True
-
-        targetfunc_value = np.dot(c_prime, x_prime.T)                           # calculate the value of the solution. This is c' * transposed(x')
-        if(targetfunc_value > best_targetfunc_value):                           # if the previously calculated value is better then the best values of the recent calculations
-            best_targetfunc_value = targetfunc_value                            # update the best value,
-            best_solution = x_prime                                             # the solution of the best value
-            best_base = base                                                    # and the base of the best solution
+    # STEP 0: without conditions the only index set is the empty one, which is
+    # a base with x' = 0. unlike with conditions, it is easy to tell if the LP
+    # is unrestricted: exactly if some c_j > 0.
+    if(m == 0):
+        if(np.any(np.asarray(c) > 0)):
+            logging.debug("EXHAUSTIVE ended: This LP has no conditions and some c_j > 0, it is unrestricted.")
+            return SolveResult(UNBOUNDED, iterations=1)
+        return SolveResult(OPTIMAL, 0.0, np.zeros(n), np.zeros(0, dtype=int), np.zeros(0), 1)
+
+    # STEP 1: Create A' and c'. A' is the matrix A concatenated with the identity
+    # matrix of dimension m x m, c' is c with m-many concatenated 0s.
+    if(is_sparse(A)):
+        A = A.tocsc()                                                           # a sparse A is read column by column
+    A_prime = basis_matrix(A, np.arange(0, n+m))                                # A' is dense, EXHAUSTIVE is only feasible for small LPs anyways
+    c_prime = np.concatenate((c, np.zeros(m)))
+    b = np.asarray(b, dtype=float)
+
+    # STEP 2: evaluate all index sets with length m chunk by chunk and keep the
+    # best valid base. on equal values the first base (in lexicographic order) wins.
+    if(workers is None or workers <= 1):
+        (amount_of_bases, best) = evaluate_ranks(A_prime, b, c_prime, 0, None, stats)
+    else:
+        (amount_of_bases, best) = evaluate_in_parallel(A_prime, b, c_prime, workers)
+    any_base_found = amount_of_bases > 0
 
     # STEP 3: if no base is regular, then the LP is invalid
-    if(len(bases) == 0):                                                        # we have to account for the case, that no index set with length m is actually a valid base,
+    if(not any_base_found):                                                     # we have to account for the case, that no index set with length m is actually a valid base,
         logging.debug("EXHAUSTIVE ended: This LP is invalid, "                  # which in turn would make the entire LP invalid
         + "because there is no regular A'_B for any base.")
-        return -1
+        return SolveResult(INFEASIBLE, iterations=amount_of_bases)
 
-    if(not any_valid_solution_found):
+    if(best is None):
         logging.debug("EXHAUSTIVE ended: This LP is invalid, "                  # we also have to account for the case, that every possible solution has negative components
         + "because there is not a single valid solution.")                      # which in turn would also make the entire LP invalid
-        return -1
-
-    # STEP 4: set x* = x'[N] (basically cut all slack variables 
-    # from the best x'), as we are only interested in 
-    # the structure variables and not in the slack variables
-    best_solution_without_slackvars = np.zeros(m)
-    for index, entry in zip(range(0, m), best_base):
-        best_solution_without_slackvars[index] = best_solution[entry-1]
-
-    logging.debug(str("This was a LP with " + str(m) + " conditions and " 
-    + str(n) + " variables. " + "Best value is " + str(best_targetfunc_value) 
-    + " with corresponding solution " + str(best_solution_without_slackvars) 
-    + " and corresponding base " + str(best_base) + "."))
-    
-    return
-
-
-
-# the function gets a set of integers "set" and a length "length_of_subset" as input and
-# produces every subset of the input set which has the length of the second input
-# parameter "length_of_subset".
-def find_subsets(set, length_of_subset):
-    list_of_subsets = list(itertools.combinations(set, length_of_subset))       # retrieve all subsets as list of iterables
-
-    amount_of_subsets = len(list_of_subsets)                                    # retrieve amount of subsets
-
-    array_of_subsets = np.zeros(
-            (amount_of_subsets, length_of_subset), dtype=int)                   # allocate space for the subsets in an array
-
-    for i in range(0, amount_of_subsets):
-        for j in range(0, length_of_subset):
-            array_of_subsets[i][j] = list_of_subsets[i][j]                      # convert the list of iterable subsets to an array of subset-arrays
-
-    return array_of_subsets                                                     # return the array of subset-arrays
+        return SolveResult(INFEASIBLE, iterations=amount_of_bases)
+
+    (best_targetfunc_value, best_x_prime_B, best_base) = best
+
+    logging.debug("This was a LP with %d conditions and %d variables. Best value is %s"
+                  " with corresponding solution %s and corresponding base %s.",
+                  m, n, best_targetfunc_value, best_x_prime_B, best_base)
+
+    # STEP 4: set x* = x'[N] (basically cut all slack variables from the best
+    # x'), and calculate the duals y from A'_B^T * y = c'_B.
+    x_prime = np.zeros(n+m)
+    x_prime[best_base - 1] = best_x_prime_B
+    duals = np.linalg.solve(A_prime[:, best_base - 1].T, c_prime[best_base - 1])
+    return SolveResult(OPTIMAL, float(best_targetfunc_value), x_prime[:n], best_base,
+                       duals, amount_of_bases)
+
+# evaluates count index sets of length m (all if count is None), starting with
+# the one of rank first, and returns the amount of regular bases among them
+# together with (value, x'_B, base) of the best valid one (or None).
+def evaluate_ranks(A_prime, b, c_prime, first, count, stats=None):
+    (m, amount) = A_prime.shape
+    amount_of_bases = 0
+    best = None                                                                 # (value, x'_B, base) of the best valid base so far
+    for index_sets in subsets_in_chunks(amount, m, CHUNK_SIZE, first, count):
+        with phase(stats, "exhaustive"):
+            (bases_in_chunk, best_in_chunk) = evaluate_index_sets(A_prime, b, c_prime, index_sets)
+        amount_of_bases += bases_in_chunk
+        best = better_base(best, best_in_chunk)
+    return (amount_of_bases, best)
+
+# splits the ranks of all index sets into ranges, evaluates them in a pool of
+# workers processes and reduces their results.
+def evaluate_in_parallel(A_prime, b, c_prime, workers):
+    (m, amount) = A_prime.shape
+    amount_of_index_sets = math.comb(amount, m)
+    amount_of_ranges = min(workers * RANGES_PER_WORKER, amount_of_index_sets)
+    bounds = [amount_of_index_sets * k // amount_of_ranges for k in range(0, amount_of_ranges + 1)]   # python ints, the ranks may exceed int64
+
+    memory = shared_memory.SharedMemory(create=True, size=A_prime.nbytes)
+    try:
+        np.ndarray(A_prime.shape, dtype=A_prime.dtype, buffer=memory.buf)[:] = A_prime
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(evaluate_ranks_in_shared_memory,
+                               itertools.repeat(memory.name), itertools.repeat(A_prime.shape),
+                               itertools.repeat(b), itertools.repeat(c_prime),
+                               bounds[:-1], bounds[1:])
+            amount_of_bases = 0
+            best = None
+            for (bases_in_range, best_in_range) in results:                    # map keeps the order of the ranges
+                amount_of_bases += bases_in_range
+                best = better_base(best, best_in_range)
+    finally:
+        memory.close()
+        memory.unlink()
+    return (amount_of_bases, best)
+
+# evaluate_ranks for the ranks first, ..., last-1 in a worker process, on A'
+# in the shared memory with the given name.
+def evaluate_ranks_in_shared_memory(name, shape, b, c_prime, first, last):
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        A_prime = np.ndarray(shape, dtype=float, buffer=memory.buf)
+        result = evaluate_ranks(A_prime, b, c_prime, first, last - first)
+        del A_prime                                                             # the buffer can only be closed without views into it
+    finally:
+        memory.close()
+    return result
+
+# the function evaluates the index sets (one per row, counted from 0) of a
+# chunk and returns the amount of regular bases among them together with
+# (value, x'_B, base) of the best valid base, or None if no base is valid.
+# the base is returned with the indices of the variables, counted from 1.
+def evaluate_index_sets(A_prime, b, c_prime, index_sets):
+    m = index_sets.shape[1]
+    A_prime_Bs = A_prime.T[index_sets].transpose(0, 2, 1)                       # A'_B of every index set, shape (k, m, m)
+
+    # prune the singular A'_B
+    (signs, logdets) = np.linalg.slogdet(A_prime_Bs)
+    with np.errstate(divide="ignore"):
+        log_hadamard_bounds = np.sum(np.log(np.linalg.norm(A_prime_Bs, axis=1)), axis=1)
+    regular = (signs != 0) & (logdets > np.log(SINGULAR_TOLERANCE) + log_hadamard_bounds)
+    index_sets = index_sets[regular]
+    if(index_sets.shape[0] == 0):
+        return (0, None)
+
+    # calculate x'_B of all bases and prune the ones with negative components
+    rhs = np.broadcast_to(b[:, None], (index_sets.shape[0], m, 1))
+    x_prime_Bs = np.linalg.solve(A_prime_Bs[regular], rhs)[:, :, 0]
+    valid = np.all(x_prime_Bs >= -FEASIBILITY_TOLERANCE, axis=1)
+    if(not np.any(valid)):
+        return (index_sets.shape[0], None)
+
+    values = np.einsum("ij,ij->i", c_prime[index_sets[valid]], x_prime_Bs[valid])
+    best = int(np.argmax(values))                                               # argmax returns the first of equal values
+    return (index_sets.shape[0],
+            (values[best], x_prime_Bs[valid][best], index_sets[valid][best] + 1))
+
+# returns the better one of two (value, x'_B, base) triples, either may be
+# None. on equal values the first one is kept.
+def better_base(best, candidate):
+    if(candidate is None):
+        return best
+    if(best is None or candidate[0] > best[0]):
+        return candidate
+    return best
+
+# the function produces count subsets of {0, ..., amount-1} which have the
+# length length_of_subset in lexicographic order, starting with the one of
+# rank first (all of them by default), as arrays of at most chunk_size
+# subsets (one per row).
+def subsets_in_chunks(amount, length_of_subset, chunk_size, first=0, count=None):
+    if(first == 0):
+        subsets = itertools.combinations(range(0, amount), length_of_subset)
+    else:
+        subsets = combinations_from(combination_of_rank(first, amount, length_of_subset), amount)
+    if(count is not None):
+        subsets = itertools.islice(subsets, count)
+    while(True):
+        chunk = np.fromiter(itertools.chain.from_iterable(itertools.islice(subsets, chunk_size)), dtype=int)
+        if(chunk.size == 0):
+            return
+        yield chunk.reshape(-1, length_of_subset)
+
+# the subset of {0, ..., amount-1} with the given rank among all subsets of
+# length length_of_subset in lexicographic order (combinatorial number system):
+# the first element is the smallest i such that the subsets starting with
+# i+1 or greater have a rank above rank, and so on for the remaining elements.
+def combination_of_rank(rank, amount, length_of_subset):
+    combination = list()
+    i = 0
+    for remaining in range(length_of_subset, 0, -1):
+        while(True):
+            subsets_starting_with_i = math.comb(amount - i - 1, remaining - 1)
+            if(rank < subsets_starting_with_i):
+                break
+            rank -= subsets_starting_with_i
+            i += 1
+        combination.append(i)
+        i += 1
+    return tuple(combination)
+
+# all subsets of {0, ..., amount-1} with the length of combination that come
+# after combination in lexicographic order, starting with combination itself.
+# for every position j from the last to the first, the elements in front of j
+# are kept, position j is raised and the positions after j run through all
+# their combinations, which are produced by itertools.combinations.
+def combinations_from(combination, amount):
+    length_of_subset = len(combination)
+    for j in range(length_of_subset - 1, -1, -1):
+        first_element = combination[j] if j == length_of_subset - 1 else combination[j] + 1
+        for element in range(first_element, amount - (length_of_subset - 1 - j)):
+            prefix = combination[:j] + (element,)
+            yield from map(prefix.__add__, itertools.combinations(range(element + 1, amount), length_of_subset - 1 - j))
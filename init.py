@@ -1,142 +1,128 @@
 import numpy as np
-from simplex import simplex_with_bland_rule
-from utility import standardform_to_slackform
+from simplex import run_simplex
+from utility import standardform_to_slackform, new_tableau, write_matrix, pivot
+from utility import OPTIMAL, INFEASIBLE, tolerances_or_default
+from stats import phase
 import logging
 
-def init(lp_in_standardform):
+# pricing is handed to SIMPLEX for the auxiliary LP L_H (see pricing.py).
+#
+# with_status=True returns (status, valid slackform or None, amount of pivots
+# of L_H) instead of the slackform or -1, where the status is OPTIMAL if a
+# valid slackform was found and INFEASIBLE if the LP is invalid.
+#
+# stats may be a SolveStats (see stats.py), which records the phases
+# "construction" (of L_H), "simplex" (on L_H) and "substitution" (of the
+# z-row of L into the valid slackform).
+#
+# tolerances may be a utility.Tolerances. components of b above
+# -tolerances.feasibility count as >= 0, and they are handed to SIMPLEX on L_H.
+#
+# L_H lives in a single workspace, a tableau (see utility.slackform_to_tableau)
+# of shape (m+1) x (n+2), which is allocated once (as a memory-mapped file in
+# tableau_dir, if it is given) and only ever pivoted in place:
+#
+#       column   0 .. n-1     n      n+1
+#              | A            -1   | b  |     the rows of the slack variables
+#              | 0            -1   | 0  |     the w-row of L_H: w = -x_0
+#
+# x_0 is dropped afterwards by swapping its column into column n, where b then
+# takes its place, and the w-row is overwritten by the z-row of L. so the
+# valid slackform of L is a view into the workspace, and the whole of INIT
+# makes the same few allocations no matter how large the LP is.
+def init(lp_in_standardform, pricing=None, with_status=False, stats=None, tolerances=None, tableau_dir=None):
     (B, N, A_bar, b_bar, c_bar, v) = standardform_to_slackform(lp_in_standardform)
     m = len(b_bar)
     n = len(c_bar)
+    tolerances = tolerances_or_default(tolerances)
 
     # STEP 1: check for the case that b_bar already has only positive components
     b_contains_negative_components = False
     for element in b_bar:
-        if(element < 0):                                                        # if we find a negative component, we set the flag b_contains_negative_components
+        if(element < -tolerances.feasibility):                                  # if we find a negative component, we set the flag b_contains_negative_components
             b_contains_negative_components = True
             break
 
     if(not b_contains_negative_components):                                     # if the flag b_contains_negative_components was not set, we can
-        return (B, N, A_bar, b_bar, c_bar, v)                                       # return the lp in slackform
-
-    # STEP 2: construct L_H and L_H(B_0). I directly construct L_H(B_0),
-    # because we don't really need L_H.
-    LH_B0_B = np.copy(B)                                                        # LH_B0_B is just a copy of B
-    LH_B0_N = np.array(np.r_[N, 0.0], dtype=int)                                # LH_B0_N is the set N combined with 0, because x_0 is introduced in L_H
-    LH_B0_A = np.c_[-A_bar, np.ones(m)]                                         # the L_H of L is a horizontal concatenation of the A_bar and a vector of 1s.
-                                                                                # I decided to negate A_bar in here, because it is subtracted from b_bar anyways.
-    LH_B0_b = np.copy(b_bar)                                                    # the LH_b is just a copy of the b_bar of L
-    LH_B0_c = np.array([-1], dtype=float)                                       # The LH_B0_c is a vector with just one component, that is -1
-    LH_B0_v = 0                                                                 # LH_v is 0
-
-    # find the minimal component inside b_bar, so we know which row
-    # is going to be the pivot row and what value x_0 will have.
-    row_index_of_x_l = -1                                                       # after the for-loop, this variable will hold the row index of the pivot row
-    min_b_component = 0xFFFFFFFF
-    for component, index in zip(LH_B0_b, range(0, m)):                          # for each component in b_bar, check if it is the minimal component
-        if(component < min_b_component):
-            row_index_of_x_l = index
-            min_b_component = component
-
-    x_0 = -min_b_component                                                      # set x_0 to be the negated minimal component of b_bar
-
-    # STEP 3: conduct first iteration of L_H(B_0), 
-    # where x_e = x_0, x_l = x_n+k with b_k = min
-    # b_i to retrieve L_H(B_1)
-
-    temp = LH_B0_N[n]                                                           # update LH_B0_N and LH_B by swapping the x_l and x_e
-    LH_B0_N[n] = LH_B0_B[row_index_of_x_l]
-    LH_B0_B[row_index_of_x_l] = temp
-
-    LH_B0_v = -x_0                                                              # update LH_b and LH_v
-
-    corresp_coeff = -LH_B0_A[row_index_of_x_l, n]                               # collect the coefficient in LH_B0_A of x_0 in the pivot row
-    pivot_row = np.negative(np.copy(LH_B0_A[row_index_of_x_l]))                 # copy the pivot row and negate it
-    pivot_row[n] = 1                                                            # set the x_0 coefficient in the pivot row to 1
-    LH_B0_A[row_index_of_x_l] = pivot_row                                       # update 
-    LH_B0_b[row_index_of_x_l] *= corresp_coeff                                  # update the pivot row component of LH_b by multiplying it with the coefficient
-    LH_B0_c = -pivot_row                                                        # since LH_B0_c was just = -x_0, we can set it to be the negated pivot row
-
-    for index, row in zip(range(0, m), LH_B0_A):                                # now for each row in LH_B0_A
-        if(index == row_index_of_x_l):                                          # that is not the pivot row
-            continue
-        for entry_index, entry in zip(range(0, n), row):                        # we update it by adding in the pivot row components (since the coefficient of x_0 is always 1)
-            row[entry_index] += pivot_row[entry_index]
-        LH_B0_b[index] += x_0                                                   # and we update LH_b accordingly aswell
-
-    # construct L_H(B_1)
-    LH_B1 = (np.copy(LH_B0_B),
-             np.copy(LH_B0_N),
-             np.copy(-LH_B0_A),
-             np.copy(LH_B0_b),
-             np.copy(LH_B0_c),
-             np.copy(LH_B0_v))
+        if(with_status):                                                        # return the lp in slackform
+            return (OPTIMAL, (B, N, A_bar, b_bar, c_bar, v), 0)
+        return (B, N, A_bar, b_bar, c_bar, v)
+
+    with phase(stats, "construction"):
+        # STEP 2: construct L_H(B_0) in the workspace. I directly construct
+        # L_H(B_0), because we don't really need L_H.
+        T = new_tableau((m+1, n+2), tableau_dir)
+        write_matrix(T[:m, :n], A_bar)                                          # a sparse A_bar is scattered into the workspace, it is dense anyways
+        T[:m, n] = -1                                                           # x_0 is added to every condition, so -1 is subtracted
+        T[:m, n+1] = b_bar
+        T[m] = 0
+        T[m, n] = -1                                                            # the w-row is just -x_0
+        LH_B = np.array(B, dtype=int)
+        LH_N = np.r_[N, 0]                                                      # x_0 is the NBVar of column n
+
+        # STEP 3: conduct first iteration of L_H(B_0),
+        # where x_e = x_0, x_l = x_n+k with b_k = min
+        # b_i to retrieve L_H(B_1)
+        row_index_of_x_l = int(np.argmin(b_bar))                                # the row with the minimal component of b_bar is the pivot row
+        pivot(T, row_index_of_x_l, n)
+        (LH_N[n], LH_B[row_index_of_x_l]) = (LH_B[row_index_of_x_l], 0)
 
     # STEP 4: calculate optimal solution of L_H with SIMPLEX(L_H(B_1))
-    optimal_LH_slackform = simplex_with_bland_rule(LH_B1)
-    (opt_B, opt_N, opt_A, opt_b, opt_c, opt_v) = optimal_LH_slackform
-    opt_A = -opt_A
-
-    # STEP 5: if x_0 is a NBVar in L_H(B*),
-    # construct slackform L(B) of L and return L(B)
-    if(0 in opt_N):
-        # cut the x_0's away
-        index_of_x_0_in_N = 0                                                   # first we have to find at which index x_0 is inside our optimal N, as this is not sorted
-        for index, NBVar in zip(range(0, len(opt_N)), opt_N):
-            if(NBVar == 0):
-                index_of_x_0_in_N = index
-                break 
-
-        left_half_opt_A = opt_A[:, :index_of_x_0_in_N]                          # in here, we cut away the column, that contains the x_0's
-        right_half_opt_A = opt_A[:, index_of_x_0_in_N+1:]                       # as we don't need them in the LP L.
-
-        opt_A = np.c_[left_half_opt_A, right_half_opt_A]                        # we form the new optimal A_bar without x_0's by concatenating the halves horizontally
-
-        left_half_of_opt_N = opt_N[:index_of_x_0_in_N]                          # we also remove the 0 from opt_N, as this again is not needed anymore in L
-        right_half_of_opt_N = opt_N[index_of_x_0_in_N+1:]
-        opt_N = np.hstack((left_half_of_opt_N, right_half_of_opt_N))
-
-        new_c = np.zeros(len(opt_N))                                            # we swap the w-line with the z-line from the original LP L by introducing a placeholder
-        new_v = 0                                                               # for both c_bar and v
-
-
-        # now we need to find all the BVars in the c_bar-vector
-        # and replace them with their corresponding rows in opt_A
-        for i in range(0, len(c_bar)):                                              # for each component of c_bar
-            if(N[i] in opt_B):                                                  # if the i-th coefficient in c_bar relates to a BVar, 
-                                                                                # it needs to be replaced by the according row in opt_A
-                coeff = c_bar[i]                                                    # we need the coefficient of that BVar in c_bar to multiply the row by it
-
-                # we now have to find out, which row the BVar
-                # relates to exactly. For that, we want to
-                # find the index of N[i] in opt_B
-                index_of_NBVar_in_opt_B = 0
-                for opt_BVar_index in range(0, len(opt_B)):
-                    if(N[i] == opt_B[opt_BVar_index]):
-                        index_of_NBVar_in_opt_B = opt_BVar_index
-                        break
-
-                row = np.copy(opt_A[index_of_NBVar_in_opt_B])                   # we then copy the row of the BVar in opt_A
-                row *= coeff                                                    # and multiply it by its coefficient in c_bar
-                new_c += row                                                    # and lastly add it to new_c
-
-                b_entry = opt_b[index_of_NBVar_in_opt_B]                        # and then we do the same for the corresponding b_bar entry and v
-                b_entry *= coeff
-                new_v += b_entry
-
-            else:                                                               # in this case, the i-th coefficient in c_bar relates to a NBVar, 
-                                                                                # which is fine but it needs to be added to new_c accordingly.
-                # find out at which index N[i] is within opt_N
-                index_of_NBVar_in_opt_N = 0
-                for opt_NBVar_index in range(0, len(opt_N)):
-                    if(N[i] == opt_N[opt_NBVar_index]):
-                        index_of_NBVar_in_opt_N = opt_NBVar_index
-                        break
-                new_c[index_of_NBVar_in_opt_N] += c_bar[i]                          # add it to new_c
-
-
-        return (opt_B, opt_N, -opt_A, opt_b, new_c, new_v)                      # we are done and therefore can return the new valid initial slackform of LP L
-
-    # STEP 6: if x_0 is NOT a NBVar, return that LP L is invalid
-    else:
-        logging.debug("INIT ended: x_0 did not become a NBVar in its optimal solution, therefore this LP is invalid.")
-        return -1
\ No newline at end of file
+    with phase(stats, "simplex"):
+        (status, iterations) = run_simplex(T, LH_B, LH_N, pricing=pricing, stats=stats, tolerances=tolerances)
+    iterations += 1                                                             # the pivot of STEP 3 counts as well
+    if(status != OPTIMAL):                                                      # L_H is restricted by x_0 >= 0, so this only happens if SIMPLEX
+        logging.debug("INIT ended: SIMPLEX did not find an optimal solution of L_H (%s).", status)
+        return (status, None, iterations) if with_status else -1                # ran out of iterations or was misled by rounding errors
+
+    # STEP 5: if x_0 is a BVar in L_H(B*) with a value > 0, the LP L is invalid.
+    # if its value is 0, it is replaced by the NBVar with the largest absolute
+    # coefficient in its row (a degenerate pivot). as the columns of the slack
+    # variables have full rank, that row can only lack such a coefficient if
+    # rounding errors made the base numerically singular, which is an error.
+    position_in_B = np.full(n+m+1, -1)                                          # the row of every BVar x_0, ..., x_n+m, -1 for NBVars
+    position_in_B[LH_B] = np.arange(m)
+    row_of_x_0 = position_in_B[0]
+    if(row_of_x_0 != -1):
+        if(T[row_of_x_0, n+1] > tolerances.feasibility):
+            logging.debug("INIT ended: x_0 did not become a NBVar in its optimal solution, therefore this LP is invalid.")
+            return (INFEASIBLE, None, iterations) if with_status else -1
+        column_index_of_x_e = int(np.argmax(np.abs(T[row_of_x_0, :n+1])))
+        if(abs(T[row_of_x_0, column_index_of_x_e]) <= tolerances.pivot):
+            raise ArithmeticError("INIT: x_0 is a BVar with the value 0, but no coefficient in its row is above the "
+                                  "pivot tolerance, so the base of L_H is numerically singular")
+        pivot(T, row_of_x_0, column_index_of_x_e)
+        (LH_N[column_index_of_x_e], LH_B[row_of_x_0]) = (0, LH_N[column_index_of_x_e])
+        position_in_B[LH_B[row_of_x_0]] = row_of_x_0
+        position_in_B[0] = -1
+        iterations += 1
+
+    # STEP 6: construct slackform L(B) of L and return L(B)
+    with phase(stats, "substitution"):
+        # cut the x_0's away: its column is swapped into column n, which is then
+        # overwritten by b, so that T[:, :n+1] is the tableau of L.
+        column_index_of_x_0 = int(np.flatnonzero(LH_N == 0)[0])                 # x_0 is a NBVar after STEP 5
+        T[:, column_index_of_x_0] = T[:, n]
+        LH_N[column_index_of_x_0] = LH_N[n]
+        T[:, n] = T[:, n+1]
+        opt_N = LH_N[:n]
+
+        # the z-row of L replaces the w-row: every x_j of L with c_j != 0 that
+        # is a BVar is replaced by its row, z = c_j * (b_i - A_i * x_N), the
+        # others are added to c' directly. position_in_B and position_in_N
+        # find both without searching B or N.
+        position_in_N = np.full(n+m+1, -1)
+        position_in_N[opt_N] = np.arange(n)
+        rows_of_x = position_in_B[N]                                            # for x_1, ..., x_n of L
+        weights = np.zeros(m)
+        weights[rows_of_x[rows_of_x != -1]] = c_bar[rows_of_x != -1]
+        np.dot(weights, T[:m, :n+1], out=T[m, :n+1])
+        np.negative(T[m, :n+1], out=T[m, :n+1])                                 # z = c_B * b - c_B * A * x_N, and T[m, n] = -v
+        nonbasic = rows_of_x == -1
+        T[m, position_in_N[N[nonbasic]]] += c_bar[nonbasic]
+        T[m, n] += 0.0                                                          # no -0.0 for v
+
+        valid_slackform = (LH_B, opt_N, T[:m, :n], T[:m, n], T[m, :n], 0.0 - float(T[m, n]))
+    if(with_status):                                                            # we are done and therefore can return the new valid initial slackform of LP L
+        return (OPTIMAL, valid_slackform, iterations)
+    return valid_slackform
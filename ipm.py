@@ -0,0 +1,253 @@
+import numpy as np
+import logging
+from scipy.linalg import cho_factor, cho_solve, LinAlgError
+from utility import standardform_to_slackform, slackform_to_tableau, tableau_to_slackform, pivot, is_sparse
+from utility import OPTIMAL, UNBOUNDED, INFEASIBLE, ITERATION_LIMIT, tolerances_or_default
+from result import SolveResult, result_of_slackform
+from dual import run_dual_phases
+from stats import phase
+
+# the INTERIOR POINT METHOD does not walk along the vertices of the LP like
+# SIMPLEX, but through its inside, so its amount of iterations hardly grows
+# with the size of the LP (usually 10 to 50), while every iteration costs
+# about as much as m pivots of a dense tableau.
+#
+# the LP (A, b, c) is written with its slack variables as
+#
+#     min -c * x   s.t.   A * x + x_S = b,   x, x_S >= 0
+#
+# which is solved together with its dual by the primal-dual barrier method
+# with the predictor-corrector steps of Mehrotra: every iteration solves the
+# normal equations
+#
+#     (A * D_x * A^T + D_S) * dy = r
+#
+# where D = diag(x / w) for the dual slacks w, with a Cholesky factorization of
+# the m x m matrix on the left. a sparse A stays sparse, only this matrix is
+# dense.
+#
+# the iterations end once the primal and dual residuals and the duality gap
+# are below BARRIER_TOLERANCE relative to b and c. for a LP that is
+# unrestricted, x grows without limit instead, and for one that is invalid,
+# the dual solution y does. so once one of them is larger than DIVERGENCE
+# (relative to the LP), it is scaled down to a ray and checked: a ray x >= 0
+# with A' * x = 0 and c * x > 0 proves that the LP is unrestricted, a ray y
+# with y <= 0, A^T * y <= 0 and b * y > 0 that it is invalid (the lemma of
+# Farkas), both up to RAY_TOLERANCE.
+#
+# the solution of the barrier method is optimal, but not a vertex, so it has
+# no base. the CROSSOVER turns it into the optimal slackform of a base: the
+# variables are ranked by x_j / w_j, which is large for the ones that are
+# > 0 in the optimum and tiny for those that are 0, and the tableau of the
+# slack variables is pivoted so that the top ranked variables become BVars
+# (with the largest coefficient in the column, like simplex.pivot_to_basis,
+# skipping variables that are linearly dependent on the ones before). DUAL
+# SIMPLEX and SIMPLEX then finish from that base (see dual.run_dual_phases),
+# which usually takes only a few pivots and also proves the status of a LP
+# that is invalid or unrestricted.
+
+BARRIER_TOLERANCE = 1e-8
+BARRIER_ITERATIONS = 100                                                        # iterations of the barrier method if max_iterations is not given
+STEP_FRACTION = 0.99                                                            # the share of the way to the boundary a corrector step goes
+DIVERGENCE = 1e6                                                                # x or y beyond this (relative to the LP) are checked for a ray
+RAY_TOLERANCE = 1e-6
+REGULARIZATION = 1e-14                                                          # added to the diagonal of the normal equations, relative to it
+
+# the barrier method as a solver mode. it gets a LP in standardform (A, b, c)
+# and returns a SolveResult (see result.py).
+#
+# without crossover, x and the duals are those of the barrier method and
+# basis is None. with crossover=True, the result is that of the optimal base
+# found by the crossover, and if the barrier method did not find an optimal
+# solution, the crossover starts from the base of the slack variables, so the
+# status is always proven by the pivot engines.
+#
+# max_iterations limits the iterations of the barrier method (BARRIER_ITERATIONS
+# if None). pricing, tolerances and tableau_dir are handed to the crossover, and
+# stats (see stats.py) records the phases "barrier" and "crossover".
+def interior_point_method(lp_in_standardform, max_iterations=None, crossover=False, pricing=None, stats=None,
+                          tolerances=None, tableau_dir=None):
+    (A, b, c) = lp_in_standardform
+    m = len(b)
+    n = len(c)
+
+    # without conditions there is nothing to factorize: x = 0 is optimal,
+    # unless some c_j > 0, which makes the LP unrestricted.
+    if(m == 0):
+        if(np.any(np.asarray(c) > tolerances_or_default(tolerances).optimality)):
+            logging.debug("BARRIER ended: the LP has no conditions and some c_j > 0, it is unrestricted")
+            return SolveResult(UNBOUNDED)
+        return SolveResult(OPTIMAL, 0.0, np.zeros(n), np.zeros(0, dtype=int) if crossover else None, np.zeros(0))
+
+    with phase(stats, "barrier"):
+        (status, x, y, w, iterations) = run_barrier(A, b, c, max_iterations)
+    logging.debug("BARRIER ended after %d iterations with the status %s.", iterations, status)
+
+    if(crossover):
+        ranking = np.argsort(-(x / w), kind="stable") + 1 if status == OPTIMAL else np.zeros(0, dtype=int)
+        with phase(stats, "crossover"):
+            (status, slackform, pivots) = run_crossover(lp_in_standardform, ranking, pricing, stats, tolerances,
+                                                        tableau_dir)
+        return result_of_slackform(status, slackform, n, m, iterations + pivots)
+
+    if(status != OPTIMAL):
+        return SolveResult(status, iterations=iterations)
+    return SolveResult(OPTIMAL, float(np.dot(c, x[:n])), x[:n], None, 0.0 - y, iterations)
+
+# the Mehrotra predictor-corrector iterations on A, b, c (see the top of this
+# file). returns the status, the primal solution (x, x_S), the dual solution y
+# of the conditions A * x + x_S = b of the min-LP (so -y are the duals of the
+# LP), the dual slacks w of (x, x_S) and the amount of iterations.
+def run_barrier(A, b, c, max_iterations=None):
+    (m, n) = A.shape
+    b = np.asarray(b, dtype=float)
+    cost = np.r_[-np.asarray(c, dtype=float), np.zeros(m)]
+    if(max_iterations is None):
+        max_iterations = BARRIER_ITERATIONS
+    size_of_b = 1 + np.linalg.norm(b)
+    size_of_c = 1 + np.linalg.norm(cost)
+
+    # STEP 1: the starting point of Mehrotra: the least squares solutions of
+    # the conditions and of the dual conditions, shifted to be > 0.
+    factor = factorize(A, np.ones(n+m), n)
+    x = times_transposed(A, cho_solve(factor, b))
+    y = cho_solve(factor, times(A, cost))
+    w = cost - times_transposed(A, y)
+    x += max(-1.5 * x.min(), 0)
+    w += max(-1.5 * w.min(), 0)
+    if(np.dot(x, w) <= 0):                                                      # e.g. b = 0 and c = 0, where both are 0
+        x += 1
+        w += 1
+    product = np.dot(x, w)
+    (x, w) = (x + 0.5 * product / w.sum(), w + 0.5 * product / x.sum())
+
+    iterations = 0
+    while(True):
+        # STEP 2: check whether (x, y, w) is optimal (or diverges).
+        r_p = b - times(A, x)
+        r_d = cost - times_transposed(A, y) - w
+        gap = abs(np.dot(cost, x) - np.dot(b, y))
+        if(np.linalg.norm(r_p) <= BARRIER_TOLERANCE * size_of_b and np.linalg.norm(r_d) <= BARRIER_TOLERANCE * size_of_c
+           and gap <= BARRIER_TOLERANCE * (1 + abs(np.dot(cost, x)))):
+            return (OPTIMAL, x, y, w, iterations)
+        if(x.max() > DIVERGENCE * size_of_b):
+            ray = x / x.max()
+            if(np.abs(times(A, ray)).max() <= RAY_TOLERANCE and np.dot(cost, ray) < -RAY_TOLERANCE):
+                return (UNBOUNDED, x, y, w, iterations)
+        if(np.abs(y).max() > DIVERGENCE * size_of_c):
+            ray = y / np.abs(y).max()
+            if(times_transposed(A, ray).max() <= RAY_TOLERANCE and np.dot(b, ray) > RAY_TOLERANCE):
+                return (INFEASIBLE, x, y, w, iterations)
+        if(iterations >= max_iterations):
+            return (ITERATION_LIMIT, x, y, w, iterations)
+
+        # STEP 3: the predictor, the Newton step towards x * w = 0.
+        d = x / w
+        factor = factorize(A, d, n)
+        (dx, dy, dw) = newton_step(A, factor, x, w, d, r_p, r_d, -x * w)
+        alpha_p = min(1, step_length(x, dx))
+        alpha_d = min(1, step_length(w, dw))
+        mu = np.dot(x, w) / (n+m)
+        mu_affine = np.dot(x + alpha_p * dx, w + alpha_d * dw) / (n+m)
+        sigma = (mu_affine / mu)**3
+
+        # STEP 4: the corrector, towards x * w = sigma * mu with the
+        # second order term of the predictor, on the same factorization.
+        (dx, dy, dw) = newton_step(A, factor, x, w, d, r_p, r_d, sigma * mu - x * w - dx * dw)
+        alpha_p = min(1, STEP_FRACTION * step_length(x, dx))
+        alpha_d = min(1, STEP_FRACTION * step_length(w, dw))
+        x += alpha_p * dx
+        y += alpha_d * dy
+        w += alpha_d * dw
+        iterations += 1
+
+# the Newton step (dx, dy, dw) for the residuals r_p and r_d and the
+# complementarity target r_c:
+#
+#     A' * dx = r_p,   A'^T * dy + dw = r_d,   w * dx + x * dw = r_c
+#
+# with A' = [A, I], solved by the normal equations.
+def newton_step(A, factor, x, w, d, r_p, r_d, r_c):
+    dy = cho_solve(factor, r_p + times(A, d * r_d - r_c / w))
+    dx = d * (times_transposed(A, dy) - r_d) + r_c / w
+    dw = (r_c - w * dx) / x
+    return (dx, dy, dw)
+
+# the largest step alpha for which values + alpha * direction stays >= 0
+# (inf if no component decreases).
+def step_length(values, direction):
+    decreasing = direction < 0
+    if(not np.any(decreasing)):
+        return np.inf
+    return np.min(-values[decreasing] / direction[decreasing])
+
+# the Cholesky factorization of A' * diag(d) * A'^T = A * diag(d_x) * A^T +
+# diag(d_S) with A' = [A, I]. the diagonal is raised a little, and more if the
+# matrix is not numerically positive definite (close to the optimum some d_j
+# are tiny and others huge).
+def factorize(A, d, n):
+    if(is_sparse(A)):
+        M = (A.multiply(d[None, :n]) @ A.T).toarray()
+    else:
+        M = (A * d[None, :n]) @ A.T
+    M[np.diag_indices_from(M)] += d[n:]
+    regularization = REGULARIZATION * max(1.0, M.diagonal().max())
+    while(True):
+        M[np.diag_indices_from(M)] += regularization
+        try:
+            return cho_factor(M)
+        except LinAlgError:
+            regularization *= 100
+
+# A' * v and A'^T * y for A' = [A, I].
+def times(A, v):
+    n = A.shape[1]
+    return A @ v[:n] + v[n:]
+
+def times_transposed(A, y):
+    return np.r_[A.T @ y, y]
+
+# the tableau of the slack variables is pivoted to the base of the top ranked
+# variables (see the top of this file) and solved from there by DUAL SIMPLEX
+# and SIMPLEX. ranking holds the indices 1, ..., n+m of the variables, the
+# best first. returns the status, the optimal slackform (or None) and the
+# amount of pivots.
+def run_crossover(lp_in_standardform, ranking, pricing=None, stats=None, tolerances=None, tableau_dir=None):
+    (A, b, c) = lp_in_standardform
+    m = len(b)
+    n = len(c)
+    tolerances = tolerances_or_default(tolerances)
+    (B, N, T) = slackform_to_tableau(standardform_to_slackform(lp_in_standardform), tableau_dir, extra_rows=1)
+
+    position_in_B = np.full(n+m+1, -1)
+    position_in_B[B] = np.arange(m)
+    position_in_N = np.full(n+m+1, -1)
+    position_in_N[N] = np.arange(n)
+    fixed = np.zeros(m, dtype=bool)                                             # rows whose BVar is one of the top ranked
+    pivots = 0
+    for index in ranking:
+        if(fixed.all()):
+            break
+        if(position_in_B[index] != -1):
+            fixed[position_in_B[index]] = True
+            continue
+        column_index_of_x_e = position_in_N[index]
+        coefficients = np.where(fixed, 0, np.abs(T[:m, column_index_of_x_e]))
+        row_index_of_x_l = int(np.argmax(coefficients))
+        if(coefficients[row_index_of_x_l] <= tolerances.pivot):                 # x_e depends on the variables before it
+            continue
+        if(stats is not None):
+            stats.pivoted(abs(T[row_index_of_x_l, n]) <= tolerances.feasibility, 1, T[:m+1], row_index_of_x_l,
+                          column_index_of_x_e)
+        pivot(T, row_index_of_x_l, column_index_of_x_e)
+        x_l = B[row_index_of_x_l]
+        (N[column_index_of_x_e], B[row_index_of_x_l]) = (x_l, index)
+        (position_in_N[x_l], position_in_B[index]) = (column_index_of_x_e, row_index_of_x_l)
+        (position_in_B[x_l], position_in_N[index]) = (-1, -1)
+        fixed[row_index_of_x_l] = True
+        pivots += 1
+
+    (status, iterations) = run_dual_phases(T, B, N, pricing=pricing, stats=stats, tolerances=tolerances)
+    if(status != OPTIMAL):
+        return (status, None, pivots + iterations)
+    return (OPTIMAL, tableau_to_slackform(B, N, T[:m+1]), pivots + iterations)
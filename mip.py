@@ -0,0 +1,266 @@
+import numpy as np
+import contextlib
+import heapq
+import itertools
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from sensitivity import optimal_slackform
+from dual import run_dual_simplex
+from utility import slackform_to_tableau, new_tableau
+from utility import OPTIMAL, INFEASIBLE, ITERATION_LIMIT, tolerances_or_default
+from stats import phase
+
+# BRANCH AND BOUND solves a LP in standardform (A, b, c) whose structure
+# variables (all of them, or the ones in integer) have to be integral, like
+# the production quantities of the Moebelfabrik:
+#
+#   result = branch_and_bound(lp)                              # all x_j integral
+#   result = branch_and_bound(lp, integer=[0, 2], workers=4)   # only x_1 and x_3
+#   result.objective, result.x, result.nodes_per_second()
+#
+# the LP without the integrality (the relaxation of the root node) is solved
+# by INIT and SIMPLEX (see sensitivity.optimal_slackform). if some integral
+# x_j has a fractional value x_j = b'_r in the optimal slackform, the node is
+# split into two children, one with x_j <= floor(b'_r) and one with
+# x_j >= ceil(b'_r). a child is not solved from scratch: its condition is
+# added to the optimal slackform of the parent as a new row with a new slack
+# variable s,
+#
+#   x_j <= floor(b'_r):   s = (floor(b'_r) - b'_r) + A'_r * x_N
+#   x_j >= ceil(b'_r):    s = (b'_r - ceil(b'_r)) - A'_r * x_N
+#
+# (as x_j = b'_r - A'_r * x_N is the BVar of row r), which keeps c' <= 0 and
+# only makes b' of the new row negative. so DUAL SIMPLEX continues right from
+# the base of the parent, usually with only a few pivots. every level of the
+# tree adds one row, the NBVars stay the n columns of the root.
+#
+# the optimal value of a node is an upper bound for all the integral
+# solutions below it. a node is pruned if it is invalid, if its bound is not
+# better than the best integral solution found so far (the incumbent), or if
+# its solution is integral (which then may become the incumbent). the open
+# nodes are selected by node_selection:
+#
+# - "best_bound": the node with the highest bound first, which solves the
+#   fewest nodes
+# - "depth_first": the deepest node first, which finds an incumbent early and
+#   keeps only few nodes open
+#
+# with workers > 1 up to workers nodes are solved at once by a pool of
+# processes, each getting the tableau of its node. branching and pruning is
+# done by this process, as soon as a node comes back.
+#
+# a LP with bounds (A, b, c, l, u) has to be written with conditions first
+# (see utility.bounds_to_conditions).
+
+NODE_SELECTIONS = ("best_bound", "depth_first")
+INTEGRALITY_TOLERANCE = 1e-6                                                    # values at most this far from an integer count as integral
+
+# the result of BRANCH AND BOUND:
+#
+# - status: OPTIMAL, INFEASIBLE (there is no integral solution), UNBOUNDED
+#   (the relaxation is unrestricted) or ITERATION_LIMIT (max_nodes were solved)
+# - objective, x: the best integral solution, the integral x_j rounded to
+#   integers. for ITERATION_LIMIT they are those of the incumbent (or None)
+# - bound: the highest bound of all nodes that were not pruned, the optimal
+#   value can not be higher than that. equal to objective if OPTIMAL
+# - nodes: the amount of nodes that were solved, the root included
+# - pruned: the amount of nodes that were pruned by their bound or as invalid
+# - iterations: the amount of pivots in all nodes
+# - time: the wall time in seconds
+class MIPResult:
+    __slots__ = ("status", "objective", "x", "bound", "nodes", "pruned", "iterations", "time")
+
+    def __init__(self, status, objective=None, x=None, bound=None, nodes=0, pruned=0, iterations=0, time=0.0):
+        self.status = status
+        self.objective = objective
+        self.x = x
+        self.bound = bound
+        self.nodes = nodes
+        self.pruned = pruned
+        self.iterations = iterations
+        self.time = time
+
+    # the node throughput of the solve.
+    def nodes_per_second(self):
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    def __repr__(self):
+        return ("MIPResult(status=" + repr(self.status) + ", objective=" + repr(self.objective)
+                + ", x=" + repr(self.x) + ", bound=" + repr(self.bound) + ", nodes=" + repr(self.nodes)
+                + ", pruned=" + repr(self.pruned) + ", iterations=" + repr(self.iterations)
+                + ", time=" + repr(self.time) + ")")
+
+# a node of the tree: the tableau (see utility.slackform_to_tableau) of the
+# slackform of the parent with the condition of the node as the row above the
+# z-row, and the bound of the parent. once solved, bound is its own optimal
+# value.
+class Node:
+    __slots__ = ("bound", "depth", "B", "N", "T")
+
+    def __init__(self, bound, depth, B, N, T):
+        self.bound = bound
+        self.depth = depth
+        self.B = B
+        self.N = N
+        self.T = T
+
+# integer are the column indices j of the structure variables that have to be
+# integral (None: all of them). max_nodes limits the amount of nodes that are
+# solved. stats may be a SolveStats (see stats.py), in which the solve is
+# recorded as the phase "branch_and_bound", the root node with the phases of
+# INIT and SIMPLEX and the other nodes as "branch_and_bound/dual" (only the
+# ones solved in this process). pricing and tolerances are those of INIT and
+# SIMPLEX, tolerances also those of DUAL SIMPLEX and of the pruning.
+def branch_and_bound(standardform_lp, integer=None, node_selection="best_bound", workers=None, max_nodes=None,
+                     pricing=None, stats=None, tolerances=None):
+    if(node_selection not in NODE_SELECTIONS):
+        raise ValueError("unknown node selection " + repr(node_selection) + ", expected one of " + repr(NODE_SELECTIONS))
+    starttime = time.perf_counter()
+    tolerances = tolerances_or_default(tolerances)
+
+    with phase(stats, "branch_and_bound"):
+        # STEP 1: solve the relaxation of the root node.
+        (status, slackform, iterations) = optimal_slackform(standardform_lp, pricing, stats, tolerances)
+        c = np.asarray(standardform_lp[2], dtype=float)
+        n = len(c)
+        if(status != OPTIMAL):
+            logging.debug("BRANCH AND BOUND ended: the relaxation of the LP is %s", status)
+            return MIPResult(status, nodes=1, iterations=iterations, time=time.perf_counter() - starttime)
+        (B, N, T) = slackform_to_tableau(slackform)
+        root = Node(None, 0, B, N, T)
+        root.bound = 0.0 - float(T[len(B), n])
+
+        is_integral = np.zeros(n+1, dtype=bool)                                 # by the index of the variable, x_0 is never integral
+        if(integer is None):
+            is_integral[1:] = True
+        else:
+            is_integral[np.asarray(integer, dtype=int) + 1] = True
+
+        # STEP 2: branch on the solved nodes and solve the open ones until
+        # none is left. the open nodes are in a heap, ordered by node_selection.
+        order = itertools.count()
+        capacity = 1 if workers is None or workers <= 1 else workers
+        (open_nodes, running, solved) = (list(), set(), [root])
+        (incumbent, x) = (None, None)
+        (nodes, pruned, limited) = (1, 0, False)
+
+        pool = ProcessPoolExecutor(max_workers=capacity) if capacity > 1 else contextlib.nullcontext()
+        with pool:
+            while(True):
+                for node in solved:
+                    if(node is None):                                           # DUAL SIMPLEX found the node invalid
+                        pruned += 1
+                        continue
+                    if(incumbent is not None and node.bound <= incumbent + tolerances.optimality):
+                        pruned += 1
+                        continue
+                    row_index = fractional_row(node, is_integral, n)
+                    if(row_index == -1):
+                        (incumbent, x) = integral_solution(node, is_integral, c, n)
+                        logging.debug("BRANCH AND BOUND: new incumbent %s at depth %s", incumbent, node.depth)
+                        continue
+                    for child in children(node, row_index):
+                        key = (-child.bound,) if node_selection == "best_bound" else (-child.depth, -child.bound)
+                        heapq.heappush(open_nodes, key + (next(order), child))
+
+                solved = list()
+                while(len(open_nodes) > 0 and len(running) + len(solved) < capacity):
+                    node = open_nodes[0][-1]
+                    if(incumbent is not None and node.bound <= incumbent + tolerances.optimality):
+                        heapq.heappop(open_nodes)
+                        pruned += 1
+                        continue
+                    if(max_nodes is not None and nodes >= max_nodes):
+                        limited = True
+                        break
+                    heapq.heappop(open_nodes)
+                    nodes += 1
+                    if(capacity > 1):
+                        running.add(pool.submit(solve_node, node, None, tolerances))
+                    else:
+                        solved.append(solve_node(node, stats, tolerances))
+
+                if(len(running) > 0):
+                    (done, running) = wait(running, return_when=FIRST_COMPLETED)
+                    solved.extend(future.result() for future in done)
+                if(len(solved) == 0):
+                    break
+                iterations += sum(node.iterations for node in solved)
+                solved = [node.solved for node in solved]
+
+    # STEP 3: the incumbent is optimal, unless nodes are left open.
+    bounds = [entry[-1].bound for entry in open_nodes] + ([incumbent] if incumbent is not None else [])
+    bound = max(bounds) if len(bounds) > 0 else None
+    if(limited):
+        status = ITERATION_LIMIT
+        logging.debug("BRANCH AND BOUND ended: the limit of %s nodes was reached, %s nodes are open",
+                      max_nodes, len(open_nodes))
+    elif(incumbent is None):
+        status = INFEASIBLE
+        logging.debug("BRANCH AND BOUND ended: no node has an integral solution, therefore this LP is invalid.")
+    else:
+        status = OPTIMAL
+        bound = incumbent
+    return MIPResult(status, incumbent, x, bound, nodes, pruned, iterations, time.perf_counter() - starttime)
+
+# a node after DUAL SIMPLEX: the node with its own bound (None if invalid) and
+# the amount of pivots.
+class SolvedNode:
+    __slots__ = ("solved", "iterations")
+
+    def __init__(self, solved, iterations):
+        self.solved = solved
+        self.iterations = iterations
+
+# runs DUAL SIMPLEX on the tableau of the node, in place. runs in the workers,
+# too.
+def solve_node(node, stats=None, tolerances=None):
+    with phase(stats, "dual"):
+        (status, iterations) = run_dual_simplex(node.T, node.B, node.N, stats=stats, tolerances=tolerances)
+    if(status != OPTIMAL):
+        return SolvedNode(None, iterations)
+    node.bound = 0.0 - float(node.T[len(node.B), len(node.N)])
+    return SolvedNode(node, iterations)
+
+# the row of the BVar that is the most fractional of the integral structure
+# variables, or -1 if all of them are integral.
+def fractional_row(node, is_integral, n):
+    B = node.B
+    b_bar = node.T[:len(B), len(node.N)]
+    rows = np.flatnonzero(B <= n)
+    rows = rows[is_integral[B[rows]]]
+    if(rows.size == 0):
+        return -1
+    distances = np.abs(b_bar[rows] - np.round(b_bar[rows]))
+    best = int(np.argmax(distances))
+    if(distances[best] <= INTEGRALITY_TOLERANCE):
+        return -1
+    return int(rows[best])
+
+# the two children of the node, split at the fractional BVar of row_index
+# (see the top of this file). the one with x_j >= ceil(b'_r) comes first.
+def children(node, row_index):
+    (B, N, T) = (node.B, node.N, node.T)
+    m = len(B)
+    n = len(N)
+    value = T[row_index, n]
+    new_variable = n + m + 1                                                    # one new slack variable per level of the tree
+    result = list()
+    for (sign, limit) in ((1.0, np.ceil(value)), (-1.0, np.floor(value))):
+        T_child = new_tableau((m+2, n+1))
+        T_child[:m] = T[:m]
+        T_child[m] = sign * T[row_index]
+        T_child[m, n] -= sign * limit
+        T_child[m+1] = T[m]
+        result.append(Node(node.bound, node.depth + 1, np.append(B, new_variable), np.copy(N), T_child))
+    return result
+
+# the targetfunction value and the x of the integral solution of the node.
+def integral_solution(node, is_integral, c, n):
+    values = np.zeros(len(node.N) + len(node.B) + 1)
+    values[node.B] = node.T[:len(node.B), len(node.N)]
+    x = values[1:n+1]
+    x[is_integral[1:]] = np.round(x[is_integral[1:]])
+    x[x == 0] = 0.0                                                             # no -0.0
+    return (float(c @ x), x)
@@ -0,0 +1,248 @@
+import numpy as np
+from utility import column_of_A_prime, is_sparse
+from utility import OPTIMAL, INFEASIBLE
+from result import SolveResult
+
+# PRESOLVE reduces a LP in standardform (A, b, c), i.e. max c*x with A*x <= b
+# and x >= 0, before it is solved, and POSTSOLVE maps the SolveResult of the
+# reduced LP back to the original one. the reductions are applied in passes
+# until a pass finds nothing to reduce:
+#
+# - empty rows (0 <= b_i): dropped, or the LP is invalid if b_i < 0.
+# - empty columns with c_j <= 0 and dominated columns (A_j >= 0 and c_j <= 0):
+#   raising x_j never helps, so x_j = 0 and the column is dropped.
+# - singleton rows a_ij * x_j <= b_i with a_ij < 0 are the lower bound
+#   x_j >= b_i / a_ij. a bound <= 0 is redundant, otherwise x_j is shifted
+#   by it (x_j = x'_j + l, which moves A_j * l from b into the targetfunction
+#   value), and the row is dropped either way.
+# - singleton rows with a_ij > 0 and b_i = 0 fix x_j = 0, the row and the
+#   column are dropped. with b_i < 0 the LP is invalid.
+# - duplicate rows (positive multiples of each other): only the tightest is kept.
+#
+# every reduction is put on the postsolve stack, which POSTSOLVE walks back to
+# restore the duals of the dropped rows. columns with c_j > 0 and A_j <= 0 are
+# kept, as they only make the LP unrestricted if it is valid, which is up to
+# the solver.
+
+MAX_PASSES = 20
+DUPLICATE_DECIMALS = 12                                                         # rows are duplicates if they agree to this many decimals after scaling
+
+# the result of PRESOLVE: the reduced LP (or None if PRESOLVE found the LP to
+# be invalid) and everything POSTSOLVE needs.
+class PresolvedLP:
+    __slots__ = ("lp", "status", "A", "b", "c", "rows", "columns", "shifts", "offset", "stack")
+
+    def __init__(self, lp, status, A, b, c, rows, columns, shifts, offset, stack):
+        self.lp = lp                                                            # the reduced LP in standardform
+        self.status = status                                                    # INFEASIBLE if PRESOLVE found the LP invalid, None otherwise
+        (self.A, self.b, self.c) = (A, b, c)                                    # the original LP
+        self.rows = rows                                                        # the indices of the rows of the original LP that were kept
+        self.columns = columns                                                  # the same for the columns
+        self.shifts = shifts                                                    # the lower bound each x_j was shifted by
+        self.offset = offset                                                    # the targetfunction value of the shifts
+        self.stack = stack                                                      # the reductions, in the order they were made
+
+def presolve(lp_in_standardform):
+    (A, b, c) = lp_in_standardform
+    m = len(b)
+    n = len(c)
+    if(is_sparse(A)):
+        A = A.tocsr()
+    A_columns = A.tocsc() if is_sparse(A) else A                                # the columns of a sparse A are read in CSC format
+    b_shifted = np.array(b, dtype=float)
+    c = np.asarray(c, dtype=float)
+    keep_row = np.ones(m, dtype=bool)
+    keep_column = np.ones(n, dtype=bool)
+    shifts = np.zeros(n)
+    offset = 0.0
+    stack = list()
+
+    for k in range(0, MAX_PASSES):
+        rows = np.flatnonzero(keep_row)
+        columns = np.flatnonzero(keep_column)
+        A_reduced = submatrix(A, rows, columns)
+        changed = False
+
+        # empty rows
+        row_nonzeros = count_nonzeros(A_reduced, axis=1)
+        for i in rows[row_nonzeros == 0]:
+            if(b_shifted[i] < 0):
+                stack.append(("empty_row", i))
+                return invalid(lp_in_standardform, stack)
+            keep_row[i] = False
+            stack.append(("empty_row", i))
+            changed = True
+
+        # empty and dominated columns
+        column_minimums = column_minimum(A_reduced)
+        for (j, minimum) in zip(columns, column_minimums):
+            if(minimum >= 0 and c[j] <= 0):
+                keep_column[j] = False
+                stack.append(("dominated_column", j))
+                changed = True
+
+        # singleton rows
+        for (i, nonzeros) in zip(rows, row_nonzeros):
+            if(nonzeros != 1 or not keep_row[i]):
+                continue
+            row = row_of(A, i)
+            j = columns[np.flatnonzero(row[columns])[0]]
+            if(not keep_column[j]):
+                continue
+            a = row[j]
+            if(a < 0):
+                lower_bound = b_shifted[i] / a
+                if(lower_bound > 0):
+                    b_shifted -= column_of_A_prime(A_columns, j) * lower_bound
+                    shifts[j] += lower_bound
+                    offset += c[j] * lower_bound
+                    stack.append(("lower_bound", i, j))
+                else:
+                    stack.append(("redundant_row", i))
+                keep_row[i] = False
+                changed = True
+            elif(b_shifted[i] < 0):
+                stack.append(("fixed_column", i, j))
+                return invalid(lp_in_standardform, stack)
+            elif(b_shifted[i] == 0):
+                keep_row[i] = False
+                keep_column[j] = False
+                stack.append(("fixed_column", i, j))
+                changed = True
+
+        # duplicate rows
+        rows = np.flatnonzero(keep_row)
+        for (i, kept) in duplicate_rows(submatrix(A, rows, np.flatnonzero(keep_column)), b_shifted[rows], rows):
+            keep_row[i] = False
+            stack.append(("duplicate_row", i, kept))
+            changed = True
+
+        if(not changed):
+            break
+
+    rows = np.flatnonzero(keep_row)
+    columns = np.flatnonzero(keep_column)
+    reduced_lp = (submatrix(A, rows, columns), b_shifted[rows], c[columns])
+    return PresolvedLP(reduced_lp, None, A, np.asarray(b, dtype=float), c, rows, columns, shifts, offset, stack)
+
+def invalid(lp_in_standardform, stack):
+    (A, b, c) = lp_in_standardform
+    return PresolvedLP(None, INFEASIBLE, A, b, c, None, None, None, 0.0, stack)
+
+# maps the SolveResult of the reduced LP back to the original LP.
+def postsolve(presolved, result):
+    if(result.status != OPTIMAL):
+        return SolveResult(result.status, iterations=result.iterations)
+
+    (A, b, c) = (presolved.A, presolved.b, presolved.c)
+    (m, n) = A.shape
+    (rows, columns) = (presolved.rows, presolved.columns)
+
+    # x: the kept columns get their value from the reduced LP, all of them are shifted back.
+    x = np.copy(presolved.shifts)
+    x[columns] += result.x
+
+    # duals: the dropped rows get 0, except for the rows of fixed columns and
+    # of lower bounds x_j was shifted by. they get the smallest dual that keeps
+    # the column of x_j dual valid, which is 0 if x_j is not at its bound.
+    #
+    # basis: the BVars of the reduced LP with their original indices, and one
+    # more BVar per dropped row, which is its slack variable, except for a
+    # lower bound of a x_j that is not a BVar yet: x_j is at that bound, so
+    # x_j becomes the BVar of the row.
+    #
+    # the stack is walked back, as rows dropped later may be needed for both.
+    duals = np.zeros(m)
+    duals[rows] = result.duals
+    original_index = np.r_[0, columns + 1, n + rows + 1]                        # original index of every index of the reduced LP
+    basis = list(original_index[result.basis])
+    A_columns = A.tocsc() if is_sparse(A) else A
+    for reduction in reversed(presolved.stack):
+        if(reduction[0] == "fixed_column" or reduction[0] == "lower_bound"):
+            (i, j) = reduction[1:]
+            column = column_of_A_prime(A_columns, j)
+            duals[i] = max(0.0, (c[j] - np.dot(column, duals)) / column[i])
+        if(reduction[0] == "lower_bound" and j+1 not in basis):
+            basis.append(j+1)
+        elif(reduction[0] != "dominated_column"):
+            basis.append(n + reduction[1] + 1)
+
+    return SolveResult(OPTIMAL, float(result.objective + presolved.offset), x, np.array(basis, dtype=int), duals, result.iterations)
+
+# the rows and columns of A, for a dense or a CSR A.
+def submatrix(A, rows, columns):
+    if(is_sparse(A)):
+        return A[rows][:, columns]
+    return A[np.ix_(rows, columns)]
+
+def count_nonzeros(A, axis):
+    if(is_sparse(A)):
+        return np.asarray((A != 0).sum(axis=axis)).ravel()
+    return np.count_nonzero(A, axis=axis)
+
+def column_minimum(A):
+    if(A.shape[0] == 0):
+        return np.zeros(A.shape[1])
+    if(is_sparse(A)):
+        return A.min(axis=0).toarray().ravel()
+    return A.min(axis=0)
+
+def row_of(A, i):
+    if(is_sparse(A)):
+        return A[i].toarray().ravel()
+    return A[i]
+
+# the rows that are positive multiples of another row with a smaller or equal
+# b, as pairs (dropped row, kept row) of indices in rows. the rows are scaled
+# by their largest absolute value and compared after rounding, a sparse A by
+# the column indices and the rounded values of its rows, without densifying it.
+def duplicate_rows(A, b, rows):
+    (scales, groups) = row_groups_of_csr(A) if is_sparse(A) else row_groups_of_dense(A)
+    nonempty = np.flatnonzero(scales > 0)                                       # rows that became empty in this pass are left to the next one
+    if(len(nonempty) < 2):
+        return []
+    groups = groups[nonempty]
+    if(len(np.unique(groups)) == len(nonempty)):
+        return []
+    scaled_b = b[nonempty] / scales[nonempty]
+
+    order = np.lexsort((scaled_b, groups))                                      # by group, and within a group the tightest row first
+    duplicates = list()
+    first_of_group = order[0]
+    for k in range(1, len(order)):
+        if(groups[order[k]] == groups[first_of_group]):
+            duplicates.append((rows[nonempty[order[k]]], rows[nonempty[first_of_group]]))
+        else:
+            first_of_group = order[k]
+    return duplicates
+
+# the largest absolute value of every row of A, and a group number per row:
+# rows with the same scaled and rounded entries get the same number (the
+# numbers of empty rows mean nothing).
+def row_groups_of_dense(A):
+    if(A.shape[1] == 0):
+        return (np.zeros(A.shape[0]), np.zeros(A.shape[0], dtype=int))
+    scales = np.abs(A).max(axis=1)
+    scaled_A = np.round(A / np.where(scales > 0, scales, 1.0)[:, None], DUPLICATE_DECIMALS)
+    return (scales, np.unique(scaled_A, axis=0, return_inverse=True)[1].ravel())
+
+# the same for a sparse A, by the column indices and the scaled and rounded
+# values of the non-zeros of every row.
+def row_groups_of_csr(A):
+    A = A.tocsr(copy=True)
+    A.sum_duplicates()                                                          # also sorts the indices of every row
+    scales = np.zeros(A.shape[0])
+    groups = np.zeros(A.shape[0], dtype=int)
+    group_of_row = dict()
+    for i in range(A.shape[0]):
+        (start, end) = (A.indptr[i], A.indptr[i+1])
+        values = A.data[start:end]
+        if(values.size > 0):
+            scales[i] = np.abs(values).max()
+        if(scales[i] == 0):
+            continue
+        scaled = np.round(values / scales[i], DUPLICATE_DECIMALS) + 0.0         # + 0.0, so that -0.0 and 0.0 are the same
+        kept = scaled != 0
+        key = (A.indices[start:end][kept].tobytes(), scaled[kept].tobytes())
+        groups[i] = group_of_row.setdefault(key, len(group_of_row))
+    return (scales, groups)
@@ -0,0 +1,153 @@
+import numpy as np
+import copy
+
+# pricing rules decide which NBVar with a positive coefficient in c' enters
+# the basis. SIMPLEX and REVISED SIMPLEX call
+#
+# - entering(c_bar, N, A) to get the column index of x_e (or -1, if no
+#   coefficient in c' is positive), where A is the current A of the slackform
+#   or None if the engine has no tableau (REVISED SIMPLEX), and
+# - pivoted(pivot_row, column_index_of_x_e, column_index_of_x_l, degenerate)
+#   after each pivot, where pivot_row is the row of x_l before the pivot
+#   (over the same columns as c_bar) and column_index_of_x_l is the column
+#   that belongs to x_l afterwards.
+#
+# a coefficient counts as positive if it is above optimality_tolerance (see
+# utility.Tolerances), which make_pricing_rule sets on the rule.
+#
+# every rule falls back to the Bland-rule after stall_limit degenerate pivots
+# in a row (pivots that do not change the value of any variable), because
+# only the Bland-rule is guaranteed not to cycle. the first non-degenerate
+# pivot switches the actual rule back on.
+#
+# rules keep state (weights, the current block), so every pivot loop works on
+# its own copy of the rule it was given (see make_pricing_rule).
+
+class PricingRule:
+    needs_tableau = False                                                       # True, if the rule needs A to select x_e
+    needs_pivot_row = False                                                     # True, if update() needs the pivot row (REVISED SIMPLEX
+                                                                                # passes None otherwise, as the row costs an extra BTRAN)
+    optimality_tolerance = 0.0
+
+    def __init__(self, stall_limit=50):
+        self.stall_limit = stall_limit
+        self.degenerate_pivots = 0                                              # amount of degenerate pivots in a row
+
+    def entering(self, c_bar, N, A=None):
+        if(self.degenerate_pivots >= self.stall_limit):
+            return bland_rule(c_bar, N, self.optimality_tolerance)
+        return self.select(c_bar, N, A)
+
+    def pivoted(self, pivot_row, column_index_of_x_e, column_index_of_x_l, degenerate):
+        if(degenerate):
+            self.degenerate_pivots += 1
+        else:
+            self.degenerate_pivots = 0
+        self.update(pivot_row, column_index_of_x_e, column_index_of_x_l)
+
+    def select(self, c_bar, N, A):
+        raise NotImplementedError
+
+    def update(self, pivot_row, column_index_of_x_e, column_index_of_x_l):
+        pass
+
+# the NBVar with the lowest index among all with a positive coefficient in c'.
+def bland_rule(c_bar, N, tolerance=0.0):
+    candidates = np.flatnonzero(c_bar > tolerance)
+    if(candidates.size == 0):
+        return -1
+    return candidates[np.argmin(N[candidates])]
+
+class BlandPricing(PricingRule):
+    def select(self, c_bar, N, A):
+        return bland_rule(c_bar, N, self.optimality_tolerance)
+
+# the NBVar with the largest coefficient in c'.
+class DantzigPricing(PricingRule):
+    def select(self, c_bar, N, A):
+        column_index_of_x_e = int(np.argmax(c_bar))
+        if(c_bar[column_index_of_x_e] <= self.optimality_tolerance):
+            return -1
+        return column_index_of_x_e
+
+# the NBVar with the largest coefficient in c' relative to the length of its
+# edge, c_j^2 / (1 + ||A_j||^2). the lengths are calculated from the tableau,
+# which costs about as much as one pivot.
+class SteepestEdgePricing(PricingRule):
+    needs_tableau = True
+
+    def select(self, c_bar, N, A):
+        candidates = np.flatnonzero(c_bar > self.optimality_tolerance)
+        if(candidates.size == 0):
+            return -1
+        edge_lengths = 1 + np.einsum("ij,ij->j", A[:, candidates], A[:, candidates])
+        return candidates[np.argmax(c_bar[candidates]**2 / edge_lengths)]
+
+# like steepest edge, but the lengths are approximated by reference weights
+# that are updated from the pivot row only (Forrest and Goldfarb's devex).
+class DevexPricing(PricingRule):
+    needs_pivot_row = True
+
+    def __init__(self, stall_limit=50):
+        super().__init__(stall_limit)
+        self.weights = None
+
+    def select(self, c_bar, N, A):
+        if(self.weights is None):
+            self.weights = np.ones(len(c_bar))
+        candidates = np.flatnonzero(c_bar > self.optimality_tolerance)
+        if(candidates.size == 0):
+            return -1
+        return candidates[np.argmax(c_bar[candidates]**2 / self.weights[candidates])]
+
+    def update(self, pivot_row, column_index_of_x_e, column_index_of_x_l):
+        if(self.weights is None):
+            self.weights = np.ones(len(pivot_row))
+        corresp_coeff = pivot_row[column_index_of_x_e]
+        weight_of_x_e = self.weights[column_index_of_x_e]
+        np.maximum(self.weights, (pivot_row / corresp_coeff)**2 * weight_of_x_e, out=self.weights)
+        self.weights[column_index_of_x_l] = max(weight_of_x_e / corresp_coeff**2, 1)
+
+# partial pricing: the columns are split into blocks of block_size columns and
+# only one block is priced at a time, starting after the block that delivered
+# the last x_e. the largest coefficient in c' within the first block that
+# has a positive one is taken.
+class PartialPricing(PricingRule):
+    def __init__(self, block_size=64, stall_limit=50):
+        super().__init__(stall_limit)
+        self.block_size = block_size
+        self.start = 0
+
+    def select(self, c_bar, N, A):
+        n = len(c_bar)
+        amount_of_blocks = (n + self.block_size - 1) // self.block_size
+        for k in range(0, amount_of_blocks):
+            first = ((self.start // self.block_size + k) % amount_of_blocks) * self.block_size
+            block = c_bar[first:first+self.block_size]
+            index_in_block = int(np.argmax(block))
+            if(block[index_in_block] > self.optimality_tolerance):
+                self.start = first + self.block_size
+                return first + index_in_block
+        return -1
+
+PRICING_RULES = {
+    "bland": BlandPricing,
+    "dantzig": DantzigPricing,
+    "steepest_edge": SteepestEdgePricing,
+    "devex": DevexPricing,
+    "partial": PartialPricing,
+}
+
+# pricing may be None (the Bland-rule), the name of a rule in PRICING_RULES
+# or an instance of a PricingRule, which is copied before it is used.
+def make_pricing_rule(pricing, optimality_tolerance=0.0):
+    if(pricing is None):
+        rule = BlandPricing()
+    elif(isinstance(pricing, PricingRule)):
+        rule = copy.deepcopy(pricing)
+    elif(pricing in PRICING_RULES):
+        rule = PRICING_RULES[pricing]()
+    else:
+        raise ValueError("unknown pricing rule: " + str(pricing))
+    rule.optimality_tolerance = optimality_tolerance
+    return rule
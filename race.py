@@ -0,0 +1,179 @@
+import numpy as np
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from sv import sv
+from exhaustive import exhaustive
+from stats import SolveStats
+from result import SolveResult
+from utility import OPTIMAL, INFEASIBLE, UNBOUNDED, ITERATION_LIMIT
+
+# RACE solves one LP with several solver configurations at once, each in its
+# own process, and returns the result of the one that finishes first:
+#
+#   (name, result) = race(lp)
+#
+#   with SolverRace(processes=4) as racer:                 # keeps the processes
+#       for lp in lps:                                     # for many LPs
+#           (name, result) = racer.solve(lp, timeout=10)
+#
+# which configuration is the fastest depends on the LP (the pricing rule,
+# primal or dual, pivots or the barrier), so racing them costs more CPU, but
+# the time until the result is that of the fastest one.
+#
+# a configuration is a tuple (name, solver, options), where solver is "sv" or
+# "exhaustive" and options are the keyword arguments for it. only results
+# that prove something win: OPTIMAL, INFEASIBLE and UNBOUNDED of SV, and
+# INFEASIBLE of EXHAUSTIVE, which cannot tell unrestricted LPs apart (see
+# exhaustive.py). an OPTIMAL of EXHAUSTIVE only wins if its duals are valid for
+# the dual LP (y >= 0, A^T * y >= c), which proves that it is optimal.
+#
+# as soon as one configuration has won, the others are cancelled: every
+# solver gets a RaceStats as stats, which checks at every pivot and at the
+# start of every phase (for EXHAUSTIVE: of every chunk of index sets) whether
+# its race is still running, and raises RaceCancelled otherwise. so the
+# others stop after at most one more pivot and their processes are free for
+# the next race, without any process being killed. the barrier iterations of
+# the method "ipm" have no such check, only its crossover.
+#
+# if no configuration proves anything (e.g. all of them reached an iteration
+# limit), the first result that came back is returned, and if all of them
+# failed with an exception, the first exception is raised. with a timeout (in
+# seconds) the race ends after that time with (None, SolveResult(ITERATION_LIMIT)),
+# if there is no result yet.
+
+DEFAULT_CONFIGURATIONS = (
+    ("tableau", "sv", {"method": "tableau"}),
+    ("tableau/steepest_edge", "sv", {"method": "tableau", "pricing": "steepest_edge"}),
+    ("dual", "sv", {"method": "dual"}),
+    ("revised/devex", "sv", {"method": "revised", "pricing": "devex"}),
+    ("ipm", "sv", {"method": "ipm"}),
+)
+SOLVERS = {"sv": sv, "exhaustive": exhaustive}
+DUAL_TOLERANCE = 1e-9                                                           # for the check of the duals of EXHAUSTIVE
+
+class RaceCancelled(Exception):
+    pass
+
+# the number of the race that is running, shared between the process that
+# races and its workers. a worker stops as soon as it differs from the number
+# of the race it works for. set in every worker by start_worker.
+current_race = None
+
+def start_worker(race_counter):
+    global current_race
+    current_race = race_counter
+
+# a SolveStats that raises RaceCancelled at a pivot or the start of a phase
+# once the race race_number is over. the fill-in is not tracked, as it costs
+# about as much as the pivot itself.
+class RaceStats(SolveStats):
+    def __init__(self, race_number):
+        SolveStats.__init__(self, track_fill_in=False)
+        self.race_number = race_number
+
+    def check(self):
+        if(current_race is not None and current_race.value != self.race_number):
+            raise RaceCancelled()
+
+    def phase(self, name):
+        self.check()
+        return SolveStats.phase(self, name)
+
+    def pivoted(self, degenerate, ties, T=None, row_index_of_x_l=None, column_index_of_x_e=None):
+        self.check()
+        SolveStats.pivoted(self, degenerate, ties, T, row_index_of_x_l, column_index_of_x_e)
+
+# runs in a worker: the configuration on the LP, or None if it was cancelled.
+def run_configuration(lp, solver, options, race_number):
+    stats = RaceStats(race_number)
+    try:
+        stats.check()                                                           # the race may be over before the configuration even started
+        return SOLVERS[solver](lp, stats=stats, **options)
+    except RaceCancelled:
+        return None
+
+class SolverRace:
+    # processes is the size of the process pool, by default one process per
+    # configuration, even if there are fewer CPUs: then they share them, but a
+    # fast configuration still does not have to wait for a slow one.
+    def __init__(self, configurations=DEFAULT_CONFIGURATIONS, processes=None):
+        for (name, solver, options) in configurations:
+            if(solver not in SOLVERS):
+                raise ValueError("unknown solver of the configuration " + repr(name) + ": " + repr(solver))
+        self.configurations = tuple(configurations)
+        if(processes is None):
+            processes = max(1, len(self.configurations))
+        self.race_counter = multiprocessing.RawValue("q", 0)                    # only ever written by this process
+        self.pool = ProcessPoolExecutor(max_workers=processes, initializer=start_worker,
+                                        initargs=(self.race_counter,))
+        self.lock = threading.Lock()                                            # one race at a time, as there is only one counter
+
+    # races the configurations on the LP and returns (name of the winning
+    # configuration, its SolveResult).
+    def solve(self, lp, timeout=None):
+        with self.lock:
+            self.race_counter.value += 1
+            race_number = self.race_counter.value
+            futures = {self.pool.submit(run_configuration, lp, solver, options, race_number): (name, solver)
+                       for (name, solver, options) in self.configurations}
+            pending = set(futures)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            (fallback, first_error) = (None, None)
+            try:
+                while(len(pending) > 0):
+                    remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                    (done, pending) = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                    if(len(done) == 0):                                         # the timeout is over
+                        break
+                    for future in done:
+                        try:
+                            result = future.result()
+                        except Exception as error:
+                            first_error = first_error or error
+                            continue
+                        if(result is None):
+                            continue
+                        (name, solver) = futures[future]
+                        if(is_proven(lp, result, solver)):
+                            return (name, result)
+                        fallback = fallback or (name, result)
+            finally:
+                self.race_counter.value += 1                                    # cancels the configurations that are still running
+                for future in pending:
+                    future.cancel()
+
+        if(fallback is not None):
+            return fallback
+        if(first_error is not None and deadline is None):
+            raise first_error
+        return (None, SolveResult(ITERATION_LIMIT))
+
+    # the workers are not waited for, the ones that are still running stop at
+    # their next pivot.
+    def close(self):
+        self.race_counter.value += 1
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# races the configurations on the LP once, see SolverRace.
+def race(lp, configurations=DEFAULT_CONFIGURATIONS, processes=None, timeout=None):
+    with SolverRace(configurations, processes) as racer:
+        return racer.solve(lp, timeout)
+
+# whether the result of solver proves the status of the LP (see the top of
+# this file).
+def is_proven(lp, result, solver):
+    if(result.status not in (OPTIMAL, INFEASIBLE, UNBOUNDED)):
+        return False
+    if(solver != "exhaustive" or result.status != OPTIMAL):
+        return True
+    (A, b, c) = lp[:3]
+    y = result.duals
+    return bool(np.all(y >= -DUAL_TOLERANCE) and np.all(A.T @ y >= np.asarray(c) - DUAL_TOLERANCE))
@@ -0,0 +1,395 @@
+import numpy as np
+import array
+import gzip
+import re
+import scipy.sparse
+
+# the readers turn MPS files (free or fixed format) and CPLEX LP files into a
+# LP in standardform for SV and EXHAUSTIVE:
+#
+#   lp = read_lp_file("model.mps")            # or .lp, .mps.gz, .lp.gz
+#   result = sv(lp)
+#
+# the file is read line by line in a single pass. the non-zeros of A are
+# appended to typed buffers (array.array) of row indices, column indices and
+# values, which numpy reads without copying, and A is built from them once at
+# the end, as a scipy.sparse matrix in CSC format (the format REVISED SIMPLEX
+# and EXHAUSTIVE read A in). so a file with millions of non-zeros costs 24
+# bytes per non-zero while it is read, not a Python object per entry.
+#
+# the model is converted to the standardform max c*x with A*x <= b:
+#
+# - a minimized objective is negated. a constant in the objective is ignored.
+# - conditions a*x <= b are kept, a*x >= b become -a*x <= -b, and equations
+#   and ranged conditions (RANGES in MPS) become one condition of each kind.
+#   the conditions keep the order of the file.
+# - bounds are kept as the bounds l <= x <= u of BOUNDED SIMPLEX (see
+#   bounded.py): if any x_j has a bound other than 0 <= x_j, the LP is returned
+#   as (A, b, c, l, u), otherwise as (A, b, c). bounds_to_conditions in
+#   utility.py turns the bounds into conditions for the other solvers.
+#   variables without a finite lower bound (free variables) are not part of
+#   the standardform, so they raise a ValueError.
+# - integrality (MARKER lines, GENERAL and BINARY sections) is ignored, so the
+#   LP relaxation is read. binary variables get the bounds 0 <= x_j <= 1.
+#
+# with_names=True returns (lp, condition names, variable names) instead of the
+# LP, with one condition name per row of A (a condition that became two rows
+# has its name twice) and one variable name per column.
+#
+# with_sense=True appends the sense of the objective of the file, "maximize" or
+# "minimize", to what is returned, e.g. (lp, sense). the optimal value of a
+# minimized model is the negated optimal value of the LP.
+
+# the CPLEX LP keywords that start a section, with the section they start.
+LP_SECTIONS = re.compile(r"\s*(maximi[sz]e|maximum|max|minimi[sz]e|minimum|min|subject\s+to|such\s+that|s\.t\.|st"
+                         r"|bounds?|generals?|gen|integers?|binar(?:y|ies)|bin|semi-continuous|semis?|end)\b",
+                         re.IGNORECASE)
+LP_TOKENS = re.compile(r"\s*(?:(<=|=<|>=|=>|<|>|=)|([+-])|((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|(:)"
+                       r"|([A-Za-z_!\"#$%&()/,.;?@'`{}|~][^\s+\-*^<>=:\[\]]*))")
+LP_OPERATORS = {"<=": "<=", "=<": "<=", "<": "<=", ">=": ">=", "=>": ">=", ">": ">=", "=": "="}
+MPS_FIXED_FIELDS = ((1, 3), (4, 12), (14, 22), (24, 36), (39, 47), (49, 61))  # the columns of the 6 fields of a fixed MPS line
+
+# collects the model while it is read. the conditions are kept as
+# lower_i <= a_i*x <= upper_i until build() turns them into the standardform.
+class StandardformBuilder:
+    def __init__(self):
+        self.row_index = dict()                                                 # condition name: row index
+        self.row_lower = array.array("d")
+        self.row_upper = array.array("d")
+        self.column_index = dict()                                              # variable name: column index
+        self.objective = array.array("d")
+        self.lower = array.array("d")
+        self.upper = array.array("d")
+        self.entry_rows = array.array("q")
+        self.entry_columns = array.array("q")
+        self.entry_values = array.array("d")
+        self.maximize = False
+
+    def add_row(self, name, lower=-np.inf, upper=np.inf):
+        if(name in self.row_index):
+            raise ValueError("the condition " + name + " is defined twice")
+        self.row_index[name] = len(self.row_lower)
+        self.row_lower.append(lower)
+        self.row_upper.append(upper)
+        return self.row_index[name]
+
+    # the column index of the variable name, which is added if it is new.
+    def column(self, name):
+        j = self.column_index.get(name)
+        if(j is None):
+            j = len(self.objective)
+            self.column_index[name] = j
+            self.objective.append(0.0)
+            self.lower.append(0.0)
+            self.upper.append(np.inf)
+        return j
+
+    def add_entry(self, i, j, value):
+        self.entry_rows.append(i)
+        self.entry_columns.append(j)
+        self.entry_values.append(value)
+
+    def build(self, with_names=False, with_sense=False):
+        row_lower = np.frombuffer(self.row_lower, dtype=float)
+        row_upper = np.frombuffer(self.row_upper, dtype=float)
+        rows = np.frombuffer(self.entry_rows, dtype=np.int64)
+        columns = np.frombuffer(self.entry_columns, dtype=np.int64)
+        values = np.frombuffer(self.entry_values, dtype=float)
+        n = len(self.objective)
+
+        # every condition becomes a row a_i*x <= upper_i if upper_i is finite,
+        # followed by a row -a_i*x <= -lower_i if lower_i is finite.
+        has_upper = np.isfinite(row_upper)
+        has_lower = np.isfinite(row_lower)
+        amount_of_rows = has_upper.astype(np.int64) + has_lower
+        first_row = np.cumsum(amount_of_rows) - amount_of_rows
+        upper_row = first_row
+        lower_row = first_row + has_upper
+        m = int(amount_of_rows.sum())
+
+        entry_has_upper = has_upper[rows]
+        entry_has_lower = has_lower[rows]
+        A = scipy.sparse.csc_matrix((np.r_[values[entry_has_upper], -values[entry_has_lower]],
+                                     (np.r_[upper_row[rows[entry_has_upper]], lower_row[rows[entry_has_lower]]],
+                                      np.r_[columns[entry_has_upper], columns[entry_has_lower]])),
+                                    shape=(m, n))                               # duplicate entries of a variable in a condition are summed up
+        b = np.empty(m)
+        b[upper_row[has_upper]] = row_upper[has_upper]
+        b[lower_row[has_lower]] = -row_lower[has_lower]
+        c = np.array(self.objective) if self.maximize else -np.array(self.objective)
+
+        l = np.array(self.lower)
+        u = np.array(self.upper)
+        if(not np.all(np.isfinite(l))):
+            free = list(self.column_index)[int(np.flatnonzero(~np.isfinite(l))[0])]
+            raise ValueError("the variable " + free + " has no finite lower bound, which the standardform does not allow")
+        lp = (A, b, c) if np.all(l == 0) and np.all(u == np.inf) else (A, b, c, l, u)
+        sense = ("maximize" if self.maximize else "minimize",) if with_sense else ()
+        if(not with_names):
+            return (lp,) + sense if with_sense else lp
+
+        names_of_conditions = np.array(list(self.row_index), dtype=object)
+        row_names = np.empty(m, dtype=object)
+        row_names[upper_row[has_upper]] = names_of_conditions[has_upper]
+        row_names[lower_row[has_lower]] = names_of_conditions[has_lower]
+        return (lp, list(row_names), list(self.column_index)) + sense
+
+# reads a .mps or .lp file, which may be compressed with gzip (.mps.gz, .lp.gz).
+def read_lp_file(path, with_names=False, with_sense=False):
+    name = str(path).lower()
+    if(name.endswith(".gz")):
+        name = name[:-3]
+    if(name.endswith(".mps")):
+        return read_mps(path, with_names=with_names, with_sense=with_sense)
+    if(name.endswith(".lp")):
+        return read_lp(path, with_names=with_names, with_sense=with_sense)
+    raise ValueError("unknown LP file format: " + str(path))
+
+def open_text(path):
+    if(str(path).lower().endswith(".gz")):
+        return gzip.open(path, "rt", encoding="latin-1")
+    return open(path, "r", encoding="latin-1")
+
+# reads a MPS file. fixed=True reads the fields by their columns, which allows
+# spaces in names, otherwise they are separated by whitespace (free MPS).
+def read_mps(path, fixed=False, with_names=False, with_sense=False):
+    builder = StandardformBuilder()
+    kinds = bytearray()                                                         # L, G or E of every condition
+    objective_name = None
+    free_rows = set()                                                           # N rows after the first one, which are ignored
+    section = None
+
+    with open_text(path) as file:
+        for line in file:
+            if(line.startswith("*") or not line.strip()):
+                continue
+            if(not line[0].isspace()):                                          # a section header
+                fields = line.split()
+                section = fields[0].upper()
+                if(section == "OBJSENSE" and len(fields) > 1):
+                    builder.maximize = fields[1].upper() in ("MAX", "MAXIMIZE")
+                if(section == "ENDATA"):
+                    break
+                continue
+
+            fields = fixed_fields(line) if fixed else line.split()
+            if(section == "OBJSENSE"):
+                builder.maximize = fields[0].upper() in ("MAX", "MAXIMIZE")
+
+            elif(section == "ROWS"):
+                (kind, name) = (fields[0].upper(), fields[1])
+                if(kind == "N"):
+                    if(objective_name is None):
+                        objective_name = name
+                    else:
+                        free_rows.add(name)
+                elif(kind in ("L", "G", "E")):
+                    builder.add_row(name, -np.inf if kind == "L" else 0.0, np.inf if kind == "G" else 0.0)
+                    kinds.append(ord(kind))
+                else:
+                    raise ValueError("unknown row type " + kind + " of the row " + name)
+
+            elif(section == "COLUMNS"):
+                if(len(fields) > 2 and fields[1] == "'MARKER'"):                # integrality markers
+                    continue
+                j = builder.column(fields[0])
+                for k in range(1, len(fields) - 1, 2):
+                    (row, value) = (fields[k], float(fields[k+1]))
+                    if(row == objective_name):
+                        builder.objective[j] += value
+                    elif(row not in free_rows):
+                        builder.add_entry(row_of(builder, row), j, value)
+
+            elif(section == "RHS"):
+                for k in range(len(fields) % 2, len(fields) - 1, 2):            # the name of the right hand side vector is optional
+                    (row, value) = (fields[k], float(fields[k+1]))
+                    if(row == objective_name or row in free_rows):              # the constant of the objective is ignored
+                        continue
+                    i = row_of(builder, row)
+                    if(kinds[i] != ord("G")):
+                        builder.row_upper[i] = value
+                    if(kinds[i] != ord("L")):
+                        builder.row_lower[i] = value
+
+            elif(section == "RANGES"):
+                for k in range(len(fields) % 2, len(fields) - 1, 2):
+                    (row, value) = (fields[k], float(fields[k+1]))
+                    i = row_of(builder, row)
+                    if(kinds[i] == ord("L")):
+                        builder.row_lower[i] = builder.row_upper[i] - abs(value)
+                    elif(kinds[i] == ord("G")):
+                        builder.row_upper[i] = builder.row_lower[i] + abs(value)
+                    elif(value > 0):
+                        builder.row_upper[i] = builder.row_lower[i] + value
+                    else:
+                        builder.row_lower[i] = builder.row_upper[i] + value
+
+            elif(section == "BOUNDS"):
+                kind = fields[0].upper()
+                has_value = kind not in ("FR", "MI", "PL", "BV")
+                name = fields[2] if len(fields) > (3 if has_value else 2) else fields[1]    # the name of the bound vector is optional
+                value = float(fields[-1]) if has_value else None
+                set_bound(builder, builder.column(name), kind, value)
+
+            elif(section not in ("NAME", "OBJSENSE")):
+                raise ValueError("unknown MPS section " + str(section))
+
+    return builder.build(with_names, with_sense)
+
+def fixed_fields(line):
+    fields = (line[first:last].strip() for (first, last) in MPS_FIXED_FIELDS)
+    return [field for field in fields if field]
+
+def row_of(builder, name):
+    i = builder.row_index.get(name)
+    if(i is None):
+        raise ValueError("the row " + name + " is not defined in ROWS")
+    return i
+
+def set_bound(builder, j, kind, value):
+    if(kind in ("UP", "UI", "SC")):
+        builder.upper[j] = value
+    elif(kind in ("LO", "LI")):
+        builder.lower[j] = value
+    elif(kind == "FX"):
+        (builder.lower[j], builder.upper[j]) = (value, value)
+    elif(kind == "FR"):
+        (builder.lower[j], builder.upper[j]) = (-np.inf, np.inf)
+    elif(kind == "MI"):
+        builder.lower[j] = -np.inf
+    elif(kind == "PL"):
+        builder.upper[j] = np.inf
+    elif(kind == "BV"):
+        (builder.lower[j], builder.upper[j]) = (0.0, 1.0)
+    else:
+        raise ValueError("unknown bound type " + kind)
+
+# reads a CPLEX LP file. the objective and the conditions may span several
+# lines. bounds have to be on one line each, e.g. "x <= 4", "-3 <= y <= 8",
+# "z = 1" or "w free".
+#
+# a number that is not directly followed by a variable is a constant: in the
+# objective it is ignored, on the left hand side of a condition it is moved to
+# the right hand side (x + y - 1 <= 3 is read as x + y <= 4).
+def read_lp(path, with_names=False, with_sense=False):
+    builder = StandardformBuilder()
+    section = None
+    row = None                                                                  # the row of the condition that is read, None between conditions
+    label = None
+    (sign, coefficient, sense) = (1.0, None, None)
+    constant = 0.0                                                              # the constants of the expression that is read
+
+    with open_text(path) as file:
+        for line in file:
+            line = line.split("\\", 1)[0]                                       # comments start with a backslash
+            keyword = LP_SECTIONS.match(line)
+            if(keyword is not None):
+                (sign, coefficient, constant) = (1.0, None, 0.0)                  # a constant the objective ends with is ignored
+                section = lp_section(keyword.group(1))
+                if(section == "maximize" or section == "minimize"):
+                    builder.maximize = section == "maximize"
+                if(section == "end"):
+                    break
+                line = line[keyword.end():]
+            tokens = LP_TOKENS.findall(line)
+            if(not tokens):
+                continue
+
+            if(section == "bounds"):
+                read_lp_bound(builder, tokens)
+                continue
+            if(section == "binary"):
+                for token in tokens:
+                    set_bound(builder, builder.column(token[4]), "BV", None)
+                continue
+            if(section not in ("maximize", "minimize", "constraints")):         # integer and semi-continuous variables are only declared
+                continue
+
+            for k in range(0, len(tokens)):
+                (operator, sign_token, number, colon, name) = tokens[k]
+                if(name and k+1 < len(tokens) and tokens[k+1][3]):              # the name of the objective or of a condition
+                    label = name
+                    (sign, coefficient, constant) = (1.0, None, 0.0)
+                elif(colon):
+                    continue
+                elif(sign_token):
+                    if(coefficient is not None):                                # the number before the sign is a constant
+                        (constant, sign, coefficient) = (constant + sign * coefficient, 1.0, None)
+                    sign = -sign if sign_token == "-" else sign
+                elif(operator):
+                    if(coefficient is not None):
+                        constant += sign * coefficient
+                    if(row is None):
+                        row = builder.add_row(label or "R" + str(len(builder.row_lower)))
+                    (sense, sign, coefficient) = (LP_OPERATORS[operator], 1.0, None)
+                elif(number and sense is not None):                             # the right hand side ends the condition
+                    value = sign * float(number) - constant
+                    if(sense != ">="):
+                        builder.row_upper[row] = value
+                    if(sense != "<="):
+                        builder.row_lower[row] = value
+                    (row, label, sign, coefficient, sense, constant) = (None, None, 1.0, None, None, 0.0)
+                elif(number):
+                    coefficient = float(number) if coefficient is None else coefficient * float(number)
+                elif(name):
+                    value = sign * (1.0 if coefficient is None else coefficient)
+                    j = builder.column(name)
+                    if(section == "constraints"):
+                        if(row is None):
+                            row = builder.add_row(label or "R" + str(len(builder.row_lower)))
+                        builder.add_entry(row, j, value)
+                    else:
+                        builder.objective[j] += value
+                    (sign, coefficient) = (1.0, None)
+
+    return builder.build(with_names, with_sense)
+
+def lp_section(keyword):
+    keyword = " ".join(keyword.lower().split())
+    if(keyword.startswith("max")):
+        return "maximize"
+    if(keyword.startswith("min")):
+        return "minimize"
+    if(keyword in ("subject to", "such that", "s.t.", "st")):
+        return "constraints"
+    if(keyword.startswith("bound")):
+        return "bounds"
+    if(keyword.startswith("bin")):
+        return "binary"
+    if(keyword == "end"):
+        return "end"
+    return "integer"
+
+# a line of the bounds section, as tokens of LP_TOKENS.
+def read_lp_bound(builder, tokens):
+    items = list()                                                              # variable names, operators and signed numbers
+    sign = 1.0
+    for (operator, sign_token, number, colon, name) in tokens:
+        if(sign_token):
+            sign = -sign if sign_token == "-" else sign
+        elif(number or name.lower() in ("inf", "infinity")):
+            items.append(sign * (float(number) if number else np.inf))
+            sign = 1.0
+        elif(operator):
+            items.append(LP_OPERATORS[operator])
+        elif(name):
+            items.append(name)
+
+    if(len(items) == 2 and str(items[1]).lower() == "free"):
+        set_bound(builder, builder.column(items[0]), "FR", None)
+    elif(len(items) == 3 and isinstance(items[0], str)):                        # x <= 4
+        apply_lp_bound(builder, builder.column(items[0]), items[1], items[2])
+    elif(len(items) == 3):                                                      # 4 >= x
+        mirrored = {"<=": ">=", ">=": "<=", "=": "="}[items[1]]
+        apply_lp_bound(builder, builder.column(items[2]), mirrored, items[0])
+    elif(len(items) == 5):                                                      # -3 <= x <= 8
+        apply_lp_bound(builder, builder.column(items[2]), {"<=": ">=", ">=": "<="}[items[1]], items[0])
+        apply_lp_bound(builder, builder.column(items[2]), items[3], items[4])
+    else:
+        raise ValueError("cannot read the bound " + " ".join(str(item) for item in items))
+
+def apply_lp_bound(builder, j, operator, value):
+    if(operator != ">="):
+        builder.upper[j] = value
+    if(operator != "<="):
+        builder.lower[j] = value
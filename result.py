@@ -0,0 +1,47 @@
+import numpy as np
+from utility import OPTIMAL
+
+# SV and EXHAUSTIVE return a SolveResult:
+#
+# - status: OPTIMAL, INFEASIBLE, UNBOUNDED or ITERATION_LIMIT (see utility.py)
+# - objective: the optimal targetfunction value (None if not OPTIMAL)
+# - x: the optimal values of the structure variables x_1, ..., x_n in this
+#   order (None if not OPTIMAL)
+# - basis: the indices of the BVars of the optimal base, like B of a slackform
+#   (None for the interior solution of ipm.py without crossover)
+# - duals: the optimal dual solution y_1, ..., y_m, one per condition. y_i is
+#   the amount the optimal value changes by if b_i is raised by 1, which is
+#   the negated coefficient of the slack variable x_n+i in c' (0 if it is a BVar)
+# - iterations: the amount of pivots that were made (for EXHAUSTIVE: the
+#   amount of regular bases that were evaluated)
+#
+# the class uses __slots__, as many of them are created when many LPs are solved.
+class SolveResult:
+    __slots__ = ("status", "objective", "x", "basis", "duals", "iterations")
+
+    def __init__(self, status, objective=None, x=None, basis=None, duals=None, iterations=0):
+        self.status = status
+        self.objective = objective
+        self.x = x
+        self.basis = basis
+        self.duals = duals
+        self.iterations = iterations
+
+    def __repr__(self):
+        return ("SolveResult(status=" + repr(self.status) + ", objective=" + repr(self.objective)
+                + ", x=" + repr(self.x) + ", basis=" + repr(self.basis)
+                + ", duals=" + repr(self.duals) + ", iterations=" + repr(self.iterations) + ")")
+
+# the SolveResult of an optimal slackform (B, N, A, b, c, v) of a LP with n
+# structure variables and m conditions. for any other status the slackform is
+# not needed and only status and iterations are set.
+def result_of_slackform(status, slackform, n, m, iterations):
+    if(status != OPTIMAL):
+        return SolveResult(status, iterations=iterations)
+
+    (B, N, A, b, c, v) = slackform
+    values = np.zeros(n+m+1)                                                    # the value of every variable x_0, ..., x_n+m, NBVars are 0
+    values[B] = b
+    duals = np.zeros(n+m+1)
+    duals[N] = 0.0 - c                                                          # 0.0 - c instead of -c, so that there are no -0.0
+    return SolveResult(OPTIMAL, float(v), values[1:n+1], np.copy(B), duals[n+1:], iterations)
@@ -0,0 +1,323 @@
+import numpy as np
+import logging
+import warnings
+from scipy.linalg import lu_factor, lu_solve, LinAlgWarning
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import splu
+from utility import column_of_A_prime, basis_matrix, is_sparse
+from utility import OPTIMAL, UNBOUNDED, INFEASIBLE, ITERATION_LIMIT, tolerances_or_default
+from pricing import make_pricing_rule
+from stats import phase
+
+# REVISED SIMPLEX works on the standardform (A, b, c) directly instead of on a
+# tableau. it only keeps the basis matrix A'_B of A' = [A, I] in factorized
+# form and computes everything else from it when it is needed:
+#
+# - x'_B   = inverse_of(A'_B) * b                   (FTRAN)
+# - y      = transposed(inverse_of(A'_B)) * c'_B     (BTRAN)
+# - c'_j   = c_j - transposed(A'_j) * y              (pricing)
+# - column = inverse_of(A'_B) * A'_e                 (FTRAN of the entering column)
+#
+# so one iteration costs a few solves with the factorization plus one product
+# of A with y, instead of rewriting the whole m x n tableau. A may also be a
+# scipy.sparse matrix, which is then only ever used column by column.
+#
+# internally the columns of A' are numbered from 0: 0..n-1 are the structure
+# variables, n..n+m-1 are the slack variables and n+m is the auxiliary x_0 of
+# INIT. the indices reported in B and N are the usual ones of this repo
+# (x_1, ..., x_n+m), with x_0 being 0.
+
+PIVOT_TOLERANCE = 1e-9                                                          # diagonal entries of U with a smaller absolute value make the basis
+                                                                                # matrix singular, as the factorization is never exact
+
+# the factorization of the basis matrix. a fresh LU factorization is computed by
+# refactor(), every basis exchange after that is stored as an eta vector
+# (product form of the inverse) until refactor_every of them are collected,
+# then the basis is factorized again. a sparse A gets a sparse LU (SuperLU), so
+# neither A nor A'_B is ever densified.
+class BasisFactorization:
+    def __init__(self, A, basis, b, refactor_every=50):
+        self.A = A
+        self.basis = basis                                                      # a reference to the basis array of the caller
+        self.b = b
+        self.refactor_every = refactor_every
+        self.refactor()
+
+    def refactor(self):
+        self.singular = False
+        if(is_sparse(self.A)):
+            try:
+                self.lu = splu(sparse_basis_matrix(self.A, self.basis))
+            except RuntimeError:                                                # SuperLU refuses exactly singular matrices
+                self.singular = True
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", LinAlgWarning)
+                self.lu = lu_factor(basis_matrix(self.A, self.basis))
+            self.singular = bool(np.any(np.abs(np.diag(self.lu[0])) <= PIVOT_TOLERANCE))
+        self.etas = list()                                                      # list of (row index, eta vector), in the order they were made
+
+    def solve(self, a, trans=False):
+        if(is_sparse(self.A)):
+            return self.lu.solve(np.asarray(a, dtype=float), trans=("T" if trans else "N"))
+        return lu_solve(self.lu, a, trans=(1 if trans else 0))
+
+    # solve A'_B * x = a
+    def ftran(self, a):
+        x = self.solve(a)
+        for (r, eta) in self.etas:
+            x += np.multiply.outer(eta, x[r])
+        return x
+
+    # solve transposed(A'_B) * y = c
+    def btran(self, c):
+        y = np.array(c, dtype=float)
+        for (r, eta) in reversed(self.etas):
+            y[r] += np.dot(eta, y)
+        return self.solve(y, trans=True)
+
+    # record that the basic variable in row r is replaced by the entering
+    # variable, whose FTRAN'd column is column_of_x_e.
+    def update(self, r, column_of_x_e):
+        eta = -column_of_x_e / column_of_x_e[r]
+        eta[r] = 1 / column_of_x_e[r] - 1
+        self.etas.append((r, eta))
+        if(len(self.etas) >= self.refactor_every):
+            self.refactor()
+
+# the sparse counterpart of utility.basis_matrix for a CSC matrix A, which
+# copies the stored entries of the basic columns of A' into a CSC matrix A'_B.
+def sparse_basis_matrix(A, basis):
+    (m, n) = A.shape
+    indices = list()
+    data = list()
+    indptr = np.zeros(len(basis)+1, dtype=int)
+    for k, j in zip(range(0, len(basis)), basis):
+        if(j < n):
+            start = A.indptr[j]
+            end = A.indptr[j+1]
+            indices.append(A.indices[start:end])
+            data.append(A.data[start:end])
+        elif(j < n+m):
+            indices.append(np.array([j-n]))
+            data.append(np.ones(1))
+        else:
+            indices.append(np.arange(0, m))
+            data.append(-np.ones(m))
+        indptr[k+1] = indptr[k] + len(indices[-1])
+    return csc_matrix((np.concatenate(data), np.concatenate(indices), indptr), shape=(m, len(basis)))
+
+# the reduced costs c'_j - transposed(A'_j) * y of all columns of A',
+# including the column of x_0.
+def reduced_costs(A, c_prime, y):
+    d = np.array(c_prime, dtype=float)
+    n = A.shape[1]
+    d[:n] -= A.T @ y
+    d[n:-1] -= y
+    d[-1] += np.sum(y)
+    return d
+
+# the function gets a LP in standardform (A, b, c) as input and returns its
+# optimal slackform like SIMPLEX(INIT(L)) does, or -1 if the LP is invalid
+# or unrestricted.
+#
+# the A of the returned slackform is the dense m x n matrix inverse_of(A'_B) * A'_N.
+# with_tableau=False leaves it out (A is None then), which is the default
+# for a sparse A, as that matrix usually does not fit into memory.
+#
+# pricing selects the rule for the entering NBVar (see pricing.py), except
+# for steepest edge, which needs the tableau.
+#
+# B may be an initial base (the indices of its BVars, like B of a slackform).
+# if it is regular and valid for this LP, phase one is skipped.
+#
+# with_status=True returns (status, optimal slackform or None, amount of
+# pivots) instead of the slackform or -1.
+#
+# stats may be a SolveStats (see stats.py), in which the phases are recorded
+# as "revised/phase_one" and "revised/phase_two" (without fill-in, as there
+# is no tableau).
+#
+# tolerances may be a utility.Tolerances, for the pricing, the ratio test and
+# the checks of x'_B.
+def revised_simplex(lp_in_standardform, max_iterations=None, refactor_every=50, with_tableau=None,
+                    pricing=None, B=None, with_status=False, stats=None, tolerances=None):
+    with phase(stats, "revised"):
+        (status, optimal_slackform, iterations) = run_revised_simplex(
+                lp_in_standardform, max_iterations, refactor_every, with_tableau, pricing, B, stats, tolerances)
+
+    if(status == INFEASIBLE):
+        logging.debug("REVISED SIMPLEX ended: x_0 could not be driven to 0 in phase one, therefore this LP is invalid.")
+
+    if(status == UNBOUNDED):
+        logging.debug("REVISED SIMPLEX ended: This LP is unrestricted in its range of optimal solutions")
+
+    if(status == ITERATION_LIMIT):
+        logging.debug("REVISED SIMPLEX ended: the iteration limit of %s pivots was reached before an optimal basis was found",
+                      max_iterations)
+
+    if(with_status):
+        return (status, optimal_slackform, iterations)
+    return optimal_slackform if status == OPTIMAL else -1
+
+# the two phases of REVISED SIMPLEX. returns the status, the optimal
+# slackform (or None) and the amount of pivots that were made.
+def run_revised_simplex(lp_in_standardform, max_iterations=None, refactor_every=50, with_tableau=None,
+                        pricing=None, initial_B=None, stats=None, tolerances=None):
+    (A, b, c) = lp_in_standardform
+    m = len(b)
+    n = len(c)
+    tolerances = tolerances_or_default(tolerances)
+    b = np.asarray(b, dtype=float)
+    if(with_tableau is None):
+        with_tableau = not is_sparse(A)
+    if(is_sparse(A)):
+        A = A.tocsc()                                                           # the columns of A are accessed directly in CSC format
+    if(make_pricing_rule(pricing).needs_tableau):
+        raise ValueError("the pricing rule " + str(pricing) + " needs the tableau, which REVISED SIMPLEX does not have")
+    repo_index = np.r_[np.arange(1, n+m+1), 0]                                  # the index used in B and N for each column of A'
+    allowed = np.ones(n+m+1, dtype=bool)                                        # columns that may enter the basis, x_0 only may in phase one
+    allowed[n+m] = False
+
+    # STEP 1: start with the initial base, if it is regular and valid, or else with
+    # the slack variables as basis, which is already feasible if b has no
+    # negative components.
+    factor = None
+    if(initial_B is not None):
+        factor = BasisFactorization(A, np.asarray(initial_B, dtype=int) - 1, b, refactor_every)
+        x_B = None if factor.singular else factor.ftran(b)
+        if(x_B is None or np.any(x_B < -tolerances.feasibility)):
+            logging.debug("REVISED SIMPLEX: the initial base %s is singular or not valid, it is ignored", initial_B)
+            factor = None
+        else:
+            np.maximum(x_B, 0, out=x_B)                                         # rounding errors must not start phase one
+    if(factor is None):
+        factor = BasisFactorization(A, np.arange(n, n+m), b, refactor_every)
+        x_B = np.copy(b)
+    basis = factor.basis
+    iterations = 0
+
+    # STEP 2: otherwise conduct phase one like INIT does, but on the factorized
+    # basis: x_0 enters in the row with the minimal b component, and then
+    # -x_0 is maximized.
+    if(np.any(x_B < -tolerances.feasibility)):
+        allowed[n+m] = True
+        row_index_of_x_l = int(np.argmin(b))
+        exchange(factor, x_B, row_index_of_x_l, n+m, factor.ftran(column_of_A_prime(A, n+m)))
+        c_aux = np.zeros(n+m+1)
+        c_aux[n+m] = -1
+        with phase(stats, "phase_one"):
+            (status, count) = revised_loop(A, c_aux, factor, x_B, allowed, repo_index, max_iterations, pricing, stats,
+                                           tolerances)
+        iterations += count
+        if(status == ITERATION_LIMIT):
+            return (ITERATION_LIMIT, None, iterations)
+
+        rows_of_x_0 = np.flatnonzero(basis == n+m)
+        if(rows_of_x_0.size > 0):
+            r = rows_of_x_0[0]
+            if(x_B[r] > tolerances.feasibility):                                # x_0 could not be driven to 0, so L is invalid
+                return (INFEASIBLE, None, iterations)
+            # x_0 is still basic, but with value 0. it is replaced by the
+            # NBVar with the largest absolute coefficient in its row (a
+            # degenerate pivot). the columns of the slack variables have full
+            # rank, so only a numerically singular basis can leave that row
+            # without a coefficient above the pivot tolerance, which is an error.
+            allowed[n+m] = False
+            alphas = pivot_row(A, factor, r, allowed)
+            j = int(np.argmax(np.abs(alphas)))
+            if(abs(alphas[j]) <= tolerances.pivot):
+                raise ArithmeticError("REVISED SIMPLEX: x_0 is a BVar with the value 0, but no coefficient in its row is "
+                                      "above the pivot tolerance, so the basis of phase one is numerically singular")
+            exchange(factor, x_B, r, j, factor.ftran(column_of_A_prime(A, j)))
+        allowed[n+m] = False
+
+    # STEP 3: phase two with the actual objective function.
+    c_prime = np.r_[c, np.zeros(m+1)]
+    remaining = None if max_iterations is None else max_iterations - iterations
+    with phase(stats, "phase_two"):
+        (status, count) = revised_loop(A, c_prime, factor, x_B, allowed, repo_index, remaining, pricing, stats,
+                                       tolerances)
+    iterations += count
+    if(status != OPTIMAL):
+        return (status, None, iterations)
+
+    optimal_slackform = slackform_of_basis(A, c_prime, factor, x_B, allowed, repo_index, with_tableau)
+    return (OPTIMAL, optimal_slackform, iterations)
+
+# the pivot loop of REVISED SIMPLEX. it works in place on factor (and
+# therefore on the basis) and on x_B.
+def revised_loop(A, c_prime, factor, x_B, allowed, repo_index, max_iterations=None, pricing=None, stats=None,
+                 tolerances=None):
+    basis = factor.basis
+    tolerances = tolerances_or_default(tolerances)
+    rule = make_pricing_rule(pricing, tolerances.optimality)
+    iterations = 0
+    while(True):
+        # STEP 1: price all NBVars with the simplex multipliers y and let the
+        # pricing rule pick one with a positive reduced cost.
+        y = factor.btran(c_prime[basis])
+        d = reduced_costs(A, c_prime, y)
+        d[basis] = 0
+        d[~allowed] = 0
+        d[d <= tolerances.optimality] = 0                                       # rounding errors must not make a NBVar look attractive
+        entering = rule.entering(d, repo_index)
+        if(entering == -1):
+            return (OPTIMAL, iterations)
+
+        if(max_iterations is not None and iterations >= max_iterations):
+            return (ITERATION_LIMIT, iterations)
+
+        # STEP 2: ratio test on the FTRAN'd column of the entering NBVar.
+        column_of_x_e = factor.ftran(column_of_A_prime(A, entering))
+        restricting_rows = np.flatnonzero(column_of_x_e > tolerances.pivot)
+        if(restricting_rows.size == 0):
+            return (UNBOUNDED, iterations)
+        quotients = np.maximum(x_B[restricting_rows], 0) / column_of_x_e[restricting_rows]
+        ties = restricting_rows[quotients == quotients.min()]
+        row_index_of_x_l = ties[np.argmin(repo_index[basis[ties]])]
+        degenerate = x_B[row_index_of_x_l] <= tolerances.feasibility
+
+        # STEP 3: exchange x_e and x_l.
+        if(rule.needs_pivot_row):
+            rule.pivoted(pivot_row(A, factor, row_index_of_x_l, allowed), entering,
+                         basis[row_index_of_x_l], degenerate)
+        else:
+            rule.pivoted(None, entering, basis[row_index_of_x_l], degenerate)
+        if(stats is not None):
+            stats.pivoted(degenerate, ties.size)
+        exchange(factor, x_B, row_index_of_x_l, entering, column_of_x_e)
+        iterations += 1
+
+# the row r of inverse_of(A'_B) * A' over all columns, where the columns that
+# are basic or may not enter are 0. it costs one BTRAN and one product with A.
+def pivot_row(A, factor, r, allowed):
+    unit_vector = np.zeros(len(factor.basis))
+    unit_vector[r] = 1
+    row = reduced_costs(A, np.zeros(len(allowed)), -factor.btran(unit_vector))
+    row[factor.basis] = 0
+    row[~allowed] = 0
+    return row
+
+def exchange(factor, x_B, row_index_of_x_l, entering, column_of_x_e):
+    theta = x_B[row_index_of_x_l] / column_of_x_e[row_index_of_x_l]
+    x_B -= theta * column_of_x_e
+    x_B[row_index_of_x_l] = theta
+    factor.basis[row_index_of_x_l] = entering
+    factor.update(row_index_of_x_l, column_of_x_e)
+    if(len(factor.etas) == 0):                                                  # a refactorization happened, so x'_B is recomputed from scratch
+        x_B[:] = factor.ftran(factor.b)                                         # to get rid of the rounding errors the updates accumulated
+
+# the function expresses the optimal basis as the slackform (B, N, A, b, c, v)
+# that SIMPLEX would have returned, so that everything downstream of SV keeps working.
+def slackform_of_basis(A, c_prime, factor, x_B, allowed, repo_index, with_tableau=True):
+    basis = factor.basis
+    nonbasic = np.flatnonzero(allowed)
+    nonbasic = nonbasic[~np.isin(nonbasic, basis)]
+    y = factor.btran(c_prime[basis])
+    d = reduced_costs(A, c_prime, y)
+    A_bar = None
+    if(with_tableau):
+        A_bar = factor.ftran(basis_matrix(A, nonbasic))
+    v = float(np.dot(c_prime[basis], x_B))
+    return (repo_index[basis], repo_index[nonbasic], A_bar, np.copy(x_B), d[nonbasic], v)
@@ -0,0 +1,107 @@
+import numpy as np
+from utility import is_sparse, OPTIMAL
+from result import SolveResult
+
+# SCALE multiplies the rows of a LP in standardform (A, b, c) with row scales
+# r and its columns with column scales s, and UNSCALE maps the SolveResult of
+# the scaled LP back:
+#
+#     A' = diag(r) * A * diag(s),   b' = diag(r) * b,   c' = diag(s) * c
+#     x = diag(s) * x',   y = diag(r) * y'
+#
+# the targetfunction value and the base do not change. a LP with bounds
+# (A, b, c, l, u) gets the bounds l / s and u / s.
+#
+# the scales are found by geometric scaling: in every pass every row and then
+# every column is divided by the geometric mean of its largest and its
+# smallest absolute non-zero entry, which brings coefficients of different
+# magnitudes (e.g. rows in the thousands next to rows around 1) close to 1.
+# the rows are equilibrated afterwards, so that their largest absolute entry
+# is about 1. all scales are powers of 2, so scaling and unscaling are exact
+# and the LP itself gets no rounding errors, only its magnitudes change. this
+# is what makes the absolute tolerances of the engines (see
+# utility.Tolerances) meaningful.
+
+SCALING_PASSES = 4
+
+# the result of SCALE: the scaled LP and the scales to undo it with.
+class ScaledLP:
+    __slots__ = ("lp", "row_scales", "column_scales")
+
+    def __init__(self, lp, row_scales, column_scales):
+        self.lp = lp
+        self.row_scales = row_scales                                            # r, one per condition
+        self.column_scales = column_scales                                      # s, one per structure variable
+
+def scale(lp, passes=SCALING_PASSES):
+    (A, b, c) = lp[:3]
+    (m, n) = A.shape
+    A = A.astype(float) if is_sparse(A) else np.asarray(A, dtype=float)
+    row_scales = np.ones(m)
+    column_scales = np.ones(n)
+
+    for k in range(0, passes):
+        factors = geometric_factors(A, axis=1)
+        A = scale_rows(A, factors)
+        row_scales *= factors
+        factors = geometric_factors(A, axis=0)
+        A = scale_columns(A, factors)
+        column_scales *= factors
+
+    (largest, smallest) = magnitudes(A, axis=1)
+    factors = power_of_2(np.divide(1, largest, out=np.ones(m), where=largest > 0))
+    A = scale_rows(A, factors)
+    row_scales *= factors
+
+    scaled_lp = (A, row_scales * np.asarray(b, dtype=float), column_scales * np.asarray(c, dtype=float))
+    if(len(lp) == 5):
+        (l, u) = lp[3:]
+        scaled_lp += (None if l is None else np.asarray(l, dtype=float) / column_scales,
+                      None if u is None else np.asarray(u, dtype=float) / column_scales)
+    return ScaledLP(scaled_lp, row_scales, column_scales)
+
+# maps the SolveResult of the scaled LP back to the original LP.
+def unscale(scaled, result):
+    if(result.status != OPTIMAL):
+        return result
+    return SolveResult(OPTIMAL, result.objective, scaled.column_scales * result.x, result.basis,
+                       scaled.row_scales * result.duals, result.iterations)
+
+# the factor of every row (axis=1) or column (axis=0) of A that divides it by
+# the geometric mean of its largest and smallest absolute non-zero entry,
+# rounded to a power of 2. empty rows and columns keep the factor 1.
+def geometric_factors(A, axis):
+    (largest, smallest) = magnitudes(A, axis)
+    means = np.sqrt(largest * smallest)
+    return power_of_2(np.divide(1, means, out=np.ones(len(means)), where=largest > 0))
+
+# the largest and the smallest absolute non-zero entry of every row (axis=1)
+# or column (axis=0) of A. both are 0 for empty rows and columns.
+def magnitudes(A, axis):
+    absolute = abs(A)
+    if(is_sparse(A)):
+        absolute.eliminate_zeros()
+        largest = absolute.max(axis=axis).toarray().ravel()
+        absolute.data = 1 / absolute.data                                       # the smallest entry has the largest reciprocal, and the
+        reciprocals = absolute.max(axis=axis).toarray().ravel()                 # implicit zeros of a sparse matrix stay out of the way
+        smallest = np.divide(1, reciprocals, out=np.zeros(len(reciprocals)), where=reciprocals > 0)
+        return (largest, smallest)
+    if(absolute.shape[axis] == 0):
+        return (np.zeros(absolute.shape[1-axis]), np.zeros(absolute.shape[1-axis]))
+    largest = absolute.max(axis=axis)
+    smallest = np.where(absolute > 0, absolute, np.inf).min(axis=axis)
+    smallest[largest == 0] = 0
+    return (largest, smallest)
+
+def power_of_2(factors):
+    return np.exp2(np.round(np.log2(factors)))
+
+def scale_rows(A, factors):
+    if(is_sparse(A)):
+        return A.multiply(factors[:, None]).asformat(A.format)
+    return A * factors[:, None]
+
+def scale_columns(A, factors):
+    if(is_sparse(A)):
+        return A.multiply(factors[None, :]).asformat(A.format)
+    return A * factors[None, :]
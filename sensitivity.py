@@ -0,0 +1,381 @@
+import numpy as np
+import logging
+from init import init
+from simplex import simplex_with_bland_rule
+from utility import new_tableau, pivot
+from utility import OPTIMAL, INFEASIBLE, UNBOUNDED, ITERATION_LIMIT, tolerances_or_default
+from stats import phase
+
+# SENSITIVITY analyses the optimal slackform (B, N, A', b', c', v) that
+# SIMPLEX ends with, instead of solving the LP again for every changed b_i or
+# c_j:
+#
+#   analysis = sensitivity(lp)
+#   analysis.shadow_prices        # y_i, the change of the optimum per unit of b_i
+#   analysis.b_ranges[i]          # [lowest, highest] b_i for which the base stays optimal
+#   analysis.c_ranges[j]          # [lowest, highest] c_j for which the base stays optimal
+#
+# PARAMETRIC RHS and PARAMETRIC OBJECTIVE trace the optimal value of the LP
+# with b + t * d or c + t * g for t from 0 to t_end. the optimal value is
+# piecewise linear in t, and the base only changes at the breakpoints between
+# the pieces. so the LP is solved once for t = 0, and every breakpoint costs
+# one pivot: a DUAL SIMPLEX pivot for b (some b'_l(t) gets negative), a
+# SIMPLEX pivot for c (some c'_j(t) gets positive).
+#
+# a LP with bounds (A, b, c, l, u) has to be written with conditions first
+# (see utility.bounds_to_conditions).
+#
+# how b and c enter the slackform: raising b_i by delta is the same as
+# lowering the slack variable x_n+i by delta. so if x_n+i is a NBVar in
+# column k, b' changes by delta * A'[:, k] and v by -delta * c'_k, and if it
+# is a BVar in row l, only b'_l changes by delta. raising c_j by delta adds
+# delta * x_j to z, which is c'_k if x_j is a NBVar in column k, and
+# delta * (b'_l - A'_l * x_N) if it is the BVar of row l.
+
+# the result of SENSITIVITY. everything but status and iterations is None if
+# the LP has no optimal solution.
+#
+# - objective, x, basis, iterations: like in a SolveResult (see result.py)
+# - shadow_prices: y_1, ..., y_m, the duals of the conditions
+# - reduced_costs: c'_j for every structure variable x_1, ..., x_n, which is
+#   <= 0 and how much c_j has to be raised before x_j becomes a BVar (0 for
+#   BVars)
+# - b_ranges: an m x 2 array with the lowest and highest value of every b_i
+#   for which the base stays optimal (the others kept as they are). inside
+#   this range the optimum changes by y_i per unit of b_i
+# - c_ranges: an n x 2 array with the lowest and highest value of every c_j
+#   for which the base (and so x) stays optimal
+#
+# limits that do not exist are -inf or inf.
+class Sensitivity:
+    __slots__ = ("status", "objective", "x", "basis", "shadow_prices", "reduced_costs", "b_ranges", "c_ranges",
+                 "iterations")
+
+    def __init__(self, status, objective=None, x=None, basis=None, shadow_prices=None, reduced_costs=None,
+                 b_ranges=None, c_ranges=None, iterations=0):
+        self.status = status
+        self.objective = objective
+        self.x = x
+        self.basis = basis
+        self.shadow_prices = shadow_prices
+        self.reduced_costs = reduced_costs
+        self.b_ranges = b_ranges
+        self.c_ranges = c_ranges
+        self.iterations = iterations
+
+    def __repr__(self):
+        return ("Sensitivity(status=" + repr(self.status) + ", objective=" + repr(self.objective)
+                + ", x=" + repr(self.x) + ", basis=" + repr(self.basis)
+                + ", shadow_prices=" + repr(self.shadow_prices) + ", reduced_costs=" + repr(self.reduced_costs)
+                + ", b_ranges=" + repr(self.b_ranges) + ", c_ranges=" + repr(self.c_ranges)
+                + ", iterations=" + repr(self.iterations) + ")")
+
+# the result of PARAMETRIC RHS and PARAMETRIC OBJECTIVE:
+#
+# - parameters: 0 = t_0, t_1, ..., t_k, the breakpoints of the optimal value
+#   in the order they were reached, the last one is t_end unless the trace
+#   ended early
+# - objectives: the optimal value at every t_i, in between it is linear
+# - bases: bases[i] is optimal for t between t_i and t_i+1
+# - status: OPTIMAL if the LP was traced up to t_end. INFEASIBLE (for b) or
+#   UNBOUNDED (for c) if the LP has no optimal solution beyond t_k, and
+#   ITERATION_LIMIT if max_iterations breakpoints were not enough. if the LP
+#   already has no optimal solution for t = 0, this is its status and
+#   parameters is empty
+# - iterations: the amount of pivots for t = 0 and for the breakpoints
+class ParametricTrace:
+    __slots__ = ("status", "parameters", "objectives", "bases", "iterations")
+
+    def __init__(self, status, parameters, objectives, bases, iterations=0):
+        self.status = status
+        self.parameters = parameters
+        self.objectives = objectives
+        self.bases = bases
+        self.iterations = iterations
+
+    # the optimal value for the parameter t, which has to be between 0 and the
+    # last of the parameters.
+    def objective_at(self, t):
+        if(len(self.parameters) == 0 or not min(self.parameters) <= t <= max(self.parameters)):
+            raise ValueError("the trace does not contain the parameter " + str(t))
+        if(self.parameters[-1] < self.parameters[0]):                           # traced towards negative t
+            return float(np.interp(-t, -self.parameters, self.objectives))
+        return float(np.interp(t, self.parameters, self.objectives))
+
+    def __repr__(self):
+        return ("ParametricTrace(status=" + repr(self.status) + ", parameters=" + repr(self.parameters)
+                + ", objectives=" + repr(self.objectives) + ", bases=" + repr(self.bases)
+                + ", iterations=" + repr(self.iterations) + ")")
+
+# the sensitivity analysis of a LP in standardform (A, b, c). pricing, stats
+# and tolerances are handed to INIT and SIMPLEX like in SV (method "tableau").
+def sensitivity(standardform_lp, pricing=None, stats=None, tolerances=None):
+    (A, b, c) = standardform_lp
+    m = len(b)
+    n = len(c)
+    tolerances = tolerances_or_default(tolerances)
+    (status, slackform, iterations) = optimal_slackform(standardform_lp, pricing, stats, tolerances)
+    if(status != OPTIMAL):
+        return Sensitivity(status, iterations=iterations)
+
+    (B, N, A_bar, b_bar, c_bar, v) = slackform
+    position_in_B = np.full(n+m+1, -1)                                          # the row of every BVar, -1 for NBVars
+    position_in_B[B] = np.arange(m)
+    position_in_N = np.full(n+m+1, -1)                                          # the column of every NBVar, -1 for BVars
+    position_in_N[N] = np.arange(n)
+
+    values = np.zeros(n+m+1)
+    values[B] = b_bar
+    costs = np.zeros(n+m+1)
+    costs[N] = c_bar
+
+    # STEP 1: ranges of b. for a x_n+i in column k, b' + delta * A'[:, k] >= 0
+    # limits delta by the rows with a coefficient of the other sign.
+    b_ranges = np.empty((m, 2))
+    b_ranges[:, 0] = -np.inf
+    b_ranges[:, 1] = np.inf
+    for i in range(0, m):
+        column = position_in_N[n+1+i]
+        if(column == -1):                                                       # x_n+i is a BVar and may only drop to 0
+            b_ranges[i, 0] = -values[n+1+i]
+            continue
+        (lowest, highest) = ratio_limits(b_bar, A_bar[:, column], tolerances)
+        b_ranges[i] = (lowest, highest)
+    b_ranges += np.asarray(b, dtype=float)[:, None]
+
+    # STEP 2: ranges of c. a NBVar x_j stays one as long as c'_k + delta <= 0,
+    # a BVar x_j of row l changes c' by -delta * A'_l, which has to stay <= 0.
+    c_ranges = np.empty((n, 2))
+    c_ranges[:, 0] = -np.inf
+    c_ranges[:, 1] = np.inf
+    for j in range(0, n):
+        row = position_in_B[j+1]
+        if(row == -1):
+            c_ranges[j, 1] = -costs[j+1]
+            continue
+        (lowest, highest) = ratio_limits(-c_bar, A_bar[row], tolerances)
+        c_ranges[j] = (lowest, highest)
+    c_ranges += np.asarray(c, dtype=float)[:, None]
+
+    return Sensitivity(OPTIMAL, float(v), values[1:n+1], np.copy(B), 0.0 - costs[n+1:], costs[1:n+1] + 0.0,
+                       b_ranges, c_ranges, iterations)
+
+# the range [lowest, highest] of delta for which values + delta * direction
+# stays >= 0, given that values >= 0 already. components of direction up to
+# tolerances.pivot do not limit delta.
+def ratio_limits(values, direction, tolerances):
+    values = np.maximum(values, 0)
+    lowering = direction > tolerances.pivot
+    raising = direction < -tolerances.pivot
+    lowest = np.max(-values[lowering] / direction[lowering]) if np.any(lowering) else -np.inf
+    highest = np.min(-values[raising] / direction[raising]) if np.any(raising) else np.inf
+    return (lowest + 0.0, highest + 0.0)
+
+# the optimal value of the LP (A, b + t * direction, c) for t from 0 to
+# t_end (which may be negative as well), see ParametricTrace. the breakpoints
+# are found by DUAL SIMPLEX pivots on the tableau
+#
+#       | A'  b'  d' |
+#       | c'  -v  -e |
+#
+# where d' and e are the changes of b' and v per unit of t, so that
+# b'(t) = b' + t * d' and v(t) = v + t * e. a pivot updates the column of d
+# like the one of b, so the column stays right for every base.
+#
+# max_iterations limits the amount of breakpoints, and stats records the
+# pivots in the phase "parametric".
+def parametric_rhs(standardform_lp, direction, t_end, max_iterations=None, pricing=None, stats=None, tolerances=None):
+    (A, b, c) = standardform_lp
+    m = len(b)
+    n = len(c)
+    direction = np.asarray(direction, dtype=float)
+    if(direction.shape != (m,)):
+        raise ValueError("the direction of b needs " + str(m) + " components, got " + str(direction.shape))
+    tolerances = tolerances_or_default(tolerances)
+    (status, slackform, iterations) = optimal_slackform(standardform_lp, pricing, stats, tolerances)
+    if(status != OPTIMAL):
+        return ParametricTrace(status, np.zeros(0), np.zeros(0), [], iterations)
+
+    sign = -1.0 if t_end < 0 else 1.0                                           # negative t are traced as positive t along -direction
+    direction = sign * direction
+    (B, N, T) = extended_tableau(slackform, extra_rows=0, extra_columns=1)
+
+    # STEP 1: d' and -e for the base of the optimal slackform.
+    position_in_B = np.full(n+m+1, -1)
+    position_in_B[B] = np.arange(m)
+    position_in_N = np.full(n+m+1, -1)
+    position_in_N[N] = np.arange(n)
+    columns_of_slacks = position_in_N[n+1:]
+    nonbasic = columns_of_slacks != -1
+    T[:, n+1] = T[:, columns_of_slacks[nonbasic]] @ direction[nonbasic]         # -e = c'_k * d_i over the NBVars x_n+i
+    T[position_in_B[n+1:][~nonbasic], n+1] += direction[~nonbasic]
+
+    (A_bar, b_bar, d_bar) = (T[:m, :n], T[:m, n], T[:m, n+1])
+    c_bar = T[m, :n]
+    (status, parameters, objectives, bases, pivots) = (OPTIMAL, [0.0], [0.0 - float(T[m, n])], [np.copy(B)], 0)
+    with phase(stats, "parametric"):
+        while(True):
+            # STEP 2: the base stays optimal as long as b' + t * d' >= 0. the
+            # row that gets negative first leaves at the breakpoint.
+            t = parameters[-1]
+            rows = np.flatnonzero(d_bar < -tolerances.pivot)
+            breakpoints = np.maximum(-b_bar[rows] / d_bar[rows], t)
+            if(rows.size == 0 or breakpoints.min() >= abs(t_end)):
+                parameters.append(float(abs(t_end)))
+                objectives.append(0.0 - T[m, n] - parameters[-1] * T[m, n+1])   # the z-entries hold -v and -e
+                break
+            if(max_iterations is not None and pivots >= max_iterations):
+                status = ITERATION_LIMIT
+                break
+            parameters.append(float(breakpoints.min()))
+            objectives.append(0.0 - T[m, n] - parameters[-1] * T[m, n+1])
+            ties = rows[breakpoints == breakpoints.min()]
+            row_index_of_x_l = ties[np.argmin(B[ties])]
+
+            # STEP 3: a DUAL SIMPLEX pivot, like in dual.run_dual_simplex: of
+            # the NBVars that can raise x_l the one with the minimal c'_j / a_lj
+            # enters. if there is none, b(t) has no valid solution beyond the
+            # breakpoint.
+            row_of_x_l = A_bar[row_index_of_x_l]
+            raising_columns = np.flatnonzero(row_of_x_l < -tolerances.pivot)
+            if(raising_columns.size == 0):
+                status = INFEASIBLE
+                break
+            quotients = np.minimum(c_bar[raising_columns], 0) / row_of_x_l[raising_columns]
+            column_ties = raising_columns[quotients == quotients.min()]
+            column_index_of_x_e = column_ties[np.argmin(N[column_ties])]
+            if(stats is not None):
+                stats.pivoted(c_bar[column_index_of_x_e] >= -tolerances.optimality, column_ties.size, T,
+                              row_index_of_x_l, column_index_of_x_e)
+            exchange(T, B, N, row_index_of_x_l, column_index_of_x_e)
+            bases.append(np.copy(B))
+            pivots += 1
+
+    if(status == INFEASIBLE):
+        logging.debug("PARAMETRIC RHS ended: no NBVar can raise a negative BVar, therefore the LP is invalid beyond t = %s.",
+                      sign * parameters[-1])
+    return ParametricTrace(status, sign * np.array(parameters), np.array(objectives), bases, iterations + pivots)
+
+# the optimal value of the LP (A, b, c + t * direction) for t from 0 to t_end
+# (which may be negative as well), see ParametricTrace. the breakpoints are
+# found by SIMPLEX pivots on the tableau
+#
+#       | A'  b'  |
+#       | c'  -v  |
+#       | g'  -w  |
+#
+# where the last row is the direction g of c written in the NBVars of the
+# base, so that c'(t) = c' + t * g' and v(t) = v + t * w. a pivot updates it
+# like the z-row (see dual.run_dual_method, which does the same with the
+# z-row of its phase two).
+#
+# max_iterations limits the amount of breakpoints, and stats records the
+# pivots in the phase "parametric".
+def parametric_objective(standardform_lp, direction, t_end, max_iterations=None, pricing=None, stats=None,
+                         tolerances=None):
+    (A, b, c) = standardform_lp
+    m = len(b)
+    n = len(c)
+    direction = np.asarray(direction, dtype=float)
+    if(direction.shape != (n,)):
+        raise ValueError("the direction of c needs " + str(n) + " components, got " + str(direction.shape))
+    tolerances = tolerances_or_default(tolerances)
+    (status, slackform, iterations) = optimal_slackform(standardform_lp, pricing, stats, tolerances)
+    if(status != OPTIMAL):
+        return ParametricTrace(status, np.zeros(0), np.zeros(0), [], iterations)
+
+    sign = -1.0 if t_end < 0 else 1.0                                           # negative t are traced as positive t along -direction
+    direction = sign * direction
+    (B, N, T) = extended_tableau(slackform, extra_rows=1, extra_columns=0)
+
+    # STEP 1: g' and -w for the base of the optimal slackform, like the
+    # z-row of L in init.init: every BVar x_j is replaced by its row.
+    position_in_B = np.full(n+m+1, -1)
+    position_in_B[B] = np.arange(m)
+    position_in_N = np.full(n+m+1, -1)
+    position_in_N[N] = np.arange(n)
+    rows_of_x = position_in_B[1:n+1]
+    basic = rows_of_x != -1
+    weights = np.zeros(m)
+    weights[rows_of_x[basic]] = direction[basic]
+    T[m+1] = -(weights @ T[:m])
+    T[m+1, position_in_N[1:n+1][~basic]] += direction[~basic]
+
+    (A_bar, b_bar) = (T[:m, :n], T[:m, n])
+    (c_bar, g_bar) = (T[m, :n], T[m+1, :n])
+    (status, parameters, objectives, bases, pivots) = (OPTIMAL, [0.0], [0.0 - float(T[m, n])], [np.copy(B)], 0)
+    with phase(stats, "parametric"):
+        while(True):
+            # STEP 2: the base stays optimal as long as c' + t * g' <= 0. the
+            # NBVar whose coefficient gets positive first enters at the
+            # breakpoint.
+            t = parameters[-1]
+            columns = np.flatnonzero(g_bar > tolerances.pivot)
+            breakpoints = np.maximum(-c_bar[columns] / g_bar[columns], t)
+            if(columns.size == 0 or breakpoints.min() >= abs(t_end)):
+                parameters.append(float(abs(t_end)))
+                objectives.append(0.0 - T[m, n] - parameters[-1] * T[m+1, n])   # the z-entries hold -v and -w
+                break
+            if(max_iterations is not None and pivots >= max_iterations):
+                status = ITERATION_LIMIT
+                break
+            parameters.append(float(breakpoints.min()))
+            objectives.append(0.0 - T[m, n] - parameters[-1] * T[m+1, n])
+            ties = columns[breakpoints == breakpoints.min()]
+            column_index_of_x_e = ties[np.argmin(N[ties])]
+
+            # STEP 3: a SIMPLEX pivot with the usual ratio test. if no BVar
+            # limits x_e, c(t) is unrestricted beyond the breakpoint.
+            column_of_x_e = A_bar[:, column_index_of_x_e]
+            limiting_rows = np.flatnonzero(column_of_x_e > tolerances.pivot)
+            if(limiting_rows.size == 0):
+                status = UNBOUNDED
+                break
+            quotients = np.maximum(b_bar[limiting_rows], 0) / column_of_x_e[limiting_rows]
+            row_ties = limiting_rows[quotients == quotients.min()]
+            row_index_of_x_l = row_ties[np.argmin(B[row_ties])]
+            if(stats is not None):
+                stats.pivoted(b_bar[row_index_of_x_l] <= tolerances.feasibility, row_ties.size, T,
+                              row_index_of_x_l, column_index_of_x_e)
+            exchange(T, B, N, row_index_of_x_l, column_index_of_x_e)
+            bases.append(np.copy(B))
+            pivots += 1
+
+    if(status == UNBOUNDED):
+        logging.debug("PARAMETRIC OBJECTIVE ended: the LP is unrestricted beyond t = %s.", sign * parameters[-1])
+    return ParametricTrace(status, sign * np.array(parameters), np.array(objectives), bases, iterations + pivots)
+
+# INIT and SIMPLEX on the LP, like SV with the method "tableau". returns the
+# status, the optimal slackform (or None) and the amount of pivots.
+def optimal_slackform(standardform_lp, pricing=None, stats=None, tolerances=None):
+    if(len(standardform_lp) != 3):
+        raise ValueError("a LP with bounds has to be written with conditions first, see utility.bounds_to_conditions")
+    with phase(stats, "init"):
+        (status, valid_slackform, iterations_of_init) = init(standardform_lp, pricing, with_status=True, stats=stats,
+                                                             tolerances=tolerances)
+    if(status != OPTIMAL):
+        return (status, None, iterations_of_init)
+    (status, slackform, iterations) = simplex_with_bland_rule(valid_slackform, pricing=pricing, with_status=True,
+                                                              stats=stats, tolerances=tolerances)
+    return (status, slackform, iterations + iterations_of_init)
+
+# the tableau of the slackform (see utility.slackform_to_tableau) with extra
+# rows below the z-row and extra columns right of b, which are left to the
+# caller.
+def extended_tableau(slackform, extra_rows, extra_columns):
+    (B, N, A, b, c, v) = slackform
+    m = len(b)
+    n = len(c)
+    T = new_tableau((m+1+extra_rows, n+1+extra_columns))
+    T[:m, :n] = A
+    T[:m, n] = b
+    T[m, :n] = c
+    T[m, n] = -v
+    return (np.array(B, dtype=int), np.array(N, dtype=int), T)
+
+# pivots T and exchanges the BVar x_l with the NBVar x_e in B and N.
+def exchange(T, B, N, row_index_of_x_l, column_index_of_x_e):
+    pivot(T, row_index_of_x_l, column_index_of_x_e)
+    temp = N[column_index_of_x_e]
+    N[column_index_of_x_e] = B[row_index_of_x_l]
+    B[row_index_of_x_l] = temp
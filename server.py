@@ -0,0 +1,309 @@
+import numpy as np
+import asyncio
+import json
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from sv import sv
+from exhaustive import exhaustive
+from stats import SolveStats
+from result import SolveResult
+from utility import Tolerances, ITERATION_LIMIT
+
+# the SOLVE SERVER keeps a pool of worker processes that have already imported
+# numpy and the solvers, and solves the LPs that clients send to it over a
+# Unix socket:
+#
+#   python server.py /tmp/sv.socket --processes 4       # or serve(path, ...)
+#
+#   result = solve_remote("/tmp/sv.socket", lp, method="revised", timeout=10)
+#   result = await request_solve("/tmp/sv.socket", lp)   # from asyncio code
+#
+# a message is a JSON object, preceded by its length in 4 bytes (big-endian).
+# a request looks like
+#
+#   {"solver": "sv", "options": {"method": "revised"}, "timeout": 10,
+#    "memory": "psm_1234", "arrays": {"A": ..., "b": ..., "c": ...}}
+#
+# the arrays of the LP are not part of the message: the client writes them into
+# a block of shared memory (see share_lp), and "arrays" only holds where they
+# are (offset, dtype and shape, and for a sparse A those of its CSR arrays). a
+# worker reads them in place, so a LP is never pickled or copied through the
+# socket. the client removes the block once it has the response. "l" and "u"
+# in "arrays" make it a LP with bounds, "options" are the keyword arguments of
+# sv.sv or exhaustive.exhaustive (tolerances as an object with the names of
+# utility.Tolerances).
+#
+# the response is the SolveResult as an object with the same names, or
+# {"error": message}. a request that did not finish within its timeout (in
+# seconds, counted from its arrival, including the time in the queue) gets
+# {"error": "timeout"}, which solve_remote returns as a SolveResult with
+# ITERATION_LIMIT. the worker is cancelled at its next pivot, like the
+# configurations of race.py.
+#
+# the requests wait in a queue of at most queue_size requests, from which one
+# dispatcher per worker takes the next one. if the queue is full, a request
+# is answered with an error right away, so a client never waits for a server
+# that cannot keep up. every connection can send any amount of requests, one
+# after the other.
+
+QUEUE_SIZE = 64
+MAX_MESSAGE_SIZE = 1 << 24                                                      # the arrays are not part of a message, so they stay small
+SOLVERS = {"sv": sv, "exhaustive": exhaustive}
+
+class ServerError(RuntimeError):
+    pass
+
+class RequestCancelled(Exception):
+    pass
+
+# one flag per dispatcher, which is set when the request of that dispatcher
+# ran out of time. set in every worker by start_worker.
+cancelled = None
+
+def start_worker(flags):
+    global cancelled
+    cancelled = flags
+
+# a SolveStats that raises RequestCancelled at the next pivot or phase once
+# the flag of its dispatcher is set.
+class RequestStats(SolveStats):
+    def __init__(self, slot):
+        SolveStats.__init__(self, track_fill_in=False)
+        self.slot = slot
+
+    def check(self):
+        if(cancelled is not None and cancelled[self.slot]):
+            raise RequestCancelled()
+
+    def phase(self, name):
+        self.check()
+        return SolveStats.phase(self, name)
+
+    def pivoted(self, degenerate, ties, T=None, row_index_of_x_l=None, column_index_of_x_e=None):
+        self.check()
+        SolveStats.pivoted(self, degenerate, ties, T, row_index_of_x_l, column_index_of_x_e)
+
+class SolveServer:
+    # processes is the amount of worker processes (by default one per CPU),
+    # timeout the timeout of requests that do not have one (None for none).
+    def __init__(self, path, processes=None, queue_size=QUEUE_SIZE, timeout=None):
+        self.path = path
+        self.processes = processes or multiprocessing.cpu_count()
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.requests = 0
+        self.rejected = 0                                                       # requests that found the queue full
+        self.timeouts = 0
+        self.pool = None
+        self.server = None
+
+    # starts the workers (all of them right away) and the dispatchers and
+    # listens on the socket.
+    async def start(self):
+        self.cancelled = multiprocessing.RawArray("b", self.processes)
+        self.pool = multiprocessing.Pool(self.processes, initializer=start_worker, initargs=(self.cancelled,))
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.dispatchers = [asyncio.create_task(self.dispatch(slot)) for slot in range(0, self.processes)]
+        self.server = await asyncio.start_unix_server(self.handle_connection, path=self.path)
+
+    async def serve_forever(self):
+        if(self.server is None):
+            await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if(self.server is not None):
+            self.server.close()
+            await self.server.wait_closed()
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        if(self.pool is not None):
+            self.pool.terminate()
+            self.pool.join()
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while(True):
+                try:
+                    request = await read_message(reader)
+                except asyncio.IncompleteReadError:                             # the client closed the connection
+                    break
+                self.requests += 1
+                timeout = request.get("timeout", self.timeout)
+                deadline = None if timeout is None else loop.time() + timeout
+                response = loop.create_future()
+                try:
+                    self.queue.put_nowait((request, deadline, response))
+                except asyncio.QueueFull:
+                    self.rejected += 1
+                    response.set_result({"error": "the request queue is full"})
+                write_message(writer, await response)
+                await writer.drain()
+        except (ConnectionError, ServerError):
+            pass
+        finally:
+            writer.close()
+
+    # takes the requests from the queue one by one and solves them in the pool.
+    # slot is the index of the dispatcher, and of its flag in cancelled.
+    async def dispatch(self, slot):
+        loop = asyncio.get_running_loop()
+        while(True):
+            (request, deadline, response) = await self.queue.get()
+            remaining = None if deadline is None else deadline - loop.time()
+            if(remaining is not None and remaining <= 0):
+                self.timeouts += 1
+                response.set_result({"error": "timeout"})
+                continue
+
+            self.cancelled[slot] = 0
+            solved = loop.create_future()
+            self.pool.apply_async(solve_in_worker, (request, slot),
+                                  callback=lambda result: loop.call_soon_threadsafe(solved.set_result, result),
+                                  error_callback=lambda error: loop.call_soon_threadsafe(solved.set_exception, error))
+            try:
+                response.set_result(await asyncio.wait_for(asyncio.shield(solved), remaining))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self.cancelled[slot] = 1                                        # the worker stops at its next pivot
+                response.set_result({"error": "timeout"})
+                await asyncio.wait([solved])                                    # so the worker is free again before the next request
+            except Exception as error:
+                response.set_result({"error": type(error).__name__ + ": " + str(error)})
+
+# runs in a worker: solves the request on the LP in its shared memory and
+# returns the response.
+def solve_in_worker(request, slot):
+    memory = shared_memory.SharedMemory(name=request["memory"])
+    resource_tracker.unregister(memory._name, "shared_memory")                  # the client owns the memory and removes it
+    try:
+        return solve_request(request, memory.buf, slot)
+    finally:
+        memory.close()
+
+# the LP is only a view into buffer, so no reference to it (not even in a
+# traceback) may survive this function, or the memory cannot be closed.
+def solve_request(request, buffer, slot):
+    try:
+        lp = lp_of_arrays(request["arrays"], buffer)
+        options = dict(request.get("options", {}))
+        if(isinstance(options.get("tolerances"), dict)):
+            options["tolerances"] = Tolerances(**options["tolerances"])
+        result = SOLVERS[request.get("solver", "sv")](lp, stats=RequestStats(slot), **options)
+    except RequestCancelled:
+        return {"error": "timeout"}
+    except Exception as error:
+        return {"error": type(error).__name__ + ": " + str(error)}
+    return {"status": result.status, "objective": result.objective,
+            "x": None if result.x is None else result.x.tolist(),
+            "basis": None if result.basis is None else result.basis.tolist(),
+            "duals": None if result.duals is None else result.duals.tolist(),
+            "iterations": int(result.iterations)}
+
+def lp_of_arrays(arrays, buffer):
+    lp = tuple(array_of_layout(arrays[name], buffer) for name in ("A", "b", "c"))
+    if(arrays.get("l") is not None or arrays.get("u") is not None):
+        lp += tuple(None if arrays.get(name) is None else array_of_layout(arrays[name], buffer) for name in ("l", "u"))
+    return lp
+
+def array_of_layout(layout, buffer):
+    if(layout.get("format") == "csr"):
+        import scipy.sparse                                                     # imported here, so that dense LPs never need scipy
+        parts = tuple(array_of_layout(layout[name], buffer) for name in ("data", "indices", "indptr"))
+        return scipy.sparse.csr_matrix(parts, shape=tuple(layout["shape"]), copy=False)
+    return np.ndarray(tuple(layout["shape"]), dtype=np.dtype(layout["dtype"]), buffer=buffer, offset=layout["offset"])
+
+# writes the arrays of the LP (A, b, c) or (A, b, c, l, u) into a new block of
+# shared memory and returns it with the layout of the arrays in it. the
+# caller has to close and unlink the block.
+def share_lp(lp):
+    names = ("A", "b", "c", "l", "u")
+    parts = list()                                                              # (array, where its layout goes)
+    layouts = dict()
+    for (name, array) in zip(names, lp):
+        if(array is None):
+            layouts[name] = None
+        elif(hasattr(array, "tocsr")):
+            array = array.tocsr()
+            layouts[name] = {"format": "csr", "shape": list(array.shape)}
+            for part in ("data", "indices", "indptr"):
+                layouts[name][part] = dict()
+                parts.append((np.ascontiguousarray(getattr(array, part)), layouts[name][part]))
+        else:
+            layouts[name] = dict()
+            parts.append((np.ascontiguousarray(array, dtype=float), layouts[name]))
+
+    offsets = np.cumsum([0] + [(array.nbytes + 7) // 8 * 8 for (array, layout) in parts])   # every array 8-byte aligned
+    memory = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]), 1))
+    for ((array, layout), offset) in zip(parts, offsets):
+        layout.update({"offset": int(offset), "dtype": array.dtype.str, "shape": list(array.shape)})
+        np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf, offset=int(offset))[...] = array
+    return (memory, layouts)
+
+# sends the LP to the server on the socket path and returns its SolveResult.
+# solver is "sv" or "exhaustive", options are its keyword arguments (plain
+# values only) and timeout is in seconds. a timeout gives ITERATION_LIMIT,
+# any other error of the server raises a ServerError.
+async def request_solve(path, lp, solver="sv", timeout=None, **options):
+    (memory, layouts) = share_lp(lp)
+    try:
+        (reader, writer) = await asyncio.open_unix_connection(path)
+        try:
+            request = {"solver": solver, "options": options, "memory": memory.name, "arrays": layouts}
+            if(timeout is not None):
+                request["timeout"] = timeout
+            write_message(writer, request)
+            await writer.drain()
+            response = await read_message(reader)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+    finally:
+        memory.close()
+        memory.unlink()
+
+    if(response.get("error") == "timeout"):
+        return SolveResult(ITERATION_LIMIT)
+    if("error" in response):
+        raise ServerError(response["error"])
+    return SolveResult(response["status"], response["objective"],
+                       None if response["x"] is None else np.array(response["x"]),
+                       None if response["basis"] is None else np.array(response["basis"], dtype=int),
+                       None if response["duals"] is None else np.array(response["duals"]),
+                       response["iterations"])
+
+# request_solve for code without an event loop.
+def solve_remote(path, lp, solver="sv", timeout=None, **options):
+    return asyncio.run(request_solve(path, lp, solver, timeout, **options))
+
+async def read_message(reader):
+    length = int.from_bytes(await reader.readexactly(4), "big")
+    if(length > MAX_MESSAGE_SIZE):
+        raise ServerError("a message of " + str(length) + " bytes is too large")
+    return json.loads(await reader.readexactly(length))
+
+def write_message(writer, message):
+    data = json.dumps(message).encode()
+    writer.write(len(data).to_bytes(4, "big") + data)
+
+# runs a SolveServer on path until it is interrupted.
+def serve(path, processes=None, queue_size=QUEUE_SIZE, timeout=None):
+    server = SolveServer(path, processes, queue_size, timeout)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="solves LPs sent over a Unix socket (see server.py)")
+    parser.add_argument("path", help="the path of the Unix socket")
+    parser.add_argument("--processes", type=int, default=None, help="amount of worker processes (default: one per CPU)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="amount of requests that may wait")
+    parser.add_argument("--timeout", type=float, default=None, help="timeout in seconds of requests without one")
+    arguments = parser.parse_args()
+    serve(arguments.path, arguments.processes, arguments.queue_size, arguments.timeout)
@@ -1,134 +1,214 @@
 import numpy as np
 import logging
-
-def simplex_with_bland_rule(lp_in_valid_slackform):
+from utility import slackform_to_tableau, tableau_to_slackform, pivot
+from utility import OPTIMAL, UNBOUNDED, INFEASIBLE, ITERATION_LIMIT, tolerances_or_default
+from pricing import make_pricing_rule
+from stats import phase
+from dual import run_dual_simplex
+
+# an important note on this implementation of SIMPLEX:
+#
+# I treat the entire slackform as one big linear system of equations
+# and therefore refer to the NBVars in question with their respective
+# column index of their coefficients in both c' and A.
+#
+# an example for this is made here:
+#
+#                               column no. 0   column no. 1   column no. 2
+#                                     |              |              |
+#                                     V              V              V
+#    row no. 0 ->     x_1 = 3 - (a_11 * x_4) - (a_12 * x_5) - (a_13 * x_6)
+#    row no. 1 ->     x_2 = 4 - (a_21 * x_4) - (a_22 * x_5) - (a_23 * x_6)
+#    row no. 2 ->     x_3 = 1 - (a_31 * x_4) - (a_32 * x_5) - (a_33 * x_6)
+#                     z   = 7 + (c_1  * x_4) + (c_2  * x_5) + (c_3  * x_6)
+#
+# e.g. column_index_of_x_e therefore refers to the respective column number
+# of the upper diagram in which the entering NBVar resides.
+#
+# the whole slackform lives in one tableau T = [[A, b], [c, -v]] (see
+# utility.slackform_to_tableau), so every pivot is a single rank-1 update
+# of T and the loop runs in constant stack depth.
+#
+# Also important: I never sort N and B to be ascending, as i
+# do not require it to be sorted, just as i do not sort A and c'.
+# e.g. if N = [1, 2, 3] and B = [4, 5, 6], and x_2 is the entering NBVar
+# and x_5 is the exiting BVar, the actual arrays will look like this afterwards:
+# N = [1, 5, 3] and B = [4, 2, 6]
+
+WARM_START_FAILED = "warm_start_failed"                                         # internal status of run_warm_start: the initial base could not be used
+PIVOT_TOLERANCE = 1e-9                                                          # coefficients with a smaller absolute value are no pivots when the
+                                                                                # slackform is pivoted to an initial base
+
+# pricing selects the rule for the entering NBVar (see pricing.py). by default
+# this is the Bland-rule the function is named after.
+#
+# B may be an initial base (e.g. the optimal base of a previous solve of the
+# same LP with other b or c). the slackform is then pivoted to that base first,
+# see run_warm_start. if that does not work out, SIMPLEX starts from the
+# given slackform as usual.
+#
+# with_status=True returns (status, optimal slackform or None, amount of
+# pivots) instead of the slackform or -1, for callers that need to know why
+# SIMPLEX ended.
+#
+# stats may be a SolveStats (see stats.py), in which SIMPLEX is recorded as
+# the phase "simplex".
+#
+# tolerances may be a utility.Tolerances, for the pricing and the ratio test.
+#
+# tableau_dir puts the tableau into a memory-mapped file in that directory
+# (see utility.new_tableau), for LPs whose tableau does not fit into memory.
+def simplex_with_bland_rule(lp_in_valid_slackform, max_iterations=None, pricing=None, B=None, with_status=False,
+                            stats=None, tolerances=None, tableau_dir=None):
     if(lp_in_valid_slackform == -1):                                            # if this case is triggered, INIT found the LP to be invalid and
-        return -1                                                               # therefore no further calculations are necessary.
-
-    (B, N, A, b_bar, c_bar, v) = lp_in_valid_slackform
-    m = len(b_bar)
-    n = len(c_bar)
-    A_bar = -A                                                                  # although A_bar is initialized with A, i negate the whole matrix because
-                                                                                # it is substracted from b in the linear system of equations.
-    # an important note on this implementation of SIMPLEX:
-    #
-    # I treat the entire slackform as one big linear system of equations
-    # and therefore refer to the NBVars in question with their respective
-    # column index of their coefficients in both c' and A_bar.
-    #
-    # an example for this is made here:
-    #
-    #                               column no. 0   column no. 1   column no. 2
-    #                                     |              |              |
-    #                                     V              V              V
-    #    row no. 0 ->     x_1 = 3 - (a_11 * x_4) - (a_12 * x_5) - (a_13 * x_6)
-    #    row no. 1 ->     x_2 = 4 - (a_21 * x_4) - (a_22 * x_5) - (a_23 * x_6)
-    #    row no. 2 ->     x_3 = 1 - (a_31 * x_4) - (a_32 * x_5) - (a_33 * x_6)
-    #                     z   = 7 + (c_1  * x_4) - (c_2  * x_5) - (c_3  * x_6)
-    #
-    # e.g. column_index_of_x_e therefore refers to the respective column number
-    # of the upper diagram in which the entering NBVar resides.
-    #
-    # Also important: I never sort N and B to be ascending, as i
-    # do not require it to be sorted, just as i do not sort A_bar and c'.
-    # e.g. if N = [1, 2, 3] and B = [4, 5, 6], and x_2 is the entering NBVar
-    # and x_5 is the exiting BVar, the actual arrays will look like this afterwards:
-    # N = [1, 5, 3] and B = [4, 2, 6]
-
-    # STEP 1.1: find the NBVar with a positive coefficient in c'
-    # and the lowest index to suffice the Bland-rule.
-    column_index_of_x_e = -1                                                    # start with -1 to detect, if any positive coefficient was found afterwards
-    lowest_index = 0xFFFFFFFF                                                   # start with maximal integer value 0xFFFFFFFF to make sure that the first index we look at is set as the new lowest index
-    for index, c_bar_coeff in zip(range(n+1), c_bar):                           # index refers to the index of the current entry in N, c_bar_coeff to the corresponding coefficient in c'
-        if(c_bar_coeff > 0 and N[index] < lowest_index):                        # if we find a positive coefficient in c' and the index is lower than the one before:
-            column_index_of_x_e = index                                         # update the values
-            lowest_index = N[index]
-
-    # STEP 1.2: if there is no coefficient of any NBVar in c' which is > 0,
-    # then stop and return the current slackform, as it already is optimal.
-    if(column_index_of_x_e == -1):
-        return (B, N, A, b_bar, c_bar, v)                                       # this equals the input parameter lp_in_valid_slackform
-
-    # STEP 2.1: if all coefficients in A in the column of x_e 
-    # are negative or zero, the LP is unrestricted in its range of optimal
-    # solutions, which implies that there is no optimal solution.
-    all_coefficients_in_A_are_negative = True
-    for coeff_in_A in A[:, column_index_of_x_e]:
-        if(coeff_in_A > 0):                                                     # if we find just one coefficient in A that is positive, then the LP is restricted
-            all_coefficients_in_A_are_negative = False
-            break
-
-    if(all_coefficients_in_A_are_negative):
+        return (INFEASIBLE, None, 0) if with_status else -1                     # therefore no further calculations are necessary.
+
+    initial_B = B
+    with phase(stats, "simplex"):
+        (B, N, T) = slackform_to_tableau(lp_in_valid_slackform, tableau_dir)
+        status = WARM_START_FAILED
+        if(initial_B is not None):
+            (status, iterations) = run_warm_start(T, B, N, initial_B, max_iterations, pricing, stats, tolerances)
+            if(status == WARM_START_FAILED):
+                logging.debug("SIMPLEX: the initial base %s is singular or neither valid nor optimal, it is ignored", initial_B)
+                (B, N, T) = slackform_to_tableau(lp_in_valid_slackform, tableau_dir)
+        if(status == WARM_START_FAILED):
+            (status, iterations) = run_simplex(T, B, N, max_iterations, pricing, stats, tolerances)
+
+    if(status == INFEASIBLE):
+        logging.debug("SIMPLEX ended: DUAL SIMPLEX found that no NBVar can raise a negative BVar, therefore this LP is invalid.")
+
+    if(status == UNBOUNDED):
         logging.debug("SIMPLEX ended: This LP is unrestricted in its range of optimal solutions")
-        return -1                                                               # we just return the LP and logging.debug out the state
-
-    # STEP 2.2: find the leaving BVar with the minimal quotient (b'_l / a_le)
-    # and the corresponding pivot row of x_l.
-    row_index_of_x_l = 0                                                        # the resulting row number of our leaving BVar will be in here after the for-loop completed
-    minimal_quotient = 0xFFFFFFFF                                               # we keep track of the minimal quotient
-    lowest_index = 0xFFFFFFFF                                                   # again, we keep track of the lowest index to suffice the Bland-rule
-    corresp_coeff = -1                                                          # we remember the coefficient of the leaving BVar as we will need it later
-    for index, coeff in zip(range(0, m+1), A_bar[ : , column_index_of_x_e]):    # for each coefficient of x_e in A_bar
-        if(coeff >= 0):                                                         # skip if coefficient in A_bar is positive (which would mean that it is negative in A)
-            continue
-        quotient = (b_bar[index] / -coeff)                                      # we calculate the quotient b'_l / a_le
-        if((quotient < minimal_quotient)                                        # if this quotient is in fact smaller than the smallest of the quotients calculated before
-        or ((quotient == minimal_quotient) 
-         and (B[index] < B[row_index_of_x_l]))):                                # or if the quotient is exactly as small as the smallest of the quotients calculated before,
-                                                                                # but has a smaller index
-            minimal_quotient = quotient                                         # then update the minimal quotient
-            row_index_of_x_l = index                                            # and the row of the leaving BVar
-            corresp_coeff = coeff                                               # and the corresponding coefficient of the entering NBvar x_e in A_bar in that row
-            lowest_index = B[index]                                             # and the index of the BVar of our new minimal quotient
-
-    # STEP 3.1: update N and B.
-    actual_entering_index = N[column_index_of_x_e]
-    actual_leaving_index = B[row_index_of_x_l]
-    N[column_index_of_x_e] = actual_leaving_index
-    B[row_index_of_x_l] = actual_entering_index
-
-    # STEP 3.2: pivot line has to be reordered so that x_e stands alone.
-    row_of_x_l = A_bar[row_index_of_x_l]                                        # get a reference to the leaving bvar row
-    row_of_x_l[column_index_of_x_e] = -1                                        # set this to the negative coefficient of the exiting BVar, which is always -1
-    for index in range(0, n):                                                   # for each coefficient in A_bar in the pivot line
-        row_of_x_l[index] /= -corresp_coeff                                     # divide the coefficients by the coefficient of the entering NBVar
-    b_bar[row_index_of_x_l] /= -corresp_coeff                                   # do the same for the corresponding component in b'
-
-    # STEP 3.3: x_e now has to be placed into the other lines.
-    for row, row_index in zip(A_bar, range(0, m)):                              # for each row in A_bar
-        if(row_index == row_index_of_x_l):                                      # the pivot line needs to be skipped, as we already reordered it before
-            continue
-
-        temp_row_of_x_l = np.copy(row_of_x_l)                                   # copy the pivot line
-        temp_b_bar_entry = b_bar[row_index_of_x_l]                              # copy b' component of the pivot line
-        old_coeff = row[column_index_of_x_e]                                    # find the coefficient of the entering NBVar in the currently processed row
-        temp_row_of_x_l *= old_coeff                                            # multiply the copied pivot line with that coefficient
-        temp_b_bar_entry *= old_coeff                                           # do the same for the corresponding component in b'
-
-        b_bar[row_index] += temp_b_bar_entry                                    # then update the component of b' of the current row
-        for entry_index in range(0, n):                                         # and do the same for the currently processed row in A_bar
-            row[entry_index] += temp_row_of_x_l[entry_index]
-
-        row[column_index_of_x_e] = temp_row_of_x_l[column_index_of_x_e]         # afterwards, set the component in A_bar which now represents
-                                                                                # the coefficient of the entering NBVar to the coefficient of the pivot line
-                                                                                # as this is the actual value for it.
 
-    # STEP 3.4: x_e now has to be placed into the z-row (v + c')
-    # (basically the same as above, just for the z-row).
-    temp_row_of_x_l = np.copy(row_of_x_l)                                       # copy the pivot line again
-    temp_b_bar_entry = b_bar[row_index_of_x_l]                                  # copy b' component of the pivot line again
-    old_coeff = c_bar[column_index_of_x_e]                                      # find the coefficient of the entering NBVar in the z-row
-    temp_row_of_x_l *= old_coeff                                                # multiply the copied pivot line with that coefficient
-    temp_b_bar_entry *= old_coeff                                               # do the same for the corresponding component in b'
-
-    v += temp_b_bar_entry                                                       # set v to be the multiplied b' component
-
-    for entry_index in range(0, n):                                             # update c' by adding the multiplied pivot line coefficients to the c'-components
-            c_bar[entry_index] += temp_row_of_x_l[entry_index]
-
-    c_bar[column_index_of_x_e] = temp_row_of_x_l[column_index_of_x_e]           # afterwards, set the component in c'  which now represents
-                                                                                # the coefficient of the entering NBVar to the coefficient of the pivot line
-                                                                                # as this is the actual value for it.
-
-    # STEP 4: Go back to STEP 1
-    return simplex_with_bland_rule((B, N, -A_bar, b_bar, c_bar, v))
\ No newline at end of file
+    if(status == ITERATION_LIMIT):
+        logging.debug("SIMPLEX ended: the iteration limit of %s pivots was reached before an optimal slackform was found",
+                      max_iterations)
+
+    if(status != OPTIMAL):
+        return (status, None, iterations) if with_status else -1
+
+    optimal_slackform = tableau_to_slackform(B, N, T)
+    return (OPTIMAL, optimal_slackform, iterations) if with_status else optimal_slackform
+
+# the pivot loop of SIMPLEX. It works in place on the tableau T and on B and N
+# and returns the status together with the amount of pivots that were made.
+# every pivot is reported to stats, if it is not None.
+#
+# coefficients of c' up to tolerances.optimality do not make a NBVar enter and
+# coefficients of A up to tolerances.pivot do not restrict it, so that
+# rounding errors neither cause extra pivots nor pivots on noise. a b' that
+# became slightly negative by rounding errors counts as 0 in the ratio test.
+def run_simplex(T, B, N, max_iterations=None, pricing=None, stats=None, tolerances=None):
+    m = len(B)
+    n = len(N)
+    A = T[:m, :n]                                                               # these are all views into T, so they
+    b_bar = T[:m, n]                                                            # always reflect the current slackform
+    c_bar = T[m, :n]
+    tolerances = tolerances_or_default(tolerances)
+    rule = make_pricing_rule(pricing, tolerances.optimality)
+
+    iterations = 0
+    while(True):
+        # STEP 1.1: find the NBVar with a positive coefficient in c'
+        # that the pricing rule prefers (by default the lowest index
+        # to suffice the Bland-rule).
+        column_index_of_x_e = rule.entering(c_bar, N, A)
+
+        # STEP 1.2: if there is no coefficient of any NBVar in c' which is > 0,
+        # then stop, as the current slackform already is optimal.
+        if(column_index_of_x_e == -1):
+            return (OPTIMAL, iterations)
+
+        if(max_iterations is not None and iterations >= max_iterations):
+            return (ITERATION_LIMIT, iterations)
+
+        # STEP 2.1: if all coefficients in A in the column of x_e
+        # are negative or zero, the LP is unrestricted in its range of optimal
+        # solutions, which implies that there is no optimal solution.
+        column_of_x_e = A[:, column_index_of_x_e]
+        restricting_rows = np.flatnonzero(column_of_x_e > tolerances.pivot)
+        if(restricting_rows.size == 0):
+            return (UNBOUNDED, iterations)
+
+        # STEP 2.2: find the leaving BVar with the minimal quotient (b'_l / a_le),
+        # ties are broken by the lowest index to suffice the Bland-rule.
+        quotients = np.maximum(b_bar[restricting_rows], 0) / column_of_x_e[restricting_rows]
+        ties = restricting_rows[quotients == quotients.min()]
+        row_index_of_x_l = ties[np.argmin(B[ties])]
+        degenerate = b_bar[row_index_of_x_l] <= tolerances.feasibility
+
+        # STEP 3: exchange x_e and x_l and update the tableau.
+        rule.pivoted(A[row_index_of_x_l], column_index_of_x_e, column_index_of_x_e, degenerate)
+        if(stats is not None):
+            stats.pivoted(degenerate, ties.size, T, row_index_of_x_l, column_index_of_x_e)
+        pivot(T, row_index_of_x_l, column_index_of_x_e)
+        temp = N[column_index_of_x_e]
+        N[column_index_of_x_e] = B[row_index_of_x_l]
+        B[row_index_of_x_l] = temp
+        iterations += 1
+
+        # STEP 4: Go back to STEP 1
+
+# the function pivots the slackform in T to the base initial_B and continues
+# from there:
+#
+# - if the slackform of initial_B is valid (b' >= 0), SIMPLEX continues right
+#   away, no phase one is needed.
+# - if it is not valid, but optimal (c' <= 0), which is what happens to an
+#   optimal base when components of b change, DUAL SIMPLEX repairs b' first.
+# - otherwise WARM_START_FAILED is returned and T is left in an arbitrary base.
+def run_warm_start(T, B, N, initial_B, max_iterations=None, pricing=None, stats=None, tolerances=None):
+    m = len(B)
+    n = len(N)
+    tolerances = tolerances_or_default(tolerances)
+    iterations = pivot_to_basis(T, B, N, initial_B)
+    if(iterations == -1):
+        return (WARM_START_FAILED, 0)
+    remaining = None if max_iterations is None else max(max_iterations - iterations, 0)
+
+    if(np.all(T[:m, n] >= -tolerances.feasibility)):
+        (status, count) = run_simplex(T, B, N, remaining, pricing, stats, tolerances)
+        return (status, iterations + count)
+
+    if(np.all(T[m, :n] <= tolerances.optimality)):
+        with phase(stats, "dual"):
+            (status, count) = run_dual_simplex(T, B, N, remaining, stats, tolerances)
+        iterations += count
+        if(status != OPTIMAL):
+            return (status, iterations)
+        remaining = None if max_iterations is None else max(max_iterations - iterations, 0)
+        # c' may have become slightly positive by rounding errors
+        (status, count) = run_simplex(T, B, N, remaining, pricing, stats, tolerances)
+        return (status, iterations + count)
+
+    return (WARM_START_FAILED, iterations)
+
+# the function pivots the slackform in T so that exactly the variables in
+# target_B are BVars. every variable of target_B that is a NBVar enters in
+# the row of a BVar that is not in target_B, with the largest coefficient in
+# its column. returns the amount of pivots, or -1 if target_B is not a base
+# (its columns are linearly dependent).
+def pivot_to_basis(T, B, N, target_B):
+    m = len(B)
+    target_B = np.asarray(target_B, dtype=int)
+    if(len(target_B) != m or len(np.unique(target_B)) != m):
+        raise ValueError("an initial base needs exactly " + str(m) + " different indices, got " + str(target_B))
+
+    pivots = 0
+    for index in target_B:
+        if(index in B):
+            continue
+        columns = np.flatnonzero(N == index)
+        if(columns.size == 0):
+            raise ValueError("x_" + str(index) + " of the initial base is not a variable of this LP")
+        column_index_of_x_e = columns[0]
+        coefficients = np.where(np.isin(B, target_B), 0, np.abs(T[:m, column_index_of_x_e]))
+        row_index_of_x_l = int(np.argmax(coefficients))
+        if(coefficients[row_index_of_x_l] <= PIVOT_TOLERANCE):
+            return -1
+        pivot(T, row_index_of_x_l, column_index_of_x_e)
+        N[column_index_of_x_e] = B[row_index_of_x_l]
+        B[row_index_of_x_l] = index
+        pivots += 1
+    return pivots
@@ -0,0 +1,103 @@
+import numpy as np
+import contextlib
+import time
+
+# a SolveStats collects where a solve spends its time. it is passed as
+# stats=... to SV, INIT, SIMPLEX, DUAL SIMPLEX and REVISED SIMPLEX, which then
+#
+# - wrap each of their phases in stats.phase(name), which measures its wall
+#   time. phases can be nested, e.g. the SIMPLEX run of INIT on L_H is
+#   recorded as "init/simplex", while the SIMPLEX run of phase two is
+#   "simplex". the time of a phase includes the time of its nested phases.
+# - call stats.pivoted(...) right before every pivot, which counts the pivots,
+#   the degenerate pivots (pivots that do not change the targetfunction value,
+#   for SIMPLEX the ones where x_l is 0), the ratio tests with ties and, for
+#   the tableau engines, the fill-in (the entries of the tableau that are 0
+#   before the pivot and not after it).
+#
+# all of this is only done if a SolveStats is passed. without one (stats=None,
+# the default), the engines only check for None, so it costs next to nothing.
+#
+# to act on every pivot (e.g. to log progress), pivoted can be overridden in a
+# subclass.
+
+class PhaseStats:
+    __slots__ = ("calls", "time", "pivots", "degenerate_pivots", "ratio_test_ties", "fill_in")
+
+    def __init__(self):
+        self.calls = 0                                                          # how often the phase was entered
+        self.time = 0.0                                                         # wall time in seconds
+        self.pivots = 0
+        self.degenerate_pivots = 0
+        self.ratio_test_ties = 0                                                # pivots where the ratio test had more than one candidate
+        self.fill_in = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class SolveStats:
+    # track_fill_in=False skips the fill-in, which costs about as much as the
+    # pivot itself.
+    def __init__(self, track_fill_in=True):
+        self.track_fill_in = track_fill_in
+        self.phases = dict()                                                    # full name of the phase: PhaseStats
+        self.current = list()                                                   # names of the phases that are running, the innermost last
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.current.append(name)
+        record = self.phases.setdefault("/".join(self.current), PhaseStats())
+        starttime = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.time += time.perf_counter() - starttime
+            record.calls += 1
+            self.current.pop()
+
+    # called right before the pivot on row_index_of_x_l and column_index_of_x_e
+    # of the tableau T (T is None for engines without a tableau). ties is the
+    # amount of variables with the minimal quotient in the ratio test.
+    def pivoted(self, degenerate, ties, T=None, row_index_of_x_l=None, column_index_of_x_e=None):
+        record = self.phases.setdefault("/".join(self.current), PhaseStats())
+        record.pivots += 1
+        if(degenerate):
+            record.degenerate_pivots += 1
+        if(ties > 1):
+            record.ratio_test_ties += 1
+        if(self.track_fill_in and T is not None):
+            record.fill_in += fill_in_of_pivot(T, row_index_of_x_l, column_index_of_x_e)
+
+    def total_pivots(self):
+        return sum(record.pivots for record in self.phases.values())
+
+    def as_dict(self):
+        return {name: record.as_dict() for (name, record) in self.phases.items()}
+
+    def __repr__(self):
+        lines = ["%-24s %6s %12s %8s %11s %6s %8s"
+                 % ("phase", "calls", "time [ms]", "pivots", "degenerate", "ties", "fill-in")]
+        for (name, record) in self.phases.items():
+            lines.append("%-24s %6d %12.3f %8d %11d %6d %8d"
+                         % (name, record.calls, record.time * 1000, record.pivots,
+                            record.degenerate_pivots, record.ratio_test_ties, record.fill_in))
+        return "\n".join(lines)
+
+# the phase name in stats, or a context that does nothing if stats is None.
+def phase(stats, name):
+    if(stats is None):
+        return contextlib.nullcontext()
+    return stats.phase(name)
+
+# the amount of entries of T that are 0 before the pivot (see utility.pivot)
+# and not after it. only the entries outside of the pivot row and column whose
+# row has a non-zero in the pivot column and whose column has a non-zero in
+# the pivot row can change.
+def fill_in_of_pivot(T, row_index_of_x_l, column_index_of_x_e):
+    rows = np.flatnonzero(T[:, column_index_of_x_e])
+    rows = rows[rows != row_index_of_x_l]
+    columns = np.flatnonzero(T[row_index_of_x_l])
+    columns = columns[columns != column_index_of_x_e]
+    block = T[np.ix_(rows, columns)]
+    update = np.outer(T[rows, column_index_of_x_e], T[row_index_of_x_l, columns] / T[row_index_of_x_l, column_index_of_x_e])
+    return int(np.count_nonzero((block == 0) & (update != 0)))
@@ -1,21 +1,180 @@
 import numpy as np
-from simplex import simplex_with_bland_rule
+from simplex import simplex_with_bland_rule, run_warm_start, WARM_START_FAILED
 from init import init
-from utility import standardform_to_slackform
+from dual import dual_simplex_method
+from utility import standardform_to_slackform, slackform_to_tableau, tableau_to_slackform, is_sparse
+from utility import OPTIMAL, INFEASIBLE, UNBOUNDED
+from result import SolveResult, result_of_slackform
+from stats import phase
 import logging
 
-def sv(standardform_lp):
-    # STEP 1: calculate INIT
-    correct_initial_slackform = init(standardform_lp)                           # pass it to INIT
+# the engines that are not needed for the default method "tableau" (and the
+# ones that need scipy) are imported where they are used, so that a process
+# that solves a single LP only pays for the imports of its engine.
 
-    # STEP 2: calculate SIMPLEX
-    result = simplex_with_bland_rule(correct_initial_slackform)                 # pass the valid slackform resulting from INIT to SIMPLEX and return the result
-    
-    if(result != -1):
+# method selects the solver engine:
+#
+# - "tableau": INIT followed by SIMPLEX on the dense slackform
+# - "revised": REVISED SIMPLEX on a factorized basis matrix
+# - "dual": DUAL SIMPLEX from the base of the slack variables, which needs no
+#   INIT if c <= 0 (see dual.dual_simplex_method). if some c_j > 0, DUAL
+#   SIMPLEX only makes the slackform valid and SIMPLEX finishes it
+# - "bounded": BOUNDED SIMPLEX on the dense tableau, for a LP (A, b, c, l, u)
+#   with lower and upper bounds l <= x <= u (see bounded.py). a LP (A, b, c) is
+#   solved with l = 0 and no upper bounds
+# - "ipm": the INTERIOR POINT METHOD followed by its crossover to an optimal
+#   base (see ipm.py), whose amount of iterations hardly grows with the size
+#   of the LP. B cannot be used with it
+#
+# if no method is given, a LP with bounds is solved with "bounded", a
+# scipy.sparse A with "revised", which never densifies A, and a dense A with
+# "tableau".
+#
+# pricing selects the rule for the entering NBVar in both phases (see pricing.py).
+#
+# B may be an initial base, e.g. the optimal base of a previous solve of this LP
+# before some components of b or c changed. if that base still is valid (or,
+# with "tableau" and "dual", at least still optimal, so that DUAL SIMPLEX can repair it),
+# INIT is skipped. otherwise SV starts from scratch.
+#
+# SV returns a SolveResult (see result.py). the optimum is logged as well, but
+# only formatted if DEBUG logging is enabled.
+#
+# stats may be a SolveStats (see stats.py), which then holds the time and the
+# pivots of every phase, e.g. "warm_start", "init/construction",
+# "init/simplex", "init/substitution" and "simplex" for "tableau".
+#
+# presolve=True reduces the LP before it is solved and maps the result back
+# (see presolve.py). B refers to the LP as given, so it cannot be used then.
+#
+# scaling=True scales the rows and columns of the LP before it is solved (and
+# before PRESOLVE) and maps the result back (see scaling.py), which keeps
+# coefficients of very different magnitudes from causing extra pivots.
+# tolerances may be a utility.Tolerances for all engines.
+#
+# tableau_dir is a directory in which "tableau" and "dual" keep their tableaus
+# as memory-mapped files (see utility.new_tableau), so that dense LPs whose
+# tableau is larger than the memory can still be solved.
+def sv(standardform_lp, method=None, pricing=None, B=None, stats=None, presolve=False, scaling=False,
+       tolerances=None, tableau_dir=None):
+    if(scaling):
+        from scaling import scale, unscale
+        with phase(stats, "scaling"):
+            scaled = scale(standardform_lp)
+        result = sv(scaled.lp, method, pricing, B, stats, presolve, tolerances=tolerances, tableau_dir=tableau_dir)
+        with phase(stats, "scaling"):
+            return unscale(scaled, result)
+
+    has_bounds = len(standardform_lp) == 5
+    if(has_bounds and method not in (None, "bounded")):
+        raise ValueError("a LP with bounds can only be solved with the method \"bounded\"")
+    if(method == "bounded" or has_bounds):
+        if(B is not None or presolve):
+            raise ValueError("an initial base and presolve cannot be used together with bounds")
+        if(not has_bounds):
+            standardform_lp = tuple(standardform_lp) + (None, None)
+        from bounded import bounded_simplex
+        with phase(stats, "bounded"):
+            return bounded_simplex(standardform_lp, pricing=pricing, stats=stats, tolerances=tolerances)
+
+    if(presolve):
+        if(B is not None):
+            raise ValueError("an initial base cannot be used together with presolve")
+        return sv_presolved(standardform_lp, method, pricing, stats, tolerances, tableau_dir)
+
+    if(method is None):
+        method = "revised" if is_sparse(standardform_lp[0]) else "tableau"
+
+    if(method == "tableau" or method == "dual"):
+        # STEP 0: try to start from the base B
+        (status, result, iterations) = (WARM_START_FAILED, None, 0)
+        if(B is not None):
+            with phase(stats, "warm_start"):
+                (status, result, iterations) = warm_start(standardform_lp, B, pricing, stats, tolerances, tableau_dir)
+
+        if(status == WARM_START_FAILED and method == "dual"):
+            (status, result, iterations) = dual_simplex_method(standardform_lp, pricing=pricing, with_status=True,
+                                                               stats=stats, tolerances=tolerances, tableau_dir=tableau_dir)
+
+        elif(status == WARM_START_FAILED):
+            # STEP 1: calculate INIT
+            with phase(stats, "init"):
+                (status, correct_initial_slackform, iterations_of_init) = init(
+                        standardform_lp, pricing, with_status=True, stats=stats,
+                        tolerances=tolerances, tableau_dir=tableau_dir)         # pass it to INIT
+
+            # STEP 2: calculate SIMPLEX
+            if(status == OPTIMAL):                                              # pass the valid slackform resulting from INIT to SIMPLEX and return the result
+                (status, result, iterations) = simplex_with_bland_rule(
+                        correct_initial_slackform, pricing=pricing, with_status=True,
+                        stats=stats, tolerances=tolerances, tableau_dir=tableau_dir)
+            else:                                                               # INIT found the LP to be invalid or could not finish L_H
+                (result, iterations) = (None, 0)
+            iterations += iterations_of_init
+
+    elif(method == "revised"):
+        from revised import revised_simplex
+        (status, result, iterations) = revised_simplex(standardform_lp, pricing=pricing, B=B, with_status=True,
+                                                       stats=stats, tolerances=tolerances)
+
+    elif(method == "ipm"):
+        if(B is not None):
+            raise ValueError("an initial base cannot be used together with the method \"ipm\"")
+        from ipm import interior_point_method
+        return interior_point_method(standardform_lp, crossover=True, pricing=pricing, stats=stats,
+                                     tolerances=tolerances, tableau_dir=tableau_dir)
+
+    else:
+        raise ValueError("unknown SV method: " + str(method))
+
+    if(status == OPTIMAL):
         (B, N, A, b, c, v) = result
-        logging.debug(str("This was a LP with " + str(len(b)) + " conditions and "
-        + str(len(c)) + " variables. " + "Best value is " + str(v)
-        + " with corresponding solution " + str(b)
-        + " and corresponding base " + str(B) + "."))
+        logging.debug("This was a LP with %d conditions and %d variables. Best value is %s"
+                      " with corresponding solution %s and corresponding base %s.",
+                      len(b), len(c), v, b, B)
+
+    return result_of_slackform(status, result, len(standardform_lp[2]), len(standardform_lp[1]), iterations)
+
+# SV on the LP reduced by PRESOLVE, with the result mapped back by POSTSOLVE.
+def sv_presolved(standardform_lp, method=None, pricing=None, stats=None, tolerances=None, tableau_dir=None):
+    from presolve import presolve, postsolve
+    with phase(stats, "presolve"):
+        presolved = presolve(standardform_lp)
+    if(presolved.status == INFEASIBLE):
+        logging.debug("PRESOLVE ended: a condition can not be satisfied, therefore this LP is invalid.")
+        return SolveResult(INFEASIBLE)
+
+    (A, b, c) = presolved.lp
+    logging.debug("PRESOLVE reduced the LP from %d conditions and %d variables to %d conditions and %d variables.",
+                  presolved.A.shape[0], presolved.A.shape[1], len(b), len(c))
+    if(len(b) == 0):                                                            # no conditions are left, so every x_j with c_j > 0 can be raised
+        if(np.any(c > 0)):                                                      # without limit (a x_j with c_j <= 0 would have been dropped)
+            return SolveResult(UNBOUNDED)
+        result = SolveResult(OPTIMAL, 0.0, np.zeros(len(c)), np.zeros(0, dtype=int), np.zeros(0), 0)
+    else:
+        result = sv(presolved.lp, method, pricing, stats=stats, tolerances=tolerances, tableau_dir=tableau_dir)
+
+    with phase(stats, "postsolve"):
+        return postsolve(presolved, result)
+
+# the standardform LP is pivoted from the base of its slack variables to the
+# base B and solved from there (see simplex.run_warm_start). returns the status
+# (WARM_START_FAILED if B could not be used), the optimal slackform (or None)
+# and the amount of pivots that were made.
+def warm_start(standardform_lp, B, pricing=None, stats=None, tolerances=None, tableau_dir=None):
+    (B_0, N_0, T) = slackform_to_tableau(standardform_to_slackform(standardform_lp), tableau_dir)
+    (status, iterations) = run_warm_start(T, B_0, N_0, B, pricing=pricing, stats=stats, tolerances=tolerances)
+
+    if(status == WARM_START_FAILED):
+        logging.debug("SV: the initial base %s is singular or neither valid nor optimal, INIT is used instead", B)
+        return (WARM_START_FAILED, None, iterations)
+
+    if(status == INFEASIBLE):
+        logging.debug("SV ended: DUAL SIMPLEX found that no NBVar can raise a negative BVar, therefore this LP is invalid.")
+        return (INFEASIBLE, None, iterations)
+
+    if(status == UNBOUNDED):
+        logging.debug("SIMPLEX ended: This LP is unrestricted in its range of optimal solutions")
+        return (UNBOUNDED, None, iterations)
 
-    return
\ No newline at end of file
+    return (status, tableau_to_slackform(B_0, N_0, T), iterations)
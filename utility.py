@@ -1,4 +1,93 @@
 import numpy as np
+import tempfile
+
+# status values reported by the pivot engines and by the SolveResult of SV
+# and EXHAUSTIVE (see result.py). SIMPLEX and INIT still return -1 to their
+# callers on failure, unless they are asked for the status (with_status=True).
+OPTIMAL = "optimal"
+UNBOUNDED = "unbounded"
+INFEASIBLE = "infeasible"
+ITERATION_LIMIT = "iteration_limit"
+
+# the tolerances of the pivot engines, passed as tolerances=... (None means
+# the defaults). they are absolute, so they work best on a scaled LP (see
+# scaling.py), whose entries are all close to 1.
+#
+# - feasibility: components of b' above -feasibility count as >= 0, and a
+#   BVar with a value of at most feasibility is at its bound (degenerate)
+# - optimality: coefficients of c' of at most optimality count as <= 0, so
+#   rounding errors do not make a NBVar enter
+# - pivot: coefficients with an absolute value of at most pivot are never
+#   pivoted on and do not restrict the ratio test
+class Tolerances:
+    __slots__ = ("feasibility", "optimality", "pivot")
+
+    def __init__(self, feasibility=1e-9, optimality=1e-9, pivot=1e-9):
+        self.feasibility = feasibility
+        self.optimality = optimality
+        self.pivot = pivot
+
+    def __repr__(self):
+        return ("Tolerances(feasibility=" + repr(self.feasibility) + ", optimality=" + repr(self.optimality)
+                + ", pivot=" + repr(self.pivot) + ")")
+
+DEFAULT_TOLERANCES = Tolerances()
+
+def tolerances_or_default(tolerances):
+    return DEFAULT_TOLERANCES if tolerances is None else tolerances
+
+# A may be a dense ndarray or a scipy.sparse matrix. this is checked by duck
+# typing, so that the dense code paths do not need to import scipy.
+def is_sparse(A):
+    return hasattr(A, "tocsc")
+
+# the column j of A' = [A, I, -1], where the identity block belongs to the slack
+# variables and the last column to the auxiliary x_0 of INIT. the columns of
+# the identity block are never stored, and a sparse A has to be in CSC format.
+def column_of_A_prime(A, j):
+    (m, n) = A.shape
+    column = np.zeros(m)
+    if(j < n):
+        if(is_sparse(A)):
+            start = A.indptr[j]
+            end = A.indptr[j+1]
+            column[A.indices[start:end]] = A.data[start:end]
+        else:
+            column[:] = A[:, j]
+    elif(j < n+m):
+        column[j-n] = 1
+    else:
+        column[:] = -1
+    return column
+
+# the dense matrix A'_B, whose columns are the columns of A' in basis
+# (0-based column indices, see column_of_A_prime).
+def basis_matrix(A, basis):
+    A_prime_B = np.empty((A.shape[0], len(basis)))
+    for k, j in zip(range(0, len(basis)), basis):
+        A_prime_B[:, k] = column_of_A_prime(A, j)
+    return A_prime_B
+
+# the LP (A, b, c, l, u) of BOUNDED SIMPLEX as a LP in standardform (A, b, c)
+# for the other solvers: every finite upper bound becomes a condition
+# x_j <= u_j and every lower bound l_j > 0 a condition -x_j <= -l_j. bounds
+# l_j < 0 cannot be expressed with x >= 0, so they raise a ValueError.
+def bounds_to_conditions(lp_with_bounds):
+    (A, b, c, l, u) = lp_with_bounds
+    n = len(c)
+    l = np.zeros(n) if l is None else np.asarray(l, dtype=float)
+    u = np.full(n, np.inf) if u is None else np.asarray(u, dtype=float)
+    if(np.any(l < 0)):
+        raise ValueError("negative lower bounds cannot be expressed as conditions of a LP in standardform")
+    upper_bounded = np.flatnonzero(np.isfinite(u))
+    lower_bounded = np.flatnonzero(l > 0)
+    identity = np.eye(n)
+    rows = np.r_[identity[upper_bounded], -identity[lower_bounded]]
+    b = np.r_[b, u[upper_bounded], -l[lower_bounded]]
+    if(is_sparse(A)):
+        import scipy.sparse                                                     # imported here, so that dense LPs never need scipy
+        return (scipy.sparse.vstack([A, scipy.sparse.csr_matrix(rows)], format=A.format), b, c)
+    return (np.r_[A, rows], b, c)
 
 def standardform_to_slackform(standardform_lp):
     (A, b, c) = standardform_lp
@@ -7,4 +96,90 @@ def standardform_to_slackform(standardform_lp):
     N = np.arange(1, n+1)
     B = np.arange(n+1, n+m+1)
     v = 0
-    return (B, N, A, b, c, v)
\ No newline at end of file
+    return (B, N, A, b, c, v)
+
+PIVOT_BLOCK_ENTRIES = 1 << 18                                                   # pivot updates at most this many entries of T at once
+
+# a new uninitialized tableau of the given shape. with tableau_dir it is a
+# numpy.memmap of a temporary file in that directory instead of an array in
+# memory, so that the operating system can page it out to disk: tableaus that
+# do not fit into memory can still be pivoted, as pivot only ever touches a
+# block of rows at a time. the file has no name and is removed as soon as
+# the tableau is no longer used.
+def new_tableau(shape, tableau_dir=None):
+    if(tableau_dir is None):
+        return np.empty(shape, dtype=float)
+    return np.memmap(tempfile.TemporaryFile(dir=tableau_dir), dtype=float, mode="w+", shape=shape)
+
+# the function gets a LP in slackform (B, N, A, b, c, v) as input and packs
+# it into one contiguous tableau T of shape (m+1) x (n+1):
+#
+#       T = | A  b  |
+#           | c  -v |
+#
+# v is stored negated so that a pivot is the very same rank-1 update for
+# every row of T, including the z-row. B and N are returned as copies,
+# as the pivot engine updates them in place.
+#
+# extra_rows adds uninitialized rows below the z-row (e.g. for a second
+# objective function), and tableau_dir is handed to new_tableau.
+def slackform_to_tableau(lp_in_slackform, tableau_dir=None, extra_rows=0):
+    (B, N, A, b, c, v) = lp_in_slackform
+    m = len(b)
+    n = len(c)
+    T = new_tableau((m+1+extra_rows, n+1), tableau_dir)
+    write_matrix(T[:m, :n], A)
+    T[:m, n] = b
+    T[m, :n] = c
+    T[m, n] = -v
+    return (np.array(B, dtype=int), np.array(N, dtype=int), T)
+
+# writes the dense or sparse matrix A into block, a view into a tableau of
+# the same shape as A. a sparse A is scattered into it entry by entry, so no
+# dense copy of A is made on the way.
+def write_matrix(block, A):
+    if(is_sparse(A)):
+        block[:, :] = 0
+        A = A.tocoo()
+        A.sum_duplicates()
+        block[A.row, A.col] = A.data
+    else:
+        block[:, :] = A
+
+# the inverse of slackform_to_tableau. A, b and c are views into T.
+def tableau_to_slackform(B, N, T):
+    m = len(B)
+    n = len(N)
+    v = 0.0 - float(T[m, n])                                                    # 0.0 - x instead of -x, so an untouched v stays 0.0 and not -0.0
+    return (B, N, T[:m, :n], T[:m, n], T[m, :n], v)
+
+# the function pivots the tableau T in place, so that the NBVar in column
+# column_index_of_x_e takes the place of the BVar in row row_index_of_x_l.
+#
+# solving the pivot row for x_e divides it by the pivot coefficient a_le,
+# and inserting it into every other row (including the z-row) subtracts a
+# multiple of it, which is one rank-1 update of T. The column of x_e is
+# then replaced by the coefficients of x_l, which are -a_ie / a_le in every
+# other row and 1 / a_le in the pivot row.
+#
+# the rank-1 update is done in blocks of rows of PIVOT_BLOCK_ENTRIES entries,
+# so a pivot never needs memory for a second tableau, and a tableau in a
+# memory-mapped file (see new_tableau) is streamed through block by block.
+# rows with a 0 in the column of x_e do not change, so in blocks where most
+# rows have one, only the others are updated.
+def pivot(T, row_index_of_x_l, column_index_of_x_e):
+    corresp_coeff = T[row_index_of_x_l, column_index_of_x_e]
+    pivot_row = T[row_index_of_x_l] / corresp_coeff
+    column_of_x_e = np.array(T[:, column_index_of_x_e])
+
+    block_rows = max(1, PIVOT_BLOCK_ENTRIES // T.shape[1])
+    for first in range(0, T.shape[0], block_rows):
+        column_of_block = column_of_x_e[first:first+block_rows]
+        rows = np.flatnonzero(column_of_block)
+        if(2 * rows.size >= column_of_block.size):                              # mostly non-zeros: the whole block is cheaper than gathering rows
+            T[first:first+block_rows] -= np.outer(column_of_block, pivot_row)
+        elif(rows.size > 0):
+            T[first + rows] -= np.outer(column_of_block[rows], pivot_row)
+    T[row_index_of_x_l] = pivot_row
+    T[:, column_index_of_x_e] = -column_of_x_e / corresp_coeff
+    T[row_index_of_x_l, column_index_of_x_e] = 1 / corresp_coeff